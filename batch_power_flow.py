@@ -0,0 +1,149 @@
+from circuit import Circuit, ybus_array, calc_power_injection
+from jacobian import calc_jacobian_batch
+from power_flow import newton_step
+from bus import PQ, SLACK
+from settings import Settings
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+
+#Newton-Raphson power flow of K operating points (scenarios) of one circuit at once, e.g. for Monte Carlo
+#or probabilistic load flow: only the scheduled injections differ between scenarios
+#the state is kept as stacked (K x N) arrays; injections are computed for all active scenarios with one
+#Ybus product, and with a dense Ybus the K Jacobians are built and solved as one stacked array
+#(with a sparse Ybus the Jacobian entries of all scenarios are evaluated on the Ybus sparsity pattern and
+#solved as one block-diagonal sparse system)
+#scenarios leave the active set as soon as they converge (or diverge)
+#each scenario is updated with the damped step of Power_Flow.solve (newton_step, per-scenario step size)
+
+class Batch_Power_Flow:
+
+    def __init__(self, circuit: Circuit, tol: float = 10**-9, max_iter: int = 20, damping: str = "adaptive"):
+        if damping not in ("adaptive", "fixed"):
+            raise ValueError("Damping must be 'adaptive' or 'fixed'")
+        self.circuit = circuit
+        self.tol = tol
+        self.max_iter = max_iter
+        self.damping = damping  # as in Power_Flow.solve
+        self.converged = None
+        self.iterations = None
+
+    def load_scenarios(self, load_p, load_q=None):
+        """Scheduled P and Q (MW/Mvar, K x N) for K sets of load values.
+
+        load_p and load_q are K x L arrays with one column per load in circuit.loads order; generators
+        keep their setpoints. load_q defaults to the loads' current Mvar.
+        """
+        circuit = self.circuit
+        loads = list(circuit.loads.values())
+        load_p = np.atleast_2d(np.asarray(load_p, dtype=float))
+        if load_q is None:
+            load_q = np.tile([load.reactive_power for load in loads], (len(load_p), 1))
+        load_q = np.atleast_2d(np.asarray(load_q, dtype=float))
+        load_idx = np.array([circuit.bus_indices[load.bus.name] for load in loads], dtype=int)
+
+        # scheduled injections without the loads, then every scenario's loads subtracted at their buses
+        p_sched = circuit.bus_state.p_sched.copy()
+        q_sched = circuit.bus_state.q_sched.copy()
+        np.add.at(p_sched, load_idx, [load.real_power for load in loads])
+        np.add.at(q_sched, load_idx, [load.reactive_power for load in loads])
+        p_sched = np.tile(p_sched, (len(load_p), 1))
+        q_sched = np.tile(q_sched, (len(load_q), 1))
+        np.add.at(p_sched, (slice(None), load_idx), -load_p)
+        np.add.at(q_sched, (slice(None), load_idx), -load_q)
+        return p_sched, q_sched
+
+    def solve(self, p_sched, q_sched, vpu=None, delta=None):
+        """Solve K scenarios given their scheduled injections p_sched and q_sched (MW/Mvar, K x N).
+
+        vpu and delta (radians) are the starting points, (K x N) or (N,); they default to the circuit's
+        current bus state. Returns the solved vpu and delta (K x N); the convergence flag and the number
+        of Newton steps of each scenario are left in self.converged and self.iterations.
+        """
+        circuit = self.circuit
+        state = circuit.bus_state
+        p_sched = np.atleast_2d(p_sched) / Settings.base_power
+        q_sched = np.atleast_2d(q_sched) / Settings.base_power
+        K, N = p_sched.shape
+        if vpu is None:
+            vpu = state.vpu
+        if delta is None:
+            delta = state.delta if circuit.radians else np.deg2rad(state.delta)
+        vpu = np.array(np.broadcast_to(vpu, (K, N)), dtype=float)
+        delta = np.array(np.broadcast_to(delta, (K, N)), dtype=float)
+
+        ybus = ybus_array(circuit.ybus)
+        non_slack_idx = np.flatnonzero(state.type_code != SLACK)
+        pq_idx = np.flatnonzero(state.type_code == PQ)
+
+        self.converged = np.zeros(K, dtype=bool)
+        self.iterations = np.zeros(K, dtype=int)
+        step = np.ones(K)  # fraction of the Newton step of each scenario under adaptive damping
+        previous_mismatch = np.full(K, np.inf)
+        active = np.arange(K)
+        for iteration in range(self.max_iter + 1):
+            P, Q = calc_power_injection(ybus, vpu[active], delta[active])
+            mismatch = np.concatenate([p_sched[active][:, non_slack_idx] - P[:, non_slack_idx],
+                                       q_sched[active][:, pq_idx] - Q[:, pq_idx]], axis=1)
+            max_mismatch = np.max(np.abs(mismatch), axis=1)
+            done = max_mismatch < self.tol
+            self.converged[active[done]] = True
+            keep = ~done & np.isfinite(max_mismatch)  # a diverged scenario is dropped as not converged
+            active, mismatch, max_mismatch = active[keep], mismatch[keep], max_mismatch[keep]
+            if not len(active) or iteration == self.max_iter:
+                break
+
+            if sp.issparse(ybus):
+                J = self.sparse_jacobians(ybus, vpu[active], delta[active], non_slack_idx, pq_idx)
+                delta_x = splu(J).solve(mismatch.ravel()).reshape(mismatch.shape)
+            else:
+                J = calc_jacobian_batch(ybus, vpu[active], delta[active], non_slack_idx, pq_idx)
+                delta_x = np.linalg.solve(J, mismatch[:, :, None])[:, :, 0]
+
+            active_vpu, active_delta = vpu[active], delta[active]
+            step[active] = newton_step(active_vpu, active_delta, delta_x, non_slack_idx, pq_idx, iteration,
+                                       max_mismatch, previous_mismatch[active], step[active], self.damping)
+            vpu[active], delta[active] = active_vpu, active_delta
+            previous_mismatch[active] = max_mismatch
+            self.iterations[active] += 1
+        return vpu, delta
+
+    @staticmethod
+    def sparse_jacobians(ybus, voltages, angles, non_slack_idx, pq_idx):
+        # block-diagonal CSC matrix of the K Jacobians (K x N voltages and angles); every entry of
+        # dS/dθ and dS/d|V| (see calc_jacobian_blocks) lies on the Ybus pattern, so all of them are
+        # evaluated for all scenarios at once on the Ybus nonzeros
+        K, N = voltages.shape
+        coo = ybus.tocoo()
+        rows, cols, y = coo.row, coo.col, coo.data
+        V = voltages * np.exp(1j * angles)
+        V_norm = V / np.abs(V)
+        I = (ybus @ V.T).T
+        diagonal = rows == cols
+        dS_dtheta = -1j * V[:, rows] * np.conj(y * V[:, cols])
+        dS_dtheta[:, diagonal] += 1j * V[:, rows[diagonal]] * np.conj(I[:, rows[diagonal]])
+        dS_dV = V[:, rows] * np.conj(y * V_norm[:, cols])
+        dS_dV[:, diagonal] += np.conj(I[:, rows[diagonal]]) * V_norm[:, rows[diagonal]]
+
+        # Jacobian row/column of every bus: ΔP and θ rows/columns for non-slack buses, ΔQ and |V| for PQ buses
+        n_angles = len(non_slack_idx)
+        M = n_angles + len(pq_idx)
+        p_pos = np.full(N, -1)
+        p_pos[non_slack_idx] = np.arange(n_angles)
+        q_pos = np.full(N, -1)
+        q_pos[pq_idx] = n_angles + np.arange(len(pq_idx))
+
+        block_rows, block_cols, block_data = [], [], []
+        for row_pos, col_pos, values in [(p_pos, p_pos, dS_dtheta.real), (p_pos, q_pos, dS_dV.real),
+                                         (q_pos, p_pos, dS_dtheta.imag), (q_pos, q_pos, dS_dV.imag)]:
+            keep = (row_pos[rows] >= 0) & (col_pos[cols] >= 0)
+            block_rows.append(row_pos[rows[keep]])
+            block_cols.append(col_pos[cols[keep]])
+            block_data.append(values[:, keep])
+        block_rows = np.concatenate(block_rows)
+        block_cols = np.concatenate(block_cols)
+        block_data = np.concatenate(block_data, axis=1)
+
+        offsets = (np.arange(K) * M)[:, None]
+        return sp.csc_matrix((block_data.ravel(), ((offsets + block_rows).ravel(), (offsets + block_cols).ravel())),
+                             shape=(K * M, K * M))
@@ -0,0 +1,43 @@
+from seven_bus import build_circuit
+from batch_power_flow import Batch_Power_Flow
+from jacobian import Jacobian
+from power_flow import Power_Flow
+from settings import Settings
+import numpy as np
+
+
+# Five load levels of the 7-bus system solved as one batch and one at a time; at eight times the load the
+# case has no solution, so that scenario stays in the active set after the others have converged
+Settings.verbosity = Settings.SILENT
+scale = np.array([0.1, 0.6, 1.0, 1.6, 8.0])
+max_iter = 20
+
+for sparse in (False, True):
+    circuit1 = build_circuit(sparse)
+    loads = list(circuit1.loads.values())
+    load_p = scale[:, None] * [load.real_power for load in loads]
+    load_q = scale[:, None] * [load.reactive_power for load in loads]
+    batch = Batch_Power_Flow(circuit1, max_iter=max_iter)
+    vpu, delta = batch.solve(*batch.load_scenarios(load_p, load_q))
+
+    for k in range(len(scale)):
+        circuit2 = build_circuit(sparse)
+        for load, p, q in zip(loads, load_p[k], load_q[k]):
+            circuit2.set_load(load.name, p, q)
+        power_flow = Power_Flow(circuit2, Jacobian(circuit2))
+        power_flow.solve(circuit2.buses, circuit2.ybus, max_iter=max_iter)
+        print(f"{'sparse' if sparse else 'dense'} x{scale[k]}: batch converged {batch.converged[k]} in "
+              f"{batch.iterations[k]} steps, looped converged {power_flow.converged} in {power_flow.iterations}")
+        assert batch.converged[k] == power_flow.converged
+        if power_flow.converged:
+            # Power_Flow counts mismatch evaluations, the batch solver Newton steps
+            assert batch.iterations[k] == power_flow.iterations - 1
+            assert np.max(np.abs(vpu[k] - circuit2.bus_state.vpu)) < 1e-9
+            assert np.max(np.abs(delta[k] - circuit2.bus_state.delta)) < 1e-9
+        else:
+            # both damp and clamp the same way, so the diverging case stays within the voltage limits
+            assert np.all((vpu[k] >= 0.5) & (vpu[k] <= 1.5)) and np.all(np.isfinite(delta[k]))
+            assert np.all((circuit2.bus_state.vpu >= 0.5) & (circuit2.bus_state.vpu <= 1.5))
+
+    assert batch.converged[:-1].all() and not batch.converged[-1]
+    assert batch.iterations[-1] > batch.iterations[:-1].max()  # still iterating after the others were dropped
@@ -0,0 +1,194 @@
+from circuit import Circuit
+from jacobian import Jacobian
+from power_flow import Power_Flow
+from settings import Settings
+import argparse
+import gc
+import json
+import platform
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+import scipy
+
+#benchmark suite on reproducible synthetic grids, so performance regressions show up on real-size cases and
+#not only on the 7-bus system
+#synthetic_circuit builds a radial or meshed 230 kV network of any size through the Circuit builder API (same
+#seed, same network); run_benchmark times every stage separately and tracks its peak traced memory:
+#construction, calc_ybus, Jacobian build, Power_Flow.solve, calculate_fault and the asymmetrical faults
+#results are plain records written as JSON, and compare lines up two result files stage by stage
+#usage: python benchmark.py --sizes 100 1000 10000 --topologies radial meshed --output results.json
+
+GENERATOR_SPACING = 20  # one PV generator every this many buses
+
+
+def synthetic_circuit(n_buses: int, topology: str = "radial", seed: int = 0, sparse: bool = True):
+    """Synthetic 230 kV grid with n_buses buses laid out row by row on a square lattice.
+
+    radial: every row is a feeder chained from its first bus, and the first buses of the rows are chained
+    down the first column (a comb-shaped spanning tree of the lattice).
+    meshed: the same tree plus each remaining vertical lattice line with probability 1/2 (about n_buses / 2
+    extra lines); like a real grid the network stays nearly planar, so it factors with little fill-in.
+    Every bus carries a load; bus 1 is the slack and every GENERATOR_SPACING-th bus a PV generator, with the
+    generators sharing the total load.
+    """
+    if topology not in ("radial", "meshed"):
+        raise ValueError("Topology must be 'radial' or 'meshed'")
+    rng = np.random.default_rng(seed)
+    circuit = Circuit(f"{topology}_{n_buses}", sparse=sparse)
+    names = [f"Bus{k + 1}" for k in range(n_buses)]
+    gen_idx = np.arange(0, n_buses, GENERATOR_SPACING)
+    bus_types = np.full(n_buses, "PQ", dtype=object)
+    bus_types[gen_idx] = "PV"
+    bus_types[0] = "slack"
+    circuit.add_buses(names, 230, bus_types=bus_types)
+
+    circuit.add_conductor("Partridge", 0.642, 0.0217, 0.385, 460)
+    circuit.add_geometry("Geometry 1", 0, 0, 19.5, 0, 39, 0)
+    circuit.add_bundle("Bundle 1", 2, 1.5, "Partridge")
+
+    columns = int(np.ceil(np.sqrt(n_buses)))
+    bus = np.arange(1, n_buses)
+    in_row = bus % columns > 0
+    from_idx = np.where(in_row, bus - 1, bus - columns)
+    to_idx = bus
+    if topology == "meshed":
+        extra = in_row & (bus >= columns) & (rng.random(len(bus)) < 0.5)
+        from_idx = np.concatenate([from_idx, bus[extra] - columns])
+        to_idx = np.concatenate([to_idx, bus[extra]])
+    length = rng.uniform(1, 5, len(from_idx))
+    circuit.add_transmission_lines([f"Line {k + 1}" for k in range(len(from_idx))], [names[i] for i in from_idx],
+                                   [names[i] for i in to_idx], "Bundle 1", "Geometry 1", length)
+
+    load_p = rng.uniform(1, 4, n_buses)
+    circuit.add_loads([f"Load {k + 1}" for k in range(n_buses)], names, load_p, 0.3 * load_p)
+    gen_p = np.full(len(gen_idx), load_p.sum() / len(gen_idx))
+    circuit.add_generators([f"Generator {k + 1}" for k in range(len(gen_idx))], [names[i] for i in gen_idx], gen_p,
+                           1.0, 2 * gen_p)
+    return circuit
+
+
+def measure(function, track_memory=True):
+    # (result, seconds, peak MB allocated while running) of one stage
+    gc.collect()
+    if track_memory:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+    peak = (tracemalloc.get_traced_memory()[1] - baseline) / 1e6 if track_memory else None
+    return result, seconds, peak
+
+
+def run_case(n_buses, topology, seed=0, sparse=True, track_memory=True):
+    # one pass over every stage for one synthetic grid; returns one record per stage
+    records = []
+
+    def record(stage, seconds, peak, **extra):
+        records.append({"topology": topology, "buses": n_buses, "sparse": sparse, "seed": seed, "stage": stage,
+                        "seconds": seconds, "peak_mb": peak, **extra})
+
+    circuit, seconds, peak = measure(lambda: synthetic_circuit(n_buses, topology, seed, sparse), track_memory)
+    record("construction", seconds, peak, branches=len(circuit.transmission_lines))
+    _, seconds, peak = measure(circuit.calc_ybus, track_memory)
+    record("ybus", seconds, peak)
+
+    def build_jacobian():
+        jacobian = Jacobian(circuit)
+        return jacobian, jacobian.build_jacobian()
+    (jacobian, J), seconds, peak = measure(build_jacobian, track_memory)
+    record("jacobian", seconds, peak, size=J.shape[0])
+    del J
+
+    power_flow = Power_Flow(circuit, jacobian)
+    _, seconds, peak = measure(lambda: power_flow.solve(circuit.buses, circuit.ybus), track_memory)
+    record("power_flow", seconds, peak, converged=bool(power_flow.converged), iterations=int(power_flow.iterations))
+
+    faulted_bus = circuit.bus_order[n_buses // 2]
+    _, seconds, peak = measure(lambda: circuit.calculate_fault(faulted_bus), track_memory)
+    record("fault", seconds, peak)
+    _, seconds, peak = measure(lambda: [circuit.calculate_asym_fault(fault_type, faulted_bus)
+                                        for fault_type in ("slg", "ll", "dlg")], track_memory)
+    record("asym_fault", seconds, peak)
+    return records
+
+
+def run_benchmark(sizes=(100, 1000, 10000), topologies=("radial", "meshed"), repeat=1, seed=0, sparse=True,
+                  track_memory=True):
+    """Benchmark every size and topology; returns {"environment": ..., "results": [records]}.
+
+    With repeat > 1 each stage keeps its fastest time and largest peak. Tracking memory slows the pure
+    Python parts down, so compare timings of runs made with the same setting.
+    """
+    verbosity = Settings.verbosity
+    Settings.verbosity = Settings.SILENT
+    if track_memory:
+        tracemalloc.start()
+    try:
+        results = []
+        for topology in topologies:
+            for n_buses in sizes:
+                runs = [run_case(n_buses, topology, seed, sparse, track_memory) for _ in range(repeat)]
+                for records in zip(*runs):
+                    best = dict(records[0])
+                    best["seconds"] = min(r["seconds"] for r in records)
+                    if track_memory:
+                        best["peak_mb"] = max(r["peak_mb"] for r in records)
+                    results.append(best)
+    finally:
+        if track_memory:
+            tracemalloc.stop()
+        Settings.verbosity = verbosity
+    return {"environment": environment(), "track_memory": track_memory, "results": results}
+
+
+def environment():
+    return {"python": platform.python_version(), "numpy": np.__version__, "scipy": scipy.__version__,
+            "pandas": pd.__version__, "platform": platform.platform(), "processor": platform.processor(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def results_table(results):
+    # the result records as a DataFrame indexed by topology, size and stage
+    return pd.DataFrame(results["results"]).set_index(["topology", "buses", "stage"])
+
+
+def compare(baseline, current):
+    # stage-by-stage time and memory ratios (current / baseline) of two result files or result dicts
+    tables = []
+    for results in (baseline, current):
+        if not isinstance(results, dict):
+            with open(results) as file:
+                results = json.load(file)
+        tables.append(results_table(results)[["seconds", "peak_mb"]])
+    table = tables[0].join(tables[1], lsuffix="_baseline", rsuffix="_current", how="inner")
+    table["time_ratio"] = table["seconds_current"] / table["seconds_baseline"]
+    table["memory_ratio"] = table["peak_mb_current"] / table["peak_mb_baseline"]
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the power flow and fault stages on synthetic grids")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--topologies", nargs="+", default=["radial", "meshed"], choices=["radial", "meshed"])
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dense", action="store_true", help="dense DataFrame Ybus instead of sparse")
+    parser.add_argument("--no-memory", action="store_true", help="time without tracemalloc")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.sizes, args.topologies, args.repeat, args.seed, not args.dense, not args.no_memory)
+    print(results_table(results).to_string(float_format=lambda x: f"{x:.4f}"))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=1)
+    if args.compare:
+        print(compare(args.compare, results)[["time_ratio", "memory_ratio"]].to_string(float_format=lambda x: f"{x:.2f}"))
+
+
+if __name__ == "__main__":
+    main()
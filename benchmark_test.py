@@ -0,0 +1,54 @@
+from benchmark import synthetic_circuit, run_benchmark, results_table, compare
+from circuit import ybus_array
+from seven_bus import build_circuit
+import numpy as np
+import json
+import os
+import tempfile
+
+# The synthetic generators are reproducible: the same seed gives the same network
+radial = synthetic_circuit(400, "radial", seed=1)
+meshed = synthetic_circuit(400, "meshed", seed=1)
+print(f"Radial: {len(radial.transmission_lines)} lines, meshed: {len(meshed.transmission_lines)} lines")
+assert len(radial.transmission_lines) == 399
+assert synthetic_circuit(400, "meshed", seed=1).transmission_lines.keys() == meshed.transmission_lines.keys()
+
+# Small benchmark run, written to JSON and compared with itself
+results = run_benchmark(sizes=(100, 400), topologies=("radial", "meshed"))
+table = results_table(results)
+print(table[["seconds", "peak_mb"]].to_string(float_format=lambda x: f"{x:.4f}"))
+assert table.xs("power_flow", level="stage")["converged"].all()
+
+path = os.path.join(tempfile.mkdtemp(), "benchmark.json")
+with open(path, "w") as file:
+    json.dump(results, file)
+assert (compare(path, results)["time_ratio"] == 1).all()
+
+# a batch of lines with a name already in the circuit is rejected as a whole
+try:
+    radial.add_transmission_lines(["Line 400", "Line 1"], ["Bus1", "Bus2"], ["Bus3", "Bus4"], "Bundle 1", "Geometry 1", 2)
+    raise AssertionError("duplicate line name accepted")
+except ValueError:
+    assert len(radial.transmission_lines) == 399 and radial.branch_table.size == 399
+
+
+# batched construction gives the same lines as add_transmission_line called one by one: the 7-bus lines added
+# again to a copy of the system as a second set of parallel lines, both ways
+names = ["Line 1", "Line 2", "Line 3", "Line 4", "Line 5", "Line 6"]
+bus1 = ["Bus2", "Bus2", "Bus3", "Bus4", "Bus5", "Bus4"]
+bus2 = ["Bus4", "Bus3", "Bus5", "Bus6", "Bus6", "Bus5"]
+length = [10, 25, 20, 20, 10, 35]
+for sparse in (False, True):
+    one_by_one = build_circuit(sparse)
+    batched = build_circuit(sparse)
+    for name, from_bus, to_bus, miles in zip(names, bus1, bus2, length):
+        one_by_one.add_transmission_line(name + "b", from_bus, to_bus, "Bundle 1", "Geometry 1", miles)
+    batched.add_transmission_lines([name + "b" for name in names], bus1, bus2, "Bundle 1", "Geometry 1", length)
+    rows = one_by_one.branch_table.size
+    assert batched.branch_table.size == rows
+    difference = max(np.max(np.abs(batched.branch_table.yprim[:rows] - one_by_one.branch_table.yprim[:rows])),
+                     np.max(np.abs(batched.branch_table.zero_yprim[:rows] - one_by_one.branch_table.zero_yprim[:rows])),
+                     np.max(np.abs(ybus_array(batched.ybus) - ybus_array(one_by_one.ybus))))
+    print(f"{'sparse' if sparse else 'dense'}: max difference of batched and one-by-one lines {difference:.2e}")
+    assert difference == 0
+    assert np.array_equal(batched.branch_ratings(), one_by_one.branch_ratings())
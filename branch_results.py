@@ -0,0 +1,86 @@
+from circuit import Circuit
+from settings import Settings
+import numpy as np
+import pandas as pd
+
+#post-solve branch results: currents, P/Q flows at both ends, losses and loading of every transmission line
+#and transformer
+#the 2x2 primitive admittances of all branches are stacked once as arrays (y_ff, y_ft, y_tf, y_tt), so the
+#results of every branch come from a few array operations on the bus voltages instead of a loop over the
+#y_matrix DataFrames
+#loading is the larger end current against the rated current: conductor ampacity times conductors per bundle
+#for lines (their MVA rating at the line voltage), the MVA rating at each winding voltage for transformers
+
+
+class Branch_Results:
+
+    def __init__(self, circuit: Circuit):
+        self.circuit = circuit
+        self.names = circuit.branch_names()
+        self.from_idx, self.to_idx, yprim = circuit.branch_primitives()
+        self.y_ff, self.y_ft, self.y_tf, self.y_tt = (np.ascontiguousarray(yprim[:, k]) for k in range(4))
+        self.rating = circuit.branch_ratings()  # MVA
+
+        # base current (A) at each end and the rated current of each branch end
+        base_kv = np.array([circuit.buses[bus].base_kv for bus in circuit.bus_order], dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.i_base_from = Settings.base_power * 1000 / (np.sqrt(3) * base_kv[self.from_idx])
+            self.i_base_to = Settings.base_power * 1000 / (np.sqrt(3) * base_kv[self.to_idx])
+            self.rated_from = self.rating * 1000 / (np.sqrt(3) * base_kv[self.from_idx])
+            self.rated_to = self.rating * 1000 / (np.sqrt(3) * base_kv[self.to_idx])
+
+    def bus_voltages(self):
+        # complex bus voltages of the circuit's current state
+        state = self.circuit.bus_state
+        delta = state.delta if self.circuit.radians else np.deg2rad(state.delta)
+        return state.vpu * np.exp(1j * delta)
+
+    def currents(self, V):
+        # per-unit current entering every branch at its from and to end; V is (N,) or stacked (..., N)
+        V_from = V[..., self.from_idx]
+        V_to = V[..., self.to_idx]
+        I_from = self.y_ff * V_from + self.y_ft * V_to
+        I_to = self.y_tf * V_from + self.y_tt * V_to
+        return V_from, V_to, I_from, I_to
+
+    def compute(self, V=None):
+        """Branch results for the complex bus voltages V (default: the circuit's current state).
+
+        Returns a dict of arrays in branch_names order (stacked V gives stacked results): I_from and I_to
+        (A), S_from and S_to (complex power entering the branch at each end, MVA), S_loss (MVA, P losses
+        plus the net reactive power absorbed) and loading (% of the rated current).
+        """
+        if V is None:
+            V = self.bus_voltages()
+        V_from, V_to, I_from, I_to = self.currents(V)
+        S_from = V_from * np.conj(I_from) * Settings.base_power
+        S_to = V_to * np.conj(I_to) * Settings.base_power
+        I_from = np.abs(I_from) * self.i_base_from
+        I_to = np.abs(I_to) * self.i_base_to
+        with np.errstate(divide="ignore", invalid="ignore"):
+            loading = np.maximum(I_from / self.rated_from, I_to / self.rated_to) * 100
+        return {"I_from": I_from, "I_to": I_to, "S_from": S_from, "S_to": S_to, "S_loss": S_from + S_to,
+                "loading": loading}
+
+    def table(self, V=None):
+        # the results of one operating point as a DataFrame indexed by branch name
+        results = self.compute(V)
+        bus_order = np.array(self.circuit.bus_order)
+        table = pd.DataFrame({
+            "From": bus_order[self.from_idx],
+            "To": bus_order[self.to_idx],
+            "I_from_A": results["I_from"],
+            "I_to_A": results["I_to"],
+            "P_from_MW": results["S_from"].real,
+            "Q_from_Mvar": results["S_from"].imag,
+            "P_to_MW": results["S_to"].real,
+            "Q_to_Mvar": results["S_to"].imag,
+            "P_loss_MW": results["S_loss"].real,
+            "Q_loss_Mvar": results["S_loss"].imag,
+            "Loading_pct": results["loading"],
+        }, index=pd.Index(self.names, name="Branch"))
+        if Settings.verbosity >= Settings.SUMMARY:
+            print("\nBranch Results:")
+            print(table.to_string(float_format=lambda x: f"{x:.3f}"))
+            print(f"Total losses: {table['P_loss_MW'].sum():.3f} MW, {table['Q_loss_Mvar'].sum():.3f} Mvar")
+        return table
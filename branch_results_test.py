@@ -0,0 +1,29 @@
+from seven_bus import build_circuit
+from branch_results import Branch_Results
+from circuit import ybus_array, calc_power_injection
+from jacobian import Jacobian
+from power_flow import Power_Flow
+from settings import Settings
+import numpy as np
+
+
+# Flows, losses and loading of every branch of the solved 7-bus system
+Settings.verbosity = Settings.SUMMARY
+circuit1 = build_circuit()
+Power_Flow(circuit1, Jacobian(circuit1)).solve(circuit1.buses, circuit1.ybus)
+
+branch_results = Branch_Results(circuit1)
+table = branch_results.table()
+
+# the branch losses add up to the net power injected at all buses
+state = circuit1.bus_state
+P, Q = calc_power_injection(ybus_array(circuit1.ybus), state.vpu, state.delta)
+print(f"Net injection: {P.sum() * Settings.base_power:.3f} MW")
+assert np.isclose(table["P_loss_MW"].sum(), P.sum() * Settings.base_power)
+
+# Line 1 by hand from its y_matrix: current at Bus2 against two Partridge conductors (460 A each)
+V = branch_results.bus_voltages()
+y = circuit1.transmission_lines["Line 1"].y_matrix.to_numpy()
+I_from = y[0] @ V[[1, 3]] * Settings.base_power * 1000 / (np.sqrt(3) * 230)
+assert np.isclose(table.loc["Line 1", "I_from_A"], abs(I_from))
+assert np.isclose(table.loc["Line 1", "Loading_pct"], max(table.loc["Line 1", ["I_from_A", "I_to_A"]]) / 920 * 100)
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+
+#contiguous primitive admittances of all branches (transmission lines and transformers) of a circuit, one row
+#per branch in the order the branches were added; each row is a 2x2 Yprim stored as [y11, y12, y21, y22]
+#yprim is the positive (and negative) sequence primitive, zero_yprim the zero sequence one
+#branch objects are views onto one row (as Bus is onto Bus_State); their y_matrix and zero_yprim DataFrames
+#are only built when asked for, for display
+class Branch_Table:
+
+    def __init__(self, capacity: int = 8):
+        self.size = 0
+        self._yprim = np.zeros((capacity, 4), dtype=complex)
+        self._zero_yprim = np.zeros((capacity, 4), dtype=complex)
+
+    def append(self):
+        # adds one branch row and returns its position
+        if self.size == len(self._yprim):  # grow by doubling so adding branches stays linear overall
+            self.reserve(2 * len(self._yprim))
+        self.size += 1
+        return self.size - 1
+
+    def reserve(self, capacity: int):
+        # grows the arrays up front when many branches are about to be added at once
+        if capacity > len(self._yprim):
+            extra = np.zeros((capacity - len(self._yprim), 4), dtype=complex)
+            self._yprim = np.concatenate([self._yprim, extra])
+            self._zero_yprim = np.concatenate([self._zero_yprim, extra])
+
+    # views over the branches in use; writing into them updates the branches directly
+    @property
+    def yprim(self):
+        return self._yprim[:self.size]
+
+    @property
+    def zero_yprim(self):
+        return self._zero_yprim[:self.size]
+
+
+def yprim_frame(values, bus_names):
+    # a primitive admittance matrix (flat or square) as a DataFrame labeled with its bus names, for display
+    n = len(bus_names)
+    return pd.DataFrame(np.asarray(values, dtype=complex).reshape(n, n), index=bus_names, columns=bus_names)
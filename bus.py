@@ -1,18 +1,118 @@
 import numpy as np
 import pandas as pd
+from collections.abc import MutableMapping
+
+# bus type names by type code, as stored in Bus_State.type_code
+BUS_TYPES = ['PQ', 'PV', 'slack']
+PQ, PV, SLACK = 0, 1, 2
+
+
+#contiguous per-bus state shared by all buses of a circuit: |V| (pu), θ, calculated P and Q injections (pu),
+#scheduled net P and Q injections (MW/Mvar, generation minus load) and the bus type code, one entry per bus
+#in the order the buses were added
+#the solvers read and update these arrays in place; Bus objects are views onto one entry
+class Bus_State:
+
+    def __init__(self, capacity: int = 8):
+        self.size = 0
+        self._vpu = np.ones(capacity)
+        self._delta = np.zeros(capacity)
+        self._p = np.zeros(capacity)
+        self._q = np.zeros(capacity)
+        self._p_sched = np.zeros(capacity)
+        self._q_sched = np.zeros(capacity)
+        self._type_code = np.zeros(capacity, dtype=np.int8)
+
+    def append(self):
+        # adds one bus with the default state (1.0 pu, 0 angle, PQ) and returns its position
+        if self.size == len(self._vpu):  # grow by doubling so adding buses stays linear overall
+            self.reserve(2 * len(self._vpu))
+        self.size += 1
+        return self.size - 1
+
+    def reserve(self, capacity: int):
+        # grows the arrays up front when many buses are about to be added at once
+        if capacity > len(self._vpu):
+            extra = capacity - len(self._vpu)
+            self._vpu = np.concatenate([self._vpu, np.ones(extra)])
+            self._delta = np.concatenate([self._delta, np.zeros(extra)])
+            self._p = np.concatenate([self._p, np.zeros(extra)])
+            self._q = np.concatenate([self._q, np.zeros(extra)])
+            self._p_sched = np.concatenate([self._p_sched, np.zeros(extra)])
+            self._q_sched = np.concatenate([self._q_sched, np.zeros(extra)])
+            self._type_code = np.concatenate([self._type_code, np.zeros(extra, dtype=np.int8)])
+
+    # views over the buses in use; writing into them updates the buses directly
+    @property
+    def vpu(self):
+        return self._vpu[:self.size]
+
+    @property
+    def delta(self):
+        return self._delta[:self.size]
+
+    @property
+    def p(self):
+        return self._p[:self.size]
+
+    @property
+    def q(self):
+        return self._q[:self.size]
+
+    @property
+    def p_sched(self):
+        return self._p_sched[:self.size]
+
+    @property
+    def q_sched(self):
+        return self._q_sched[:self.size]
+
+    @property
+    def type_code(self):
+        return self._type_code[:self.size]
+
+
+#dict-like view of one Bus_State array by bus name (Circuit.real_power and Circuit.reactive_power), so the
+#scheduled injections can still be read and updated per bus while the solvers use the arrays directly
+class Bus_Values(MutableMapping):
+
+    def __init__(self, state: Bus_State, field: str, bus_indices: dict):
+        self.state = state
+        self.field = field
+        self.bus_indices = bus_indices  # bus name -> position in the state arrays
+
+    def __getitem__(self, bus):
+        return getattr(self.state, self.field)[self.bus_indices[bus]]
+
+    def __setitem__(self, bus, value):
+        getattr(self.state, self.field)[self.bus_indices[bus]] = value
+
+    def __delitem__(self, bus):
+        raise TypeError("Buses cannot be removed from the scheduled injections")
+
+    def __iter__(self):
+        return iter(self.bus_indices)
+
+    def __len__(self):
+        return len(self.bus_indices)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
 #initizalize a bus object
 class Bus:
 
     counter = 0
 
-    def __init__(self, name: str, base_kv: float):
+    def __init__(self, name: str, base_kv: float, state: Bus_State = None):
 
         # obtain, name, base voltage
         self.name = name
         self.base_kv = base_kv
-        self.vpu = 1.0 # initialize vpu to 1
-        self.delta = 0 # initialize phase angle to 0
-        self.bus_type = 'PQ'
+        # voltage, angle and type live in the circuit's Bus_State (a private one for a standalone bus)
+        self.state = state if state is not None else Bus_State(1)
+        self.state_index = self.state.append()  # vpu initialized to 1, phase angle to 0, type PQ
         self.real_power = 0
         self.reactive_power = 0
         # Keeping an index of all bus instances
@@ -20,6 +120,32 @@ class Bus:
         Bus.counter += 1
         self.radians = 0
 
+    @property
+    def vpu(self):
+        return self.state._vpu[self.state_index]
+
+    @vpu.setter
+    def vpu(self, value):
+        self.state._vpu[self.state_index] = value
+
+    @property
+    def delta(self):
+        return self.state._delta[self.state_index]
+
+    @delta.setter
+    def delta(self, value):
+        self.state._delta[self.state_index] = value
+
+    @property
+    def bus_type(self):
+        return BUS_TYPES[self.state._type_code[self.state_index]]
+
+    @bus_type.setter
+    def bus_type(self, value):
+        if value not in BUS_TYPES:
+            raise ValueError(f"Bus type must be one of {BUS_TYPES}")
+        self.state._type_code[self.state_index] = BUS_TYPES.index(value)
+
     def set_voltage_and_delta(self, voltage: float, delta: float):
         self.vpu = voltage
-        self.delta = delta
\ No newline at end of file
+        self.delta = delta
@@ -1,7 +1,10 @@
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
 from geometry import Geometry
-from bus import Bus
+from bus import Bus, Bus_State, Bus_Values, BUS_TYPES, SLACK, PQ
+from branch_table import Branch_Table
 from shunt_capacitor import Shunt_capacitor
 from transmission_line import TransmissionLine
 from bundle import Bundle
@@ -11,11 +14,93 @@ from generator import Generator
 from load import Load
 from shunt_inductor import Shunt_inductor
 from settings import Settings
+from linear_solver import Linear_Solver
+
+
+def assemble_ybus(n, from_idx, to_idx, yprim, shunt_idx, shunt_y):
+    # stamps every 2x2 branch primitive (rows of yprim are [y11, y12, y21, y22]) and every
+    # shunt admittance into an n x n CSR matrix in a single COO pass; duplicates are summed
+    rows = np.concatenate([from_idx, from_idx, to_idx, to_idx, shunt_idx])
+    cols = np.concatenate([from_idx, to_idx, from_idx, to_idx, shunt_idx])
+    data = np.concatenate([yprim[:, 0], yprim[:, 1], yprim[:, 2], yprim[:, 3], shunt_y])
+    return sp.coo_matrix((data, (rows, cols)), shape=(n, n), dtype=complex).tocsr()
+
+
+def ybus_array(ybus):
+    # returns the raw admittance matrix behind a Ybus, either a numpy array (from the labeled
+    # DataFrame) or the scipy sparse matrix itself, so callers never densify a sparse Ybus
+    if isinstance(ybus, pd.DataFrame):
+        return ybus.to_numpy()
+    return ybus
+
+
+def calc_power_injection(ybus, v, delta):
+    # S = V * conj(Ybus V) for all buses at once; works on a numpy array or a scipy sparse Ybus.
+    # v is the voltage magnitude and delta the angle in radians, both in bus order, either one
+    # operating point (N,) or K stacked ones (K, N)
+    V = v * np.exp(1j * delta)
+    S = V * np.conj((ybus @ V.T).T)
+    return S.real, S.imag
+
+
+def calc_branch_flows(V, from_idx, to_idx, yprim):
+    # complex power (pu) entering every branch at its from and to bus, for complex bus voltages V;
+    # works on a single voltage vector (N,) or stacked ones (..., N)
+    V_from = V[..., from_idx]
+    V_to = V[..., to_idx]
+    S_from = V_from * np.conj(yprim[:, 0] * V_from + yprim[:, 1] * V_to)
+    S_to = V_to * np.conj(yprim[:, 2] * V_from + yprim[:, 3] * V_to)
+    return S_from, S_to
+
+
+def check_new_names(names, existing, message):
+    # raises before a bulk add_* call inserts anything if a name is already taken or repeated in the batch,
+    # so a failed call leaves the circuit unchanged
+    if set(names) & set(existing) or len(set(names)) < len(names):
+        raise ValueError(message)
+
+
+# symmetrical components: [Ia, Ib, Ic] = T_INV @ [I0, I1, I2]
+A_OPERATOR = np.exp(2j * np.pi / 3)
+T_INV = np.array([
+    [1, 1, 1],
+    [1, A_OPERATOR ** 2, A_OPERATOR],
+    [1, A_OPERATOR, A_OPERATOR ** 2]
+])
+
+
+def calc_sequence_fault_currents(fault_type, V_prefault, Z0, Z1, Z2, Zf):
+    # sequence fault currents (I0, I1, I2) of an "slg", "ll" or "dlg" fault; every argument
+    # may be an array, and the results broadcast over all of them
+    if fault_type == "slg":
+        denom = Z0 + Z1 + Z2 + 3 * Zf
+        I_seq = V_prefault / denom
+        I0 = I1 = I2 = I_seq
+
+    elif fault_type == "ll":
+        denom = Z1 + Z2 + Zf
+        I1 = V_prefault / denom
+        I2 = -I1
+        I0 = 0 * I1
+
+    elif fault_type == "dlg":
+        num = V_prefault * (Z1 + Z2 + Zf)
+        denom = Z0 * (Z1 + Z2 + Zf) + Z1 * Z2 + Zf * (Z1 + Z2)
+        I0 = num / denom
+        I1 = I0
+        I2 = I0
+
+    else:
+        raise ValueError("Invalid fault type")
+
+    return I0, I1, I2
+
 
 class Circuit:
 
-    def __init__(self, name: str):
+    def __init__(self, name: str, sparse: bool = False):
         self.name = name
+        self.sparse = sparse  # if True, the Ybus is kept as a scipy CSR matrix instead of a DataFrame
         self.buses = {}
         self.conductors = {}
         self.bundles = {}
@@ -27,11 +112,23 @@ class Circuit:
         self.shunt_capacitors = {}
         self.shunt_inductors = {}
         self.ybus = None
+        self.ybus_dirty = False  # set when an element changes the network; the Ybus is rebuilt on next use
+        self.ybus_modified = False  # True once modify_y_bus has added the generator subtransient admittances
+        self.fault_lu = None  # cached LU factors of the generator-modified Ybus used by the fault routines
+        self.zero_ybus = None
+        self.negative_ybus = None
+        self.sequence_version = None  # topology_version the sequence networks were built for
+        self.topology_version = 0  # bumped whenever a bus, branch or shunt is added, used to invalidate cached network data
         self.zbus = None
+        self.linear_solver = Linear_Solver()  # keeps the Jacobian ordering between iterations and solves
         self.first_gen = False
         self.bus_order = []
-        self.real_power = {}
-        self.reactive_power = {}
+        self.bus_indices = {}  # bus name -> row/column index in the Ybus (bus_order maps index -> name)
+        self.bus_state = Bus_State()  # |V|, θ, P, Q and type of every bus as arrays in bus_order
+        self.branch_table = Branch_Table()  # primitive admittances of every line and transformer, in the order added
+        # scheduled net injections per bus (MW/Mvar), views onto bus_state.p_sched and bus_state.q_sched
+        self.real_power = Bus_Values(self.bus_state, "p_sched", self.bus_indices)
+        self.reactive_power = Bus_Values(self.bus_state, "q_sched", self.bus_indices)
         self.voltages = {}
         self.radians = 0
 
@@ -39,10 +136,39 @@ class Circuit:
         if name in self.buses:
             raise ValueError("Bus is already in circuit")
         else:
-            self.buses[name] = Bus(name, bus_kv)
+            self.buses[name] = Bus(name, bus_kv, self.bus_state)
+            self.bus_indices[name] = len(self.bus_order)
             self.bus_order.append(name)
             self.real_power[name] = 0
             self.reactive_power[name] = 0
+            self.ybus_dirty = True
+            self.topology_version += 1
+
+    @property
+    def ybus(self):
+        # the Ybus is only rebuilt when it is actually used (solve, jacobian, fault), not on every add_* call
+        if self.ybus_dirty:
+            self.calc_ybus()
+        return self._ybus
+
+    @ybus.setter
+    def ybus(self, value):
+        self._ybus = value
+        self.fault_lu = None  # any cached fault factorization belongs to the old matrix
+
+    def stamp_shunt(self, bus: str, y: complex):
+        # adds a shunt admittance straight onto the diagonal of an up-to-date Ybus, otherwise defers to a rebuild
+        if self.ybus_dirty or self._ybus is None:
+            self.ybus_dirty = True
+            return
+        idx = self.bus_indices[bus]
+        if self.sparse:
+            if not self._ybus.data.flags.writeable:
+                self._ybus = self._ybus.copy()  # a Ybus mapped from a snapshot is copied on its first change
+            self._ybus[idx, idx] += y  # the diagonal entry always exists, so the sparsity pattern is unchanged
+        else:
+            self._ybus.iat[idx, idx] += y
+        self.fault_lu = None
 
     def add_conductor(self, name: str, diam: float, GMR: float, resistance: float, ampacity: float):
         if name in self.conductors:
@@ -67,26 +193,42 @@ class Circuit:
             raise ValueError("Transformer is already in circuit")
         else:
             self.transformers[name] = Transformer(name, self.buses[bus1], self.buses[bus2], power_rating,
-                                                  impedance_percent, x_over_r_ratio, connection_type,z_ground,is_grounded)
+                                                  impedance_percent, x_over_r_ratio, connection_type,z_ground,is_grounded,
+                                                  self.branch_table)
+            self.ybus_dirty = True
+            self.topology_version += 1
 
     def add_transmission_line(self, name: str, bus1: str, bus2: str, bundle: str, geometry: str, length: float):
         if name in self.transmission_lines:
             raise ValueError("Transmission Line is already in circuit")
         else:
-            self.transmission_lines[name] = TransmissionLine(name, self.buses[bus1], self.buses[bus2], self.bundles[bundle], self.geometry[geometry], length)
+            self.transmission_lines[name] = TransmissionLine(name, self.buses[bus1], self.buses[bus2], self.bundles[bundle], self.geometry[geometry], length,
+                                                             table=self.branch_table)
+            self.ybus_dirty = True
+            self.topology_version += 1
 
     def add_load_element(self, name: str, bus: str, real_power: float, reactive_power: float):
         if name in self.loads:
             raise ValueError("Load is already in circuit")
         else:
             self.loads[name] = Load(name, self.buses[bus], real_power, reactive_power)
-            if bus not in self.real_power:
-                self.real_power[bus] = 0  # Initialize if missing
             self.real_power[bus] -= real_power
-            if bus not in self.reactive_power:
-                self.reactive_power[bus] = 0  # Initialize if missing
             self.reactive_power[bus] -= reactive_power
-        self.calc_ybus()
+        # loads are not part of the Ybus, so there is nothing to restamp
+
+    def set_load(self, name: str, real_power: float, reactive_power: float):
+        # changes the demand of an existing load; only the scheduled injections change, not the Ybus
+        load = self.loads[name]
+        self.real_power[load.bus.name] -= real_power - load.real_power
+        self.reactive_power[load.bus.name] -= reactive_power - load.reactive_power
+        load.real_power = real_power
+        load.reactive_power = reactive_power
+
+    def set_generation(self, name: str, real_power: float):
+        # changes the MW setpoint of an existing generator; only the scheduled injection changes
+        generator = self.generators[name]
+        self.real_power[generator.bus.name] += real_power - generator.mw_setpoint
+        generator.mw_setpoint = real_power
 
     def add_shunt_capacitor(self, name: str, bus: str, mvar: float):
         if name in self.shunt_capacitors:
@@ -94,7 +236,8 @@ class Circuit:
         else:
             self.shunt_capacitors[name] = Shunt_capacitor(name, self.buses[bus],mvar)
 
-        self.calc_ybus()
+        self.stamp_shunt(bus, self.shunt_capacitors[name].y)
+        self.topology_version += 1
 
     def add_shunt_inductor(self, name: str, bus: str, mvar : float):
         if name in self.shunt_inductors:
@@ -102,10 +245,11 @@ class Circuit:
         else:
             self.shunt_inductors[name] = Shunt_inductor(name, self.buses[bus], mvar)
 
-        self.calc_ybus()
+        self.stamp_shunt(bus, self.shunt_inductors[name].y)
+        self.topology_version += 1
 
     def add_generator_element(self, name: str, bus: str, real_power: float, per_unit_voltage: float,
-                              subtransient_x, positive_x, negative_x, z_ground, is_grounded):
+                              subtransient_x, positive_x, negative_x, z_ground, is_grounded, mva_base: float = None):
         if name in self.generators:
             raise ValueError("Generator is already in circuit")
         # ✅ Set slack bus type BEFORE generator is created
@@ -116,163 +260,279 @@ class Circuit:
             self.buses[bus].bus_type = 'PV'
         # Now create the generator with correct bus type
         self.generators[name] = Generator(name, self.buses[bus], real_power, per_unit_voltage,
-                                          subtransient_x, positive_x, negative_x, z_ground, is_grounded)
+                                          subtransient_x, positive_x, negative_x, z_ground, is_grounded, mva_base)
         # Update net real power
-        if bus not in self.real_power:
-            self.real_power[bus] = 0
         self.real_power[bus] += real_power
-        self.calc_ybus()
+        # generators only enter the Ybus through modify_y_bus, so there is nothing to restamp,
+        # but they are part of the sequence networks
+        self.topology_version += 1
+
+    # bulk construction from arrays (case file importers): each method adds many elements in one pass, marks the
+    # Ybus for a single rebuild and bumps the topology version once; branch and shunt data are in per-unit on
+    # the system base, so the Conductor/Bundle/Geometry path is bypassed
+    # names and buses are all checked before anything is inserted, so a rejected batch adds nothing
+
+    def add_buses(self, names, base_kv, bus_types=None, vpu=None, delta=None):
+        # bus_types are 'PQ'/'PV'/'slack' names, vpu and delta (degrees) the initial voltages
+        names = [str(name) for name in names]
+        check_new_names(names, self.buses, "Bus is already in circuit")
+        self.bus_state.reserve(len(self.bus_order) + len(names))
+        first = len(self.bus_order)
+        for name, kv in zip(names, np.broadcast_to(base_kv, len(names))):
+            self.buses[name] = Bus(name, float(kv), self.bus_state)
+            self.bus_indices[name] = len(self.bus_order)
+            self.bus_order.append(name)
+        new = slice(first, len(self.bus_order))
+        if bus_types is not None:
+            self.bus_state.type_code[new] = [BUS_TYPES.index(bus_type) for bus_type in bus_types]
+        if vpu is not None:
+            self.bus_state.vpu[new] = vpu
+        if delta is not None:
+            self.bus_state.delta[new] = delta
+        self.ybus_dirty = True
+        self.topology_version += 1
+
+    def add_transmission_lines(self, names, bus1, bus2, bundle, geometry, length):
+        # lines built from conductor data: bundle and geometry are names (one for all lines or one per line) and
+        # length an array in miles; each distinct construction is evaluated once and every line is a scaling of
+        # it by its length and base impedance
+        E = len(names)
+        check_new_names(names, self.transmission_lines, "Transmission Line is already in circuit")
+        from_buses = [self.buses[bus] for bus in bus1]
+        to_buses = [self.buses[bus] for bus in bus2]
+        bundles = [self.bundles[name] for name in np.broadcast_to(np.asarray(bundle, dtype=object), E)]
+        geometries = [self.geometry[name] for name in np.broadcast_to(np.asarray(geometry, dtype=object), E)]
+        length = np.broadcast_to(np.asarray(length, dtype=float), E)
+        unit = np.array([TransmissionLine.unit_parameters(b, g) for b, g in zip(bundles, geometries)],
+                        dtype=complex).reshape(-1, 2)
+        base_kv = np.array([bus.base_kv for bus in from_buses], dtype=float)
+        z_base = base_kv ** 2 / Settings.base_power
+        # divided part by part, like the complex / float of TransmissionLine (numpy would multiply by 1 / z_base)
+        impedance = unit[:, 0] * length
+        impedance_pu = impedance.real / z_base + 1j * (impedance.imag / z_base)
+        shunt_admittance = unit[:, 1] * length * z_base
+        rating = np.array([np.sqrt(3) * kv * b.conductor.ampacity * b.num_conductors / 1000
+                           for kv, b in zip(base_kv, bundles)], dtype=float)
+
+        self.branch_table.reserve(self.branch_table.size + E)
+        for k, (name, from_bus, to_bus) in enumerate(zip(names, from_buses, to_buses)):
+            self.transmission_lines[name] = TransmissionLine.from_per_unit(
+                name, from_bus, to_bus, impedance_pu[k].real, impedance_pu[k].imag,
+                shunt_admittance[k].imag, rating[k], table=self.branch_table, bundle=bundles[k],
+                geometry=geometries[k], length=float(length[k]))
+        self.ybus_dirty = True
+        self.topology_version += 1
+
+    def add_lines_per_unit(self, names, bus1, bus2, r, x, b, rating=np.inf, is_grounded=True):
+        E = len(names)
+        check_new_names(names, self.transmission_lines, "Transmission Line is already in circuit")
+        from_buses = [self.buses[bus] for bus in bus1]
+        to_buses = [self.buses[bus] for bus in bus2]
+        self.branch_table.reserve(self.branch_table.size + E)
+        for name, from_bus, to_bus, r_k, x_k, b_k, rating_k, grounded in zip(
+                names, from_buses, to_buses, np.broadcast_to(r, E), np.broadcast_to(x, E), np.broadcast_to(b, E),
+                np.broadcast_to(rating, E), np.broadcast_to(is_grounded, E)):
+            self.transmission_lines[name] = TransmissionLine.from_per_unit(
+                name, from_bus, to_bus, float(r_k), float(x_k), float(b_k), float(rating_k), bool(grounded),
+                table=self.branch_table)
+        self.ybus_dirty = True
+        self.topology_version += 1
+
+    def add_transformers_per_unit(self, names, bus1, bus2, r, x, b=0.0, tap=1.0, shift=0.0, rating=np.inf,
+                                  connection_type='y-y', z_ground=0.0, is_grounded='yes'):
+        # tap is the off-nominal turns ratio at bus1 and shift its phase shift in degrees; z_ground is the
+        # per-unit grounding impedance on the system base
+        E = len(names)
+        check_new_names(names, self.transformers, "Transformer is already in circuit")
+        from_buses = [self.buses[bus] for bus in bus1]
+        to_buses = [self.buses[bus] for bus in bus2]
+        self.branch_table.reserve(self.branch_table.size + E)
+        for name, from_bus, to_bus, r_k, x_k, b_k, tap_k, shift_k, rating_k, connection, z_g, grounded in zip(
+                names, from_buses, to_buses, np.broadcast_to(r, E), np.broadcast_to(x, E), np.broadcast_to(b, E),
+                np.broadcast_to(tap, E), np.broadcast_to(shift, E), np.broadcast_to(rating, E),
+                np.broadcast_to(np.asarray(connection_type, dtype=object), E), np.broadcast_to(z_ground, E),
+                np.broadcast_to(np.asarray(is_grounded, dtype=object), E)):
+            self.transformers[name] = Transformer.from_per_unit(
+                name, from_bus, to_bus, float(r_k), float(x_k), float(b_k), float(tap_k),
+                float(shift_k), float(rating_k), connection, complex(z_g), grounded, table=self.branch_table)
+        self.ybus_dirty = True
+        self.topology_version += 1
+
+    def add_shunts_per_unit(self, names, buses, y):
+        # bus shunts as per-unit admittances G + jB, kept with the shunt capacitors
+        check_new_names(names, self.shunt_capacitors, "Capacitor is already in circuit")
+        shunt_buses = [self.buses[bus] for bus in buses]
+        for name, bus, y_k in zip(names, shunt_buses, np.broadcast_to(y, len(names))):
+            self.shunt_capacitors[name] = Shunt_capacitor.from_per_unit(name, bus, y_k)
+        self.ybus_dirty = True
+        self.topology_version += 1
+
+    def add_loads(self, names, buses, real_power, reactive_power):
+        L = len(names)
+        check_new_names(names, self.loads, "Load is already in circuit")
+        bus_idx = np.array([self.bus_indices[bus] for bus in buses], dtype=int)
+        real_power = np.broadcast_to(real_power, L).astype(float)
+        reactive_power = np.broadcast_to(reactive_power, L).astype(float)
+        for name, bus, p, q in zip(names, buses, real_power, reactive_power):
+            self.loads[name] = Load(name, self.buses[bus], p, q)
+        np.add.at(self.bus_state.p_sched, bus_idx, -real_power)
+        np.add.at(self.bus_state.q_sched, bus_idx, -reactive_power)
+
+    def add_generators(self, names, buses, real_power, voltage_setpoint, mva_base, subtransient_x=0.2,
+                       zero_x=0.05, negative_x=None, z_ground=0.0, is_grounded='yes'):
+        # the bus types must already be set (see add_buses); reactances are per-unit on each machine's mva_base,
+        # zero_x and z_ground as add_generator_element takes them; negative_x defaults to subtransient_x
+        G = len(names)
+        check_new_names(names, self.generators, "Generator is already in circuit")
+        bus_idx = np.array([self.bus_indices[bus] for bus in buses], dtype=int)
+        real_power = np.broadcast_to(real_power, G).astype(float)
+        negative_x = subtransient_x if negative_x is None else negative_x
+        for name, bus, p, v, base, x, x0, x2, z_g, grounded in zip(
+                names, buses, real_power, np.broadcast_to(voltage_setpoint, G), np.broadcast_to(mva_base, G),
+                np.broadcast_to(subtransient_x, G), np.broadcast_to(zero_x, G), np.broadcast_to(negative_x, G),
+                np.broadcast_to(z_ground, G), np.broadcast_to(np.asarray(is_grounded, dtype=object), G)):
+            self.generators[name] = Generator(name, self.buses[bus], p, float(v), float(x), float(x0), float(x2),
+                                              float(z_g), grounded, float(base))
+        np.add.at(self.bus_state.p_sched, bus_idx, real_power)
+        self.first_gen = True  # the slack bus comes from the bus types, not from the first generator
+        self.topology_version += 1
 
     def calc_ybus(self):
-        # Step 1: Initialize the Ybus matrix as a zero matrix with dimensions N x N
-        N = len(self.buses)  # Number of buses
-        self.ybus = np.zeros((N, N), dtype=complex)
-
-        # Step 2: Create a dictionary to map bus names to indices for easier reference
-        bus_indices = {bus_name: idx for idx, bus_name in enumerate(self.buses)}
-
-        #====================================================================================================#
-        # Step 3: Iterate through all transmission lines
-        for line in self.transmission_lines.values():
-            Yprim = line.y_matrix  # Get the primitive admittance matrix
-            bus1_idx = bus_indices[line.bus1.name]
-            bus2_idx = bus_indices[line.bus2.name]
-
-            # Add the elements of the Yprim matrix into the Ybus matrix
-            self.ybus[bus1_idx, bus1_idx] += Yprim.iloc[0, 0]  # Self-admittance for bus1
-            self.ybus[bus1_idx, bus2_idx] += Yprim.iloc[0, 1]  # Mutual admittance between bus1 and bus2
-            self.ybus[bus2_idx, bus1_idx] += Yprim.iloc[1, 0]  # Mutual admittance between bus2 and bus1
-            self.ybus[bus2_idx, bus2_idx] += Yprim.iloc[1, 1]  # Self-admittance for bus2
-        #===================================================================================================#
-
-        # Step 4: Iterate through all transformers
-        for transformer in self.transformers.values():
-            Yprim = transformer.y_matrix  # Get the primitive admittance matrix
-            bus1_idx = bus_indices[transformer.bus1.name]
-            bus2_idx = bus_indices[transformer.bus2.name]
-
-            # Add the elements of the Yprim matrix into the Ybus matrix
-            self.ybus[bus1_idx, bus1_idx] += Yprim.iloc[0, 0]  # Self-admittance for bus1
-            self.ybus[bus1_idx, bus2_idx] += Yprim.iloc[0, 1]  # Mutual admittance between bus1 and bus2
-            self.ybus[bus2_idx, bus1_idx] += Yprim.iloc[1, 0]  # Mutual admittance between bus2 and bus1
-            self.ybus[bus2_idx, bus2_idx] += Yprim.iloc[1, 1]  # Self-admittance for bus2
-
-        #iterate through all shunt capacitors, add admittance directly to ybus
-        for inductor in self.shunt_inductors.values(): #iterate thorugh list of inductors
-            y = inductor.y #get value of inductance
-            bus1_idx = bus_indices[inductor.bus.name]
-
-            self.ybus[bus1_idx, bus1_idx] += y #update ybus matrix with value
-
-        # iterate through all shunt capacitors, add admittance directly to ybus
-        for capacitor in self.shunt_capacitors.values():  # iterate thorugh list of inductors
-            y = capacitor.y  # get value of inductance
-            bus1_idx = bus_indices[capacitor.bus.name]
-
-            self.ybus[bus1_idx, bus1_idx] += y  # update ybus matrix with value
-
-        # Step 5: Numerical stability check (ensure no singularities)
-        if np.any(np.diag(self.ybus) == 0):  # If any diagonal element is zero, it indicates a singularity
-            raise ValueError("Ybus matrix has a singularity (zero diagonal entry). Please check bus connections.")
-
-        # Step 6: Convert Ybus into a pandas DataFrame with bus names as row and column indices
-        self.ybus = pd.DataFrame(self.ybus, index=self.buses.keys(), columns=self.buses.keys())
-
-        # Now, the Ybus is stored as a pandas DataFrame with proper bus names
-
-        # Making sure it shows all of the rows and columns properly
-        pd.set_option('display.max_rows', None)  # No limit to the number of rows displayed
-        pd.set_option('display.max_columns', None)  # No limit to the number of columns displayed
-        pd.set_option('display.width', None)  # No width limit (adjust to your console's width)
-        pd.set_option('display.max_colwidth', None)  # No limit to the column width
+        with Settings.telemetry.stage("circuit.ybus"):
+            # Step 1 and 2: Gather the bus indices of every branch (transmission lines and transformers) and
+            # stack their 2x2 primitive admittance matrices
+            N = len(self.buses)  # Number of buses
+            bus_indices = self.bus_indices
+            from_idx, to_idx, yprim = self.branch_primitives()
+
+            # Step 3: Shunt capacitors and inductors only add to the diagonal of their bus
+            shunts = list(self.shunt_inductors.values()) + list(self.shunt_capacitors.values())
+            shunt_idx = np.array([bus_indices[shunt.bus.name] for shunt in shunts], dtype=int)
+            shunt_y = np.array([shunt.y for shunt in shunts], dtype=complex)
+
+            # Step 4: Stamp everything into a sparse matrix in one pass
+            ybus = assemble_ybus(N, from_idx, to_idx, yprim, shunt_idx, shunt_y)
+
+            # Step 5: Numerical stability check (ensure no singularities)
+            if np.any(ybus.diagonal() == 0):  # If any diagonal element is zero, it indicates a singularity
+                raise ValueError("Ybus matrix has a singularity (zero diagonal entry). Please check bus connections.")
+
+            # Step 6: Keep the sparse matrix, or convert Ybus into a pandas DataFrame with bus names as row and column indices
+            if self.sparse:
+                self.ybus = ybus
+            else:
+                self.ybus = pd.DataFrame(ybus.toarray(), index=self.buses.keys(), columns=self.buses.keys())
+            self.ybus_dirty = False
+            self.ybus_modified = False
+
+        # Making sure it shows all of the rows and columns properly when debugging
+        Settings.show_full_tables()
+
+    def branch_names(self):
+        # branch names in the order used by branch_series_data
+        return list(self.transmission_lines.keys()) + list(self.transformers.keys())
+
+    def branch_rows(self, branches):
+        # rows of the branch table holding the given branches
+        return np.array([branch.table_index for branch in branches], dtype=int)
+
+    def branch_primitives(self):
+        # from/to bus indices and the 2x2 primitive admittance matrix of every branch in branch_names order,
+        # stacked as rows of [y11, y12, y21, y22]
+        branches = list(self.transmission_lines.values()) + list(self.transformers.values())
+        from_idx = np.array([self.bus_indices[branch.bus1.name] for branch in branches], dtype=int)
+        to_idx = np.array([self.bus_indices[branch.bus2.name] for branch in branches], dtype=int)
+        yprim = self.branch_table.yprim[self.branch_rows(branches)]
+        return from_idx, to_idx, yprim
+
+    def branch_series_data(self):
+        # from/to bus indices, series impedance and total line charging (both per-unit) of every
+        # transmission line followed by every transformer
+        lines = list(self.transmission_lines.values())
+        transformers = list(self.transformers.values())
+        branches = lines + transformers
+        from_idx = np.array([self.bus_indices[branch.bus1.name] for branch in branches], dtype=int)
+        to_idx = np.array([self.bus_indices[branch.bus2.name] for branch in branches], dtype=int)
+        z_series = np.array([line.impedance_pu for line in lines] + [t.zseries for t in transformers], dtype=complex)
+        y_charging = np.array([line.shunt_admittance for line in lines] + [0] * len(transformers), dtype=complex)
+        return from_idx, to_idx, z_series, y_charging
+
+    def branch_ratings(self):
+        # thermal rating in MVA of every branch in branch_names order
+        line_rating = [line.rating for line in self.transmission_lines.values()]
+        transformer_rating = [t.power_rating for t in self.transformers.values()]
+        return np.array(line_rating + transformer_rating, dtype=float)
 
     def calc_zero_negative_ybus(self):
-        # Step 1: Initialize the Ybus matrix as a zero matrix with dimensions N x N
-        N = len(self.buses)  # Number of buses
-        self.zero_ybus = np.zeros((N, N), dtype=complex)  # create the zero ybus
-        self.negative_ybus = np.zeros((N, N), dtype=complex)  # create the negative ybus
-
-        # Step 2: Create a dictionary to map bus names to indices for easier reference
-        bus_indices = {bus_name: idx for idx, bus_name in enumerate(self.buses)}
-
-        # ===============================================================================================================#
-        # Step 3: Iterate through all transmission lines
-        for line in self.transmission_lines.values():
-            Yprim_zero = line.zero_yprim  # Get the primitive admittance matrix
-            Yprim = line.y_matrix
-            bus1_idx = bus_indices[line.bus1.name]
-            bus2_idx = bus_indices[line.bus2.name]
-
-            # Add the elements of the zero Yprim matrix into the zero Ybus matrix
-            self.zero_ybus[bus1_idx, bus1_idx] += Yprim_zero.iloc[0, 0]
-            self.zero_ybus[bus1_idx, bus2_idx] += Yprim_zero.iloc[0, 1]
-            self.zero_ybus[bus2_idx, bus1_idx] += Yprim_zero.iloc[1, 0]
-            self.zero_ybus[bus2_idx, bus2_idx] += Yprim_zero.iloc[1, 1]
-
-            # Add the elements of the yprim matrix into the negative ybus matrix
-            self.negative_ybus[bus1_idx, bus1_idx] += Yprim.iloc[0, 0]
-            self.negative_ybus[bus1_idx, bus2_idx] += Yprim.iloc[0, 1]
-            self.negative_ybus[bus2_idx, bus1_idx] += Yprim.iloc[1, 0]
-            self.negative_ybus[bus2_idx, bus2_idx] += Yprim.iloc[1, 1]
-
-        # ==================================================================================================================#
-        # Step 4: Iterate through all transformers
-        for transformer in self.transformers.values():
-            Yprim_zero = transformer.zero_yprim
-            Yprim_neg = transformer.negative_yprim
-            bus1_idx = bus_indices[transformer.bus1.name]
-            bus2_idx = bus_indices[transformer.bus2.name]
-
-            # Only stamp off-diagonals into zero sequence
-            self.zero_ybus[bus1_idx, bus2_idx] += Yprim_zero.iloc[0, 1]
-            self.zero_ybus[bus2_idx, bus1_idx] += Yprim_zero.iloc[1, 0]
-
-            # Add full negative sequence stamping
-            self.negative_ybus[bus1_idx, bus1_idx] += Yprim_neg.iloc[0, 0]
-            self.negative_ybus[bus1_idx, bus2_idx] += Yprim_neg.iloc[0, 1]
-            self.negative_ybus[bus2_idx, bus1_idx] += Yprim_neg.iloc[1, 0]
-            self.negative_ybus[bus2_idx, bus2_idx] += Yprim_neg.iloc[1, 1]
-
-        # ==================================================================================================================#
-        # Step 5: Iterate through all generators
-        for generator in self.generators.values():
-            bus1_idx = bus_indices[generator.bus.name]
-            Yprim_zero = generator.zero_yprim
-            Yprim_neg = generator.negative_yprim
-
-            self.zero_ybus[bus1_idx, bus1_idx] += Yprim_zero.iloc[0, 0]
-            self.negative_ybus[bus1_idx, bus1_idx] += Yprim_neg.iloc[0, 0]
-
-        # ==================================================================================================================#
-        # Step 6: Numerical stability check (ensure no singularities)
-        if np.any(np.diag(self.zero_ybus) == 0):
-            raise ValueError("Ybus matrix has a singularity (zero diagonal entry). Please check bus connections.")
-        if np.any(np.diag(self.negative_ybus) == 0):
-            raise ValueError("Ybus matrix has a singularity (zero diagonal entry). Please check bus connections.")
-
-        # Step 7: Fix diagonals only for buses that have nonzero off-diagonal admittances
-        for i in range(N):
-            off_diag = np.copy(self.zero_ybus[i, :])
-            off_diag[i] = 0  # exclude self-admittance
-            if np.any(off_diag != 0):  # if there are mutual connections
-                self.zero_ybus[i, i] = -np.sum(off_diag)
-
-        # Step 7b: Fix diagonals for negative sequence Ybus (just like zero)
-        for i in range(N):
-            off_diag = np.copy(self.negative_ybus[i, :])
-            off_diag[i] = 0
-            if np.any(off_diag != 0):
-                self.negative_ybus[i, i] = -np.sum(off_diag)
-
-        # Step 8: Convert Ybus into a pandas DataFrame with bus names as row and column indices
-        self.zero_ybus = pd.DataFrame(self.zero_ybus, index=self.buses.keys(), columns=self.buses.keys())
-        self.negative_ybus = pd.DataFrame(self.negative_ybus, index=self.buses.keys(), columns=self.buses.keys())
-
-        # Step 9: Display settings for full matrix visibility
-        pd.set_option('display.max_rows', None)
-        pd.set_option('display.max_columns', None)
-        pd.set_option('display.width', None)
-        pd.set_option('display.max_colwidth', None)
+        # both sequence networks only depend on the topology, so they are rebuilt only when it has changed
+        if self.sequence_version == self.topology_version:
+            return
+
+        with Settings.telemetry.stage("circuit.sequence_ybus"):
+            # Step 1: Gather bus indices of lines, transformers and generators
+            N = len(self.buses)  # Number of buses
+            bus_indices = self.bus_indices
+            lines = list(self.transmission_lines.values())
+            transformers = list(self.transformers.values())
+            generators = list(self.generators.values())
+            line_from = np.array([bus_indices[line.bus1.name] for line in lines], dtype=int)
+            line_to = np.array([bus_indices[line.bus2.name] for line in lines], dtype=int)
+            tr_from = np.array([bus_indices[t.bus1.name] for t in transformers], dtype=int)
+            tr_to = np.array([bus_indices[t.bus2.name] for t in transformers], dtype=int)
+            gen_idx = np.array([bus_indices[g.bus.name] for g in generators], dtype=int)
+
+            # Step 2: Gather the primitive matrices from the branch table as rows of [y11, y12, y21, y22]
+            # (the negative sequence primitive of lines and transformers is their positive sequence one)
+            line_rows = self.branch_rows(lines)
+            tr_rows = self.branch_rows(transformers)
+            line_zero = self.branch_table.zero_yprim[line_rows]
+            line_neg = self.branch_table.yprim[line_rows]
+            tr_zero = self.branch_table.zero_yprim[tr_rows]
+            tr_zero[:, [0, 3]] = 0  # Only stamp off-diagonals of transformers into zero sequence
+            tr_neg = self.branch_table.yprim[tr_rows]
+            gen_zero = np.array([g.y_zero for g in generators], dtype=complex)
+            gen_neg = np.array([g.y_negative for g in generators], dtype=complex)
+
+            # Step 3: Stamp each sequence network in one sparse pass
+            branch_from = np.concatenate([line_from, tr_from])
+            branch_to = np.concatenate([line_to, tr_to])
+            zero_ybus = assemble_ybus(N, branch_from, branch_to, np.vstack([line_zero, tr_zero]), gen_idx, gen_zero)
+            negative_ybus = assemble_ybus(N, branch_from, branch_to, np.vstack([line_neg, tr_neg]), gen_idx, gen_neg)
+
+            # Step 4: Numerical stability check (ensure no singularities)
+            if np.any(zero_ybus.diagonal() == 0):
+                raise ValueError("Ybus matrix has a singularity (zero diagonal entry). Please check bus connections.")
+            if np.any(negative_ybus.diagonal() == 0):
+                raise ValueError("Ybus matrix has a singularity (zero diagonal entry). Please check bus connections.")
+
+            # Step 5: Fix diagonals only for buses that have nonzero off-diagonal admittances
+            zero_ybus = self.fix_sequence_diagonal(zero_ybus)
+            negative_ybus = self.fix_sequence_diagonal(negative_ybus)
+
+            # Step 6: Keep the sparse matrices, or convert them into pandas DataFrames with bus names as row and column indices
+            if self.sparse:
+                self.zero_ybus = zero_ybus
+                self.negative_ybus = negative_ybus
+            else:
+                self.zero_ybus = pd.DataFrame(zero_ybus.toarray(), index=self.buses.keys(), columns=self.buses.keys())
+                self.negative_ybus = pd.DataFrame(negative_ybus.toarray(), index=self.buses.keys(), columns=self.buses.keys())
+            self.sequence_version = self.topology_version
+
+        # Step 7: Display settings for full matrix visibility
+        Settings.show_full_tables()
+
+    @staticmethod
+    def fix_sequence_diagonal(ybus):
+        # replaces the diagonal of every row that has a nonzero off-diagonal entry by minus the sum of
+        # its off-diagonal entries (a sparse row sum); rows without mutual connections keep their diagonal
+        off_diag = ybus.copy()
+        off_diag.setdiag(0)
+        off_diag.eliminate_zeros()
+        connected = np.diff(off_diag.indptr) > 0
+        row_sum = np.asarray(off_diag.sum(axis=1)).ravel()
+        ybus = ybus.copy()
+        ybus.setdiag(np.where(connected, -row_sum, ybus.diagonal()))
+        return ybus
 
     def get_voltages(self, buses, bus_name):
         if bus_name not in buses:
@@ -285,97 +545,132 @@ class Circuit:
 
     def compute_power_injection(self, buses, ybus):
         # This function takes in buses and ybus (the admittance matrix)
-        num_buses = len(buses)  # Total number of buses
-        v = np.zeros(num_buses)  # Store voltage magnitudes
-        delta = np.zeros(num_buses)  # Store voltage angles
-
-        # Fetch voltages and angles for all buses
-        for i, bus_name in enumerate(self.bus_order):  # Ensure a consistent order
-            v[i], delta[i] = self.get_voltages(buses, bus_name)  # Corrected storage
-
-        P = np.zeros(num_buses)  # Store real power injection for each bus
-        Q = np.zeros(num_buses)  # Store reactive power injection for each bus
-
-        yabs = pd.DataFrame(np.abs(ybus.to_numpy()), index=ybus.index, columns=ybus.columns)
-        ydelta = pd.DataFrame(np.angle(ybus.to_numpy()), index=ybus.index, columns=ybus.columns)
-
-        for k, bus_k in enumerate(buses.keys()):  # Iterate through each bus
-            for n, bus_n in enumerate(buses.keys()):  # Iterate through mutual admittances
-                if self.radians == 0:               # Convert to radians
-                    delta_k = delta[k] * np.pi / 180
-                    delta_n = delta[n] * np.pi / 180
-                else:                               # Already in radians
-                    delta_k = delta[k]
-                    delta_n = delta[n]
-                #print(
-                    #f"bus_k={bus_k:<5} bus_n={bus_n:<5}  v[k]={v[k]:.5f}  v[n]={v[n]:.5f}  |Yₖₙ|={yabs.loc[bus_k, bus_n]:.5f}  Δk={delta_k:.5f}  Δn={delta_n:.5f}  θₖₙ={ydelta.loc[bus_k, bus_n]:.5f}",
-                    #np.cos(delta_k - delta_n - ydelta.loc[bus_k, bus_n]))
-                P[k] += v[k] * yabs.loc[bus_k, bus_n] * v[n] * np.cos(delta_k - delta_n - ydelta.loc[bus_k, bus_n])
-                Q[k] += v[k] * yabs.loc[bus_k, bus_n] * v[n] * np.sin(delta_k - delta_n - ydelta.loc[bus_k, bus_n])
-
-        print("Power Injection:")
-        print(P)
-        print(Q)
-
-        return P, Q  # Return power injection matrices
-
-    def compute_power_mismatch(self, buses, ybus):
-        # Compute actual power injections from Y-bus
-        P, Q = self.compute_power_injection(buses, ybus)
+        # voltages and angles come straight from the circuit's bus state arrays (already in bus_order)
+        v = self.bus_state.vpu
+        delta = self.bus_state.delta
 
-        # Initialize mismatch vectors as pandas DataFrames with bus names as indices
-        delta_P = pd.DataFrame(np.zeros(len(buses)), index=buses.keys(), columns=["Delta_P"])
-        delta_Q = pd.DataFrame(np.zeros(len(buses)), index=buses.keys(), columns=["Delta_Q"])
+        if self.radians == 0:  # Convert to radians
+            delta = delta * np.pi / 180
 
-        for i, bus_name in enumerate(self.bus_order):
-            bus = self.buses[bus_name]  # Get the Bus object
+        P, Q = calc_power_injection(ybus_array(ybus), v, delta)
+        self.bus_state.p[:] = P
+        self.bus_state.q[:] = Q
 
-            if bus.bus_type == "slack":  # Skip slack bus
-                continue
+        if Settings.verbosity >= Settings.DEBUG:
+            print("Power Injection:")
+            print(P)
+            print(Q)
 
-            # Compute total generator power at the bus
-            P_gen = sum(gen.mw_setpoint for gen in self.generators.values() if gen.bus.name == bus_name)/100
-
-            # Compute total load power at the bus (without mistakenly including generators)
-            P_load = sum(-load.real_power for load in self.loads.values() if load.bus.name == bus_name)/100
-
-            # Calculate the power mismatch
-            mismatch = P_gen + P_load - P[i]
-
-            # Ensure correct sign based on bus type
-            if (buses[bus_name].bus_type == "PQ" or P_gen == 0) and mismatch != 0:
-                delta_P.loc[bus_name, "Delta_P"] = -abs(mismatch)  # Force negative if nonzero
-            else:
-                delta_P.loc[bus_name, "Delta_P"] = mismatch  # Keep as is for PV/slack or if mismatch is zero
-
-            if bus.bus_type == "PQ":
-                # Reactive power mismatch only for PQ buses
-                Q_load = self.reactive_power.get(bus_name, 0)/100  # Get reactive load power
-                delta_Q.loc[bus_name, "Delta_Q"] = Q_load - Q[i]  # No generator Q, only loads
+        return P, Q  # Return power injection matrices
 
-        # Concatenate mismatch vectors for numerical solution
+    def compute_power_mismatch(self, buses, ybus):
+        # ΔP and ΔQ of every bus as a DataFrame (debug view); slack ΔP/ΔQ and PV ΔQ are reported as 0
+        type_code = self.bus_state.type_code
+        non_slack_idx = np.flatnonzero(type_code != SLACK)
+        pq_idx = np.flatnonzero(type_code == PQ)
+        mismatch_vector = self.compute_mismatch_vector(buses, ybus, non_slack_idx, pq_idx)
+        return self.mismatch_table(mismatch_vector, non_slack_idx, pq_idx)
+
+    def compute_mismatch_vector(self, buses, ybus, non_slack_idx, pq_idx):
+        # scheduled minus calculated injections (pu): [ΔP of the non-slack buses, ΔQ of the PQ buses],
+        # in the row order of the Jacobian
+        P, Q = self.compute_power_injection(buses, ybus)
+        delta_P = self.bus_state.p_sched[non_slack_idx] / Settings.base_power - P[non_slack_idx]
+        delta_Q = self.bus_state.q_sched[pq_idx] / Settings.base_power - Q[pq_idx]
+        return np.concatenate([delta_P, delta_Q])
+
+    def mismatch_table(self, mismatch_vector, non_slack_idx, pq_idx):
+        # spreads a mismatch vector in Jacobian order back over all buses, labeled by bus name
+        delta_P = np.zeros(len(self.bus_order))
+        delta_Q = np.zeros(len(self.bus_order))
+        delta_P[non_slack_idx] = mismatch_vector[:len(non_slack_idx)]
+        delta_Q[pq_idx] = mismatch_vector[len(non_slack_idx):]
         mismatch_df = pd.DataFrame({
-            "Bus": list(buses.keys()),  # First column with bus names
-            "Delta_P": delta_P["Delta_P"].values,  # Second column with delta P values
-            "Delta_Q": delta_Q["Delta_Q"].values  # Third column with delta Q values
+            "Bus": self.bus_order,  # First column with bus names
+            "Delta_P": delta_P,  # Second column with delta P values
+            "Delta_Q": delta_Q  # Third column with delta Q values
         })
-
         return mismatch_df
 
 
+    def generator_admittance(self):
+        # subtransient admittance of all generators, summed per bus in bus_order
+        sub_admittance = np.zeros(len(self.buses), dtype=complex)
+        for generator in self.generators.values():
+            sub_admittance[self.bus_indices[generator.bus.name]] += generator.sub_admittance
+        return sub_admittance
+
     def modify_y_bus(self):
         #adds subtransient admittance to each bus that has a generator attached
 
-        bus_indices = {bus_name: idx for idx, bus_name in enumerate(self.buses)}
+        bus_indices = self.bus_indices
 
+        if self.sparse:
+            # every bus already has a diagonal entry, so adding a diagonal matrix keeps the pattern
+            self.ybus = (self.ybus + sp.diags(self.generator_admittance())).tocsr()
+            self.ybus_modified = True
+            return
 
         for generator in self.generators.values(): #iterate through the generator dictionary
             bus1_idx = bus_indices[generator.bus.name] #obtain the bus for each generator, and modify the corresponding position in the y matrix
             self.ybus.iloc[bus1_idx,bus1_idx] += generator.sub_admittance
-
+        self.ybus_modified = True
+        self.fault_lu = None
+
+    def fault_ybus(self):
+        # the generator-modified Ybus as a CSC matrix; if modify_y_bus has not been called the generators are added here
+        y = sp.csc_matrix(ybus_array(self.ybus))
+        if not self.ybus_modified:
+            y = (y + sp.diags(self.generator_admittance())).tocsc()
+        return y
+
+    def fault_factorization(self):
+        # LU factors of the generator-modified Ybus, computed once and reused by every fault calculation
+        # until the Ybus changes
+        if self.ybus_dirty:
+            self.calc_ybus()  # a rebuilt Ybus also clears the cache
+        if self.fault_lu is None:
+            with Settings.telemetry.stage("circuit.fault_factorization"):
+                self.fault_lu = splu(self.fault_ybus())
+        return self.fault_lu
+
+    def fault_sweep(self, faulted_buses=None, chunk_size=256):
+        # bolted three-phase faults at many buses from a single factorization
+        # only the Zbus columns of the faulted buses are computed (by sparse solves, chunk_size at a time),
+        # the full inverse is never formed
+        # returns the fault current of each faulted bus (F,) and the post-fault voltage of every bus for
+        # each fault (F x N, columns in bus_order); unlike calculate_fault, which works on the Ybus as it is,
+        # the sweep always includes the generators (see fault_ybus)
+        if faulted_buses is None:
+            faulted_buses = self.bus_order
+        lu = self.fault_factorization()
+        N = len(self.buses)
+        fault_idx = np.array([self.bus_indices[bus] for bus in faulted_buses], dtype=int)
+
+        fault_current = np.zeros(len(fault_idx), dtype=complex)
+        fault_voltage = np.zeros((len(fault_idx), N), dtype=complex)
+        for start in range(0, len(fault_idx), chunk_size):
+            chunk = fault_idx[start:start + chunk_size]
+            rhs = np.zeros((N, len(chunk)), dtype=complex)
+            rhs[chunk, np.arange(len(chunk))] = 1.0
+            z_cols = lu.solve(rhs)  # column k is Zbus[:, chunk[k]]
+            znn = z_cols[chunk, np.arange(len(chunk))]
+            fault_current[start:start + len(chunk)] = 1.0 / znn
+            fault_voltage[start:start + len(chunk)] = (1 - z_cols / znn).T
+        return fault_current, fault_voltage
 
     def calculate_fault(self,faulted_bus):
         #calculates the current and voltage at each bus under fault conditions, as well as the zbus matrix
+        if self.sparse:
+            # only the faulted bus column of Zbus is needed: solve Ybus * z = e_n instead of inverting
+            n = self.bus_indices[faulted_bus]
+            e_n = np.zeros(len(self.buses), dtype=complex)
+            e_n[n] = 1.0
+            z_col = splu(self.ybus.tocsc()).solve(e_n)
+            i_f = 1.0 / z_col[n]
+            fault_voltage = 1 - z_col / z_col[n]
+            return i_f, fault_voltage
+
         self.zbus=np.linalg.inv(self.ybus)
         self.zbus = pd.DataFrame(self.zbus, index=self.ybus.keys(), columns=self.ybus.keys())
         #bus_indices = {bus_name: idx for idx, bus_name in enumerate(self.buses)}
@@ -397,75 +692,73 @@ class Circuit:
 
         return i_f,fault_voltage
 
-    def calculate_asym_fault(self, fault_type, faulted_bus, Zf=0.0):
-        import numpy as np
-        import pandas as pd
+    def sequence_thevenin(self):
+        # per-bus zero/positive/negative sequence impedances used by the asymmetrical fault routines,
+        # taken as the inverse of the sequence network diagonals (the positive sequence uses the negative
+        # sequence network, as in calculate_asym_fault)
+        self.calc_zero_negative_ybus()  # cached unless the topology changed
+        Z0 = 1 / ybus_array(self.zero_ybus).diagonal()
+        Z2 = 1 / ybus_array(self.negative_ybus).diagonal()
+        return Z0, Z2, Z2
+
+    def prefault_voltages(self):
+        # complex prefault voltage of every bus in bus_order (angles read in degrees, as in calculate_asym_fault)
+        return self.bus_state.vpu * np.exp(1j * np.deg2rad(self.bus_state.delta))
+
+    def asym_fault_sweep(self, faulted_buses=None, fault_types=("slg", "ll", "dlg"), Zf=(0.0,)):
+        # asymmetrical faults for every combination of faulted bus, fault type and fault impedance
+        # the sequence impedances of all buses are read once and the fault formulas run on whole arrays
+        # returns phase currents [Ia, Ib, Ic] and sequence currents [I0, I1, I2], both shaped
+        # (buses, fault types, fault impedances, 3)
+        if faulted_buses is None:
+            faulted_buses = self.bus_order
+        idx = np.array([self.bus_indices[bus] for bus in faulted_buses], dtype=int)
+        Z0, Z1, Z2 = (z[idx][:, None] for z in self.sequence_thevenin())
+        V_prefault = self.prefault_voltages()[idx][:, None]
+        Zf = np.atleast_1d(np.asarray(Zf, dtype=complex))[None, :]
+
+        I_seq = np.zeros((len(idx), len(fault_types), Zf.shape[1], 3), dtype=complex)
+        for t, fault_type in enumerate(fault_types):
+            I0, I1, I2 = calc_sequence_fault_currents(fault_type, V_prefault, Z0, Z1, Z2, Zf)
+            I_seq[:, t, :, 0] = I0
+            I_seq[:, t, :, 1] = I1
+            I_seq[:, t, :, 2] = I2
+        I_abc = I_seq @ T_INV.T
+        return I_abc, I_seq
 
-        print("\n>>> ENTERED calculate_asym_fault")
+    def calculate_asym_fault(self, fault_type, faulted_bus, Zf=0.0):
+        debug = Settings.verbosity >= Settings.DEBUG
+        if debug:
+            print("\n>>> ENTERED calculate_asym_fault")
 
         ordered_buses = list(self.buses.keys())
         b_idx = ordered_buses.index(faulted_bus)
 
-        Y0_np = np.array([
-            [self.zero_ybus.loc[bi, bj] for bj in ordered_buses]
-            for bi in ordered_buses
-        ], dtype=np.complex128)
-        Y1_np = np.array([
-            [self.negative_ybus.loc[bi, bj] for bj in ordered_buses]
-            for bi in ordered_buses
-        ], dtype=np.complex128)
-        Y2_np = np.array([
-            [self.negative_ybus.loc[bi, bj] for bj in ordered_buses]
-            for bi in ordered_buses
-        ], dtype=np.complex128)
-
         # Just invert diagonal terms directly — all in per-unit already
-        Z0_diag_inv = 1 / Y0_np[b_idx][b_idx]
-        Z1_diag_inv = 1 / Y1_np[b_idx][b_idx]
-        Z2_diag_inv = 1 / Y2_np[b_idx][b_idx]
+        Z0, Z1, Z2 = self.sequence_thevenin()
+        Z0_diag_inv = Z0[b_idx]
+        Z1_diag_inv = Z1[b_idx]
+        Z2_diag_inv = Z2[b_idx]
 
-        print(f"Y0_np[{b_idx},{b_idx}] = {Y0_np[b_idx][b_idx]}")
-        print(f"Expected 1 / Y0 = {Z0_diag_inv}")
-        print(f"Z0[Bus] = {Z0_diag_inv}")
+        if debug:
+            print(f"Y0_np[{b_idx},{b_idx}] = {1 / Z0_diag_inv}")
+            print(f"Expected 1 / Y0 = {Z0_diag_inv}")
+            print(f"Z0[Bus] = {Z0_diag_inv}")
 
         V_prefault = self.buses[faulted_bus].vpu * np.exp(1j * np.deg2rad(self.buses[faulted_bus].delta))
-        print(f"V_prefault = {V_prefault}")
-
-        if fault_type == "slg":
-            denom = Z0_diag_inv + Z1_diag_inv + Z2_diag_inv + 3 * Zf
-            I_seq = V_prefault / denom
-            I0 = I1 = I2 = I_seq
-
-        elif fault_type == "ll":
-            denom = Z1_diag_inv + Z2_diag_inv + Zf
-            I1 = V_prefault / denom
-            I2 = -I1
-            I0 = 0
-
-        elif fault_type == "dlg":
-            num = V_prefault * (Z1_diag_inv + Z2_diag_inv + Zf)
-            denom = Z0_diag_inv * (Z1_diag_inv + Z2_diag_inv + Zf) + Z1_diag_inv * Z2_diag_inv + Zf * (
-                        Z1_diag_inv + Z2_diag_inv)
-            I0 = num / denom
-            I1 = I0
-            I2 = I0
+        if debug:
+            print(f"V_prefault = {V_prefault}")
 
-        else:
-            raise ValueError("Invalid fault type")
+        I0, I1, I2 = calc_sequence_fault_currents(fault_type, V_prefault, Z0_diag_inv, Z1_diag_inv, Z2_diag_inv, Zf)
 
         # Convert sequence to phase
-        a = np.exp(2j * np.pi / 3)
-        T_inv = np.array([
-            [1, 1, 1],
-            [1, a ** 2, a],
-            [1, a, a ** 2]
-        ])
-        Iabc = T_inv @ np.array([I0, I1, I2])
-
-        print(f"\nAsymmetrical Fault Currents ({fault_type.upper()}) at {faulted_bus}:")
-        for phase, val in zip(['A', 'B', 'C'], Iabc):
-            mag = abs(val)
-            ang = np.angle(val, deg=True)
-            print(f"Phase {phase}: {mag:.4f} p.u., ∠ {ang:.2f}°")
+        Iabc = T_INV @ np.array([I0, I1, I2])
+
+        if Settings.verbosity >= Settings.SUMMARY:
+            print(f"\nAsymmetrical Fault Currents ({fault_type.upper()}) at {faulted_bus}:")
+            for phase, val in zip(['A', 'B', 'C'], Iabc):
+                mag = abs(val)
+                ang = np.angle(val, deg=True)
+                print(f"Phase {phase}: {mag:.4f} p.u., ∠ {ang:.2f}°")
 
         return {"Ia": Iabc[0], "Ib": Iabc[1], "Ic": Iabc[2]}, (I0, I1, I2)
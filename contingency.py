@@ -0,0 +1,294 @@
+from circuit import Circuit, ybus_array, calc_branch_flows
+from power_flow import newton_solve
+from linear_solver import Linear_Solver
+from snapshot import Circuit_Snapshot
+from bus import PQ, SLACK
+from settings import Settings
+from multiprocessing import Pool, shared_memory
+import time
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+#N-1 AC contingency analysis: one Newton-Raphson power flow per outaged branch (transmission line or
+#transformer) or generator, warm-started from the solved base case; every case runs the iteration of
+#Power_Flow.solve (newton_iterate: adaptive damping, voltage clamp, reused Jacobian ordering)
+#the base network is packed once into a shared memory block (Ybus in CSR form, branch primitives, schedules,
+#bus types and the base solution); workers attach to it and only receive (outage kind, index) tasks
+#each case reports convergence, iterations, solve time, voltage violations and branch loading
+#given a snapshot file of the circuit (see snapshot.py) the workers map that file instead, so the Ybus and the
+#branch tables are shared through the OS page cache and only the per-bus schedules and base solution are copied
+
+# the worker processes keep their attachment to the shared block here
+_shared = None
+_shared_arrays = None
+_linear_solver = Linear_Solver()  # Jacobian ordering reused by the cases solved in this process
+
+
+def pack_shared(arrays):
+    # copies a dict of numpy arrays into one shared memory block, each array 16-byte aligned
+    # returns the block and its layout {name: (offset, dtype, shape)}
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = (offset, array.dtype.str, array.shape)
+        offset += -(-array.nbytes // 16) * 16
+    block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for name, array in arrays.items():
+        view_shared(block, layout[name])[...] = array
+    return block, layout
+
+
+def view_shared(block, entry):
+    offset, dtype, shape = entry
+    return np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset)
+
+
+def attach_shared(name, layout):
+    # pool initializer: map the base network of the parent into this worker without copying it
+    global _shared, _shared_arrays
+    _shared = shared_memory.SharedMemory(name=name)
+    _shared_arrays = {key: view_shared(_shared, entry) for key, entry in layout.items()}
+
+
+def attach_snapshot(path, solved):
+    # pool initializer: map a snapshot of the base network; solved holds the base solution and solver settings
+    global _shared, _shared_arrays
+    _shared = Circuit_Snapshot(path)
+    _shared_arrays = {**snapshot_arrays(_shared), **solved}
+
+
+def snapshot_arrays(snapshot: Circuit_Snapshot):
+    # the network arrays of solve_case from a snapshot; the Ybus and branch tables are views into the mapping
+    arrays = snapshot.arrays
+    return {
+        "y_data": arrays["ybus_data"], "y_indices": arrays["ybus_indices"], "y_indptr": arrays["ybus_indptr"],
+        "p_sched": arrays["p_sched"] / Settings.base_power,
+        "q_sched": arrays["q_sched"] / Settings.base_power,
+        "type_code": arrays["type_code"],
+        "from_idx": arrays["branch_from"],
+        "to_idx": arrays["branch_to"],
+        "yprim": arrays["branch_yprim"],
+        "rating": arrays["branch_rating"],
+        "gen_bus": arrays["gen_bus"],
+        "gen_p": arrays["gen_p"] / Settings.base_power,
+    }
+
+
+def solve_shared_case(case):
+    return solve_case(_shared_arrays, case)
+
+
+def solve_case(arrays, case):
+    # one contingency from the packed base network; case is (kind, index) with kind "base", "branch"
+    # or "generator", index into the branch or generator arrays
+    kind, k = case
+    start = time.perf_counter()
+    N = len(arrays["p_sched"])
+    ybus = sp.csr_matrix((arrays["y_data"], arrays["y_indices"], arrays["y_indptr"]), shape=(N, N))
+    p_sched = arrays["p_sched"].copy()
+    q_sched = arrays["q_sched"].copy()
+    type_code = arrays["type_code"].copy()
+    in_service = np.ones(len(arrays["from_idx"]), dtype=bool)
+
+    if kind == "branch":
+        i, j = arrays["from_idx"][k], arrays["to_idx"][k]
+        stamp = sp.csr_matrix((-arrays["yprim"][k], ([i, i, j, j], [i, j, i, j])), shape=(N, N))
+        ybus = ybus + stamp
+        in_service[k] = False
+    elif kind == "generator":
+        bus = arrays["gen_bus"][k]
+        p_sched[bus] -= arrays["gen_p"][k]
+        others = (arrays["gen_bus"] == bus) & (np.arange(len(arrays["gen_bus"])) != k)
+        if not np.any(others):
+            type_code[bus] = PQ  # no generator left to hold the voltage
+
+    # a part of the network cut off from the slack bus has no power flow solution
+    graph = sp.csr_matrix((np.ones(in_service.sum()), (arrays["from_idx"][in_service], arrays["to_idx"][in_service])),
+                          shape=(N, N))
+    n_islands, labels = connected_components(graph, directed=False)
+    slack_island = labels[np.flatnonzero(type_code == SLACK)[0]]
+    if n_islands > 1:
+        return {"status": "islanded", "converged": False, "iterations": 0,
+                "time": time.perf_counter() - start, "vpu": np.full(N, np.nan), "delta": np.full(N, np.nan),
+                "loading": None,
+                "islanded_buses": np.flatnonzero(labels != slack_island)}
+
+    vpu = arrays["vpu"].copy()
+    delta = arrays["delta"].copy()
+    with np.errstate(all="ignore"):
+        try:
+            converged, iterations = newton_solve(ybus, p_sched, q_sched, type_code, vpu, delta,
+                                                 arrays["tol"][0], int(arrays["max_iter"][0]),
+                                                 linear_solver=_linear_solver)
+        except (np.linalg.LinAlgError, RuntimeError):
+            converged, iterations = False, 0
+
+    # apparent power at both ends of every branch, the larger one against the branch rating
+    S_from, S_to = calc_branch_flows(vpu * np.exp(1j * delta), arrays["from_idx"], arrays["to_idx"], arrays["yprim"])
+    loading = np.maximum(np.abs(S_from), np.abs(S_to)) * Settings.base_power / arrays["rating"] * 100
+    loading[~in_service] = 0.0
+    return {"status": "converged" if converged else "diverged", "converged": converged,
+            "iterations": iterations, "time": time.perf_counter() - start, "vpu": vpu, "delta": delta,
+            "loading": loading,
+            "islanded_buses": np.array([], dtype=int)}
+
+
+class Contingency_Analysis:
+
+    def __init__(self, circuit: Circuit, v_min: float = 0.95, v_max: float = 1.05, loading_limit: float = 100.0,
+                 tol: float = 10**-9, max_iter: int = 20):
+        self.circuit = circuit
+        self.v_min = v_min
+        self.v_max = v_max
+        self.loading_limit = loading_limit  # percent of the branch rating
+        self.tol = tol
+        self.max_iter = max_iter
+        self.results = None
+        self.table = None  # summary of the last run
+
+    def base_arrays(self):
+        # the base network and its solved state as plain arrays, the only data the workers need
+        circuit = self.circuit
+        ybus = sp.csr_matrix(ybus_array(circuit.ybus), dtype=complex)
+        generators = list(circuit.generators.values())
+        delta = circuit.bus_state.delta.copy()
+        if circuit.radians == 0:
+            delta = np.deg2rad(delta)
+        from_idx, to_idx, yprim = circuit.branch_primitives()
+        return {
+            "y_data": ybus.data, "y_indices": ybus.indices, "y_indptr": ybus.indptr,
+            "p_sched": circuit.bus_state.p_sched / Settings.base_power,
+            "q_sched": circuit.bus_state.q_sched / Settings.base_power,
+            "type_code": circuit.bus_state.type_code.copy(),
+            "vpu": circuit.bus_state.vpu.copy(),
+            "delta": delta,
+            "from_idx": from_idx,
+            "to_idx": to_idx,
+            "yprim": yprim,
+            "rating": circuit.branch_ratings(),
+            "gen_bus": np.array([circuit.bus_indices[g.bus.name] for g in generators], dtype=int),
+            "gen_p": np.array([g.mw_setpoint for g in generators], dtype=float) / Settings.base_power,
+            "tol": np.array([self.tol]),
+            "max_iter": np.array([self.max_iter]),
+        }
+
+    def cases(self, outages):
+        # (label, kind, index) for each outage name; the slack generator cannot be taken out
+        branch_names = self.circuit.branch_names()
+        generator_names = list(self.circuit.generators.keys())
+        cases = [("base", "base", -1)]
+        for name in outages:
+            if name in branch_names:
+                cases.append((name, "branch", branch_names.index(name)))
+            elif name in generator_names:
+                if self.circuit.generators[name].bus.bus_type == "slack":
+                    raise ValueError(f"{name} is the slack generator and cannot be outaged")
+                cases.append((name, "generator", generator_names.index(name)))
+            else:
+                raise ValueError(f"{name} is not a branch or generator in the circuit")
+        return cases
+
+    def run(self, outages=None, processes=None, snapshot=None):
+        """Solve the base case and every outage; returns the summary table (one row per case).
+
+        outages defaults to every branch. processes is the size of the worker pool (None: one per CPU);
+        with processes=1 the cases are solved in this process. snapshot is the path of a snapshot saved
+        from this circuit (save_snapshot); the workers then map the network from that file instead of a
+        shared memory block filled by this process.
+        """
+        circuit = self.circuit
+        if outages is None:
+            outages = circuit.branch_names()
+        cases = self.cases(outages)
+        arrays = self.base_arrays()
+
+        # solve the base case first so every contingency is warm-started from it
+        base = solve_case(arrays, ("base", -1))
+        if not base["converged"]:
+            raise RuntimeError("Base case power flow did not converge")
+
+        arrays["vpu"] = base["vpu"]
+        arrays["delta"] = base["delta"]
+
+        tasks = [(kind, k) for _, kind, k in cases[1:]]
+        if processes == 1:
+            results = [solve_case(arrays, task) for task in tasks]
+        elif snapshot is not None:
+            self.check_snapshot(snapshot)
+            solved = {key: arrays[key] for key in ("vpu", "delta", "tol", "max_iter")}
+            with Pool(processes, initializer=attach_snapshot, initargs=(snapshot, solved)) as pool:
+                results = pool.map(solve_shared_case, tasks)
+        else:
+            block, layout = pack_shared(arrays)
+            try:
+                with Pool(processes, initializer=attach_shared, initargs=(block.name, layout)) as pool:
+                    results = pool.map(solve_shared_case, tasks)
+            finally:
+                block.close()
+                block.unlink()
+
+        self.results = [base] + results
+        self.table = self.summarize(cases, self.results)
+        if Settings.verbosity >= Settings.SUMMARY:
+            print(self.table.to_string())
+        return self.table
+
+    def check_snapshot(self, path):
+        # the workers solve the network in the file, so it has to be the one of this circuit: same elements,
+        # branch primitives, shunts, Ybus and schedules
+        snapshot = Circuit_Snapshot(path)
+        header = snapshot.header
+        arrays = snapshot.arrays
+        circuit = self.circuit
+        from_idx, to_idx, yprim = circuit.branch_primitives()
+        generators = list(circuit.generators.values())
+        ybus = sp.csr_matrix(ybus_array(circuit.ybus), dtype=complex)
+        same = (header["buses"] == circuit.bus_order
+                and header["lines"] + header["transformers"] == circuit.branch_names()
+                and header["generators"] == list(circuit.generators.keys())
+                and header["capacitors"] == list(circuit.shunt_capacitors.keys())
+                and header["inductors"] == list(circuit.shunt_inductors.keys())
+                and np.array_equal(arrays["capacitor_y"], [shunt.y for shunt in circuit.shunt_capacitors.values()])
+                and np.array_equal(arrays["inductor_y"], [shunt.y for shunt in circuit.shunt_inductors.values()])
+                and np.array_equal(arrays["branch_from"], from_idx)
+                and np.array_equal(arrays["branch_to"], to_idx)
+                and np.array_equal(arrays["branch_yprim"], yprim)
+                and np.array_equal(arrays["branch_rating"], circuit.branch_ratings())
+                and np.array_equal(arrays["gen_p"], [g.mw_setpoint for g in generators])
+                and snapshot.matrix("ybus").shape == ybus.shape
+                and (snapshot.matrix("ybus") != ybus).nnz == 0
+                and np.array_equal(arrays["p_sched"], circuit.bus_state.p_sched)
+                and np.array_equal(arrays["q_sched"], circuit.bus_state.q_sched)
+                and np.array_equal(arrays["type_code"], circuit.bus_state.type_code))
+        snapshot.close()
+        if not same:
+            raise ValueError(f"{path} is not a snapshot of the circuit in its current state")
+
+    def summarize(self, cases, results):
+        circuit = self.circuit
+        branch_names = np.array(circuit.branch_names())
+        bus_order = np.array(circuit.bus_order)
+        rows = []
+        for (label, kind, _), result in zip(cases, results):
+            vpu = result["vpu"]
+            loading = result["loading"]
+            low = bus_order[vpu < self.v_min] if result["converged"] else []
+            high = bus_order[vpu > self.v_max] if result["converged"] else []
+            overloads = branch_names[loading > self.loading_limit] if result["converged"] else []
+            rows.append({
+                "Outage": label,
+                "Type": kind,
+                "Status": result["status"],
+                "Iterations": result["iterations"],
+                "Time_ms": result["time"] * 1000,
+                "Min_V": np.nanmin(vpu) if result["converged"] else np.nan,
+                "Max_V": np.nanmax(vpu) if result["converged"] else np.nan,
+                "Max_Loading": np.max(loading) if result["converged"] and len(loading) else np.nan,
+                "Low_V": ", ".join(low),
+                "High_V": ", ".join(high),
+                "Overloads": ", ".join(overloads) if result["status"] != "islanded"
+                else "islanded: " + ", ".join(bus_order[result["islanded_buses"]]),
+            })
+        return pd.DataFrame(rows).set_index("Outage")
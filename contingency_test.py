@@ -0,0 +1,63 @@
+from seven_bus import build_circuit
+from contingency import Contingency_Analysis, solve_case
+from jacobian import Jacobian
+from power_flow import Power_Flow
+from snapshot import save_snapshot
+from settings import Settings
+import numpy as np
+import os
+import tempfile
+
+
+if __name__ == "__main__":  # the worker processes import this module
+    # N-1 AC contingency analysis of every branch and of Generator 2 on a pool of two worker processes
+    Settings.verbosity = Settings.SUMMARY
+    circuit1 = build_circuit()
+    analysis = Contingency_Analysis(circuit1, v_min=0.85, v_max=1.05)
+    table = analysis.run(circuit1.branch_names() + ["Generator 2"], processes=2)
+
+    assert table.loc["base", "Status"] == "converged"
+    assert table.loc["T2", "Status"] == "islanded"  # Bus7 is only connected through T2
+    assert (table.loc["Line 1":"Line 6", "Status"] == "converged").all()
+
+    # the same run with the workers mapping the network from a snapshot file
+    path = os.path.join(tempfile.mkdtemp(), "circuit1.snap")
+    save_snapshot(circuit1, path, state=False)
+    Settings.verbosity = Settings.SILENT
+    mapped = analysis.run(circuit1.branch_names() + ["Generator 2"], processes=2, snapshot=path)
+    assert (mapped["Status"] == table["Status"]).all()
+    assert (mapped["Iterations"] == table["Iterations"]).all()
+    assert ((mapped["Min_V"] - table["Min_V"]).abs().fillna(0) < 1e-9).all()
+
+    # every case runs the Newton iteration of Power_Flow.solve, so the base case matches it
+    circuit2 = build_circuit()
+    power_flow = Power_Flow(circuit2, Jacobian(circuit2))
+    power_flow.solve(circuit2.buses, circuit2.ybus, tol=analysis.tol, max_iter=analysis.max_iter)
+    assert table.loc["base", "Iterations"] == power_flow.iterations
+    assert np.max(np.abs(analysis.results[0]["vpu"] - circuit2.bus_state.vpu)) < 1e-9
+
+    # a case without a solution is damped and clamped the same way instead of running away
+    arrays = analysis.base_arrays()
+    arrays["p_sched"] = 8 * arrays["p_sched"]
+    arrays["q_sched"] = 8 * arrays["q_sched"]
+    result = solve_case(arrays, ("base", -1))
+    assert result["status"] == "diverged" and result["iterations"] == analysis.max_iter
+    assert np.all((result["vpu"] >= 0.5) & (result["vpu"] <= 1.5))
+
+    # a snapshot of a different network or operating point is refused
+    circuit1.add_shunt_capacitor("Cap", "Bus3", 50)
+    try:
+        analysis.run(["Line 1"], processes=2, snapshot=path)
+        raise AssertionError("snapshot without the new shunt accepted")
+    except ValueError:
+        pass
+    save_snapshot(circuit1, path, state=False)
+    with_shunt = analysis.run(["Line 1"], processes=2, snapshot=path)
+    shared = analysis.run(["Line 1"], processes=2)
+    assert abs(with_shunt.loc["Line 1", "Min_V"] - shared.loc["Line 1", "Min_V"]) < 1e-9
+    circuit1.set_load("Load 1", 120, 50)
+    try:
+        analysis.run(["Line 1"], processes=2, snapshot=path)
+        raise AssertionError("stale snapshot accepted")
+    except ValueError:
+        pass
@@ -0,0 +1,118 @@
+from circuit import Circuit
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+from settings import Settings
+
+#linearized (DC) power flow and distribution factors for contingency screening
+#branches are the transmission lines followed by the transformers (Circuit.branch_names order)
+#B is built from the series reactances only: resistance, line charging and shunts are ignored
+#the slack bus is the angle reference, and its PTDF column is zero
+#the factorization of B and the PTDF/LODF matrices are cached until the circuit topology changes
+
+class DC_Power_Flow:
+
+    def __init__(self, circuit: Circuit):
+        self.circuit = circuit
+        self.version = None  # topology_version the cached data belongs to
+        self.ptdf_matrix = None
+        self.lodf_matrix = None
+        self.refresh()
+
+    def refresh(self):
+        # rebuild B and its factorization only when the topology has changed
+        circuit = self.circuit
+        if self.version == circuit.topology_version:
+            return
+        N = len(circuit.buses)
+        from_idx, to_idx, z_series, _ = circuit.branch_series_data()
+        E = len(from_idx)
+
+        self.branch_names = circuit.branch_names()
+        self.b_branch = 1 / z_series.imag  # series susceptance magnitude of each branch
+
+        # branch-bus incidence matrix: +1 at the from bus, -1 at the to bus
+        rows = np.concatenate([np.arange(E), np.arange(E)])
+        cols = np.concatenate([from_idx, to_idx])
+        data = np.concatenate([np.ones(E), -np.ones(E)])
+        self.incidence = sp.csr_matrix((data, (rows, cols)), shape=(E, N))
+
+        self.bf = (sp.diags(self.b_branch) @ self.incidence).tocsr()  # branch flow = Bf θ
+        self.bbus = (self.incidence.T @ self.bf).tocsc()  # bus injection = Bbus θ
+
+        slack = [name for name in circuit.bus_order if circuit.buses[name].bus_type == "slack"]
+        self.slack_idx = circuit.bus_indices[slack[0]] if slack else 0
+        self.non_slack_idx = np.array([i for i in range(N) if i != self.slack_idx], dtype=int)
+        self.bbus_lu = splu(self.bbus[self.non_slack_idx][:, self.non_slack_idx].tocsc())
+
+        self.ptdf_matrix = None
+        self.lodf_matrix = None
+        self.version = circuit.topology_version
+
+    def injections(self):
+        # scheduled net real power injection of every bus in per-unit
+        return self.circuit.bus_state.p_sched / Settings.base_power
+
+    def solve(self, p_injection=None):
+        """Return bus angles (radians) and branch flows (MW) for the given per-unit injections.
+
+        p_injection defaults to the scheduled generation minus load of the circuit; it may also be
+        an (N, K) array to solve K injection patterns at once.
+        """
+        self.refresh()
+        if p_injection is None:
+            p_injection = self.injections()
+        p_injection = np.asarray(p_injection, dtype=float)
+        theta = np.zeros(p_injection.shape)
+        theta[self.non_slack_idx] = self.bbus_lu.solve(p_injection[self.non_slack_idx])
+        flows = (self.bf @ theta) * Settings.base_power
+        return theta, flows
+
+    def ptdf(self):
+        """Power transfer distribution factors (branches x buses): MW flow change per MW injected at
+        a bus and withdrawn at the slack bus."""
+        self.refresh()
+        if self.ptdf_matrix is None:
+            E, N = self.incidence.shape
+            self.ptdf_matrix = np.zeros((E, N))
+            if E:
+                bf_ns = self.bf[:, self.non_slack_idx].toarray()
+                # Bbus is symmetric, so PTDF[:, ns] = (Bred^-1 Bf[:, ns]^T)^T
+                self.ptdf_matrix[:, self.non_slack_idx] = self.bbus_lu.solve(np.ascontiguousarray(bf_ns.T)).T
+        return self.ptdf_matrix
+
+    def lodf(self):
+        """Line outage distribution factors (branches x branches): fraction of the pre-outage flow
+        of branch k that moves onto branch l when k is taken out. Outages that island the network
+        (radial branches) give NaN columns."""
+        self.refresh()
+        if self.lodf_matrix is None:
+            H = self.ptdf() @ self.incidence.T.toarray()  # flow on l per unit transfer across branch k
+            denominator = 1 - np.diag(H)
+            islanding = np.abs(denominator) < 1e-10
+            denominator[islanding] = np.nan
+            self.lodf_matrix = H / denominator
+            np.fill_diagonal(self.lodf_matrix, -1.0)
+            self.lodf_matrix[:, islanding] = np.nan
+        return self.lodf_matrix
+
+    def outage_flows(self, outages, flows=None):
+        """Post-outage branch flows (MW) for a list of single-branch outages.
+
+        Returns an (E, K) array, column k being the flows with branch outages[k] removed.
+        """
+        if flows is None:
+            flows = self.solve()[1]
+        k = np.array([self.branch_names.index(name) if isinstance(name, str) else name for name in outages], dtype=int)
+        post = flows[:, None] + self.lodf()[:, k] * flows[k][None, :]
+        post[k, np.arange(len(k))] = 0.0
+        return post
+
+    def transfer_flows(self, transfers, flows=None):
+        """Branch flows (MW) for a set of transfers.
+
+        transfers is an (N, K) array of per-bus MW changes, one column per transfer case.
+        """
+        if flows is None:
+            flows = self.solve()[1]
+        return flows[:, None] + self.ptdf() @ np.asarray(transfers, dtype=float)
@@ -0,0 +1,52 @@
+from seven_bus import build_circuit
+from dc_power_flow import DC_Power_Flow
+from settings import Settings
+import numpy as np
+
+
+def without_branch(name):
+    # the 7-bus system with one branch actually removed, as a separate DC power flow
+    circuit = build_circuit()
+    if name in circuit.transmission_lines:
+        del circuit.transmission_lines[name]
+    else:
+        del circuit.transformers[name]
+    circuit.topology_version += 1
+    return DC_Power_Flow(circuit)
+
+
+circuit1 = build_circuit()
+dc = DC_Power_Flow(circuit1)
+theta, flows = dc.solve()
+names = circuit1.branch_names()
+print("Base case flows (MW): " + ", ".join(f"{name} {flow:.1f}" for name, flow in zip(names, flows)))
+
+# every PTDF column is the flow change of a 1 pu injection at that bus, withdrawn at the slack bus
+N = len(circuit1.bus_order)
+transfers = np.eye(N)
+transfers[dc.slack_idx, :] -= 1
+_, transfer_flows = dc.solve(transfers)
+difference = np.max(np.abs(dc.ptdf() - transfer_flows / Settings.base_power))
+print(f"Max PTDF difference from direct solves: {difference:.2e}")
+assert difference < 1e-12
+assert np.all(dc.ptdf()[:, dc.slack_idx] == 0)
+
+# LODF outage flows against DC solves with the branch removed
+lines = list(circuit1.transmission_lines.keys())
+post = dc.outage_flows(lines, flows)
+for k, name in enumerate(lines):
+    _, resolved = without_branch(name).solve()
+    others = [l for l, other in enumerate(names) if other != name]
+    difference = np.max(np.abs(post[others, k] - resolved))
+    print(f"{name} out: max difference from the re-solve {difference:.2e} MW")
+    assert difference < 1e-9 and post[names.index(name), k] == 0
+
+# T2 is the only connection of Bus7: its outage islands the network, which the LODF reports as NaN flows
+# and which leaves the re-solved B matrix singular
+post = dc.outage_flows(["T2"], flows)
+assert np.isnan(post[[names.index(name) for name in lines], 0]).all()
+try:
+    without_branch("T2")
+    raise AssertionError("islanded network solved")
+except RuntimeError:
+    pass
@@ -0,0 +1,114 @@
+from circuit import Circuit, assemble_ybus, calc_power_injection, ybus_array
+from jacobian import Jacobian
+import numpy as np
+from settings import Settings
+from scipy.sparse.linalg import splu
+
+#fast-decoupled power flow, selected with Power_Flow.solve(..., method="fdxb") or method="fdbx"
+#B' (P-θ) and B'' (Q-V) are built once from the branch data of the circuit and factored once, and only
+#rebuilt when the topology of the circuit changes (Power_Flow keeps the engine between solves); each iteration is a P-θ half-step followed by a Q-V half-step using those same factors
+#XB: B' ignores branch resistance, B'' uses the full series impedance
+#BX: B' uses the full series impedance, B'' ignores branch resistance
+#both variants leave line charging and shunt elements out of B' and keep them in B''
+#the mismatch is plain scheduled minus calculated injection: undamped half-steps need the true sign
+
+class Fast_Decoupled:
+
+    def __init__(self, circuit: Circuit, jacobian: Jacobian, variant: str = "xb"):
+        if variant not in ("xb", "bx"):
+            raise ValueError("Fast-decoupled variant must be 'xb' or 'bx'")
+        self.circuit = circuit
+        self.jacobian = jacobian  # reuses the slack/PV/PQ classification of the Newton solver
+        self.variant = variant
+        self.version = None  # topology_version the factors of B' and B'' belong to
+        self.iterations = 0
+        self.history = []  # one dict per iteration, same keys as Power_Flow.history
+        self.refresh()
+
+    def refresh(self):
+        # build and factor B' and B'' only when the topology has changed
+        if self.version == self.circuit.topology_version:
+            return
+        self.b_prime, self.b_double_prime = self.calc_b_matrices()
+        self.b_prime_lu = splu(self.b_prime.tocsc())
+        # a system without PQ buses has no Q-V half-step
+        self.b_double_prime_lu = splu(self.b_double_prime.tocsc()) if len(self.jacobian.pq_idx) else None
+        Settings.telemetry.count("fast_decoupled.factorizations")
+        self.version = self.circuit.topology_version
+
+    def calc_b_matrices(self):
+        circuit = self.circuit
+        N = len(circuit.buses)
+        from_idx, to_idx, z_series, y_charging = circuit.branch_series_data()
+        z_reactance = 1j * z_series.imag  # series impedance with the resistance dropped
+
+        z_p = z_reactance if self.variant == "xb" else z_series
+        z_pp = z_series if self.variant == "xb" else z_reactance
+
+        # B': series branches only
+        y_p = 1 / z_p
+        yprim_p = np.column_stack([y_p, -y_p, -y_p, y_p])
+        no_shunts = np.array([], dtype=int)
+        ybus_p = assemble_ybus(N, from_idx, to_idx, yprim_p, no_shunts, np.array([], dtype=complex))
+
+        # B'': series branches plus line charging and shunt capacitors/inductors
+        y_pp = 1 / z_pp
+        yprim_pp = np.column_stack([y_pp + y_charging / 2, -y_pp, -y_pp, y_pp + y_charging / 2])
+        shunts = list(circuit.shunt_inductors.values()) + list(circuit.shunt_capacitors.values())
+        shunt_idx = np.array([circuit.bus_indices[shunt.bus.name] for shunt in shunts], dtype=int)
+        shunt_y = np.array([shunt.y for shunt in shunts], dtype=complex)
+        ybus_pp = assemble_ybus(N, from_idx, to_idx, yprim_pp, shunt_idx, shunt_y)
+
+        non_slack_idx = self.jacobian.non_slack_idx
+        pq_idx = self.jacobian.pq_idx
+        b_prime = -ybus_p.imag[non_slack_idx][:, non_slack_idx]
+        b_double_prime = -ybus_pp.imag[pq_idx][:, pq_idx]
+        return b_prime, b_double_prime
+
+    def mismatch(self, buses, ybus):
+        # ΔP at non-slack buses and ΔQ at PQ buses, in the Jacobian's order
+        state = self.circuit.bus_state
+        P, Q = calc_power_injection(ybus_array(ybus), state.vpu, state.delta)  # angles in radians
+        p_sched = state.p_sched / Settings.base_power
+        q_sched = state.q_sched / Settings.base_power
+        return (p_sched - P)[self.jacobian.non_slack_idx], (q_sched - Q)[self.jacobian.pq_idx]
+
+    def solve(self, buses, ybus, tol=10**-9, max_iter=50):
+        """Run P-θ / Q-V half-steps until both mismatches are below tol. Returns True if converged."""
+        self.refresh()
+        self.circuit.radians = 1  # angles are updated in radians, like the Newton solver
+        state = self.circuit.bus_state
+        non_slack_idx = self.jacobian.non_slack_idx
+        pq_idx = self.jacobian.pq_idx
+
+        self.history = []
+        for iteration in range(max_iter):
+            self.iterations = iteration + 1
+
+            # P-θ half-step
+            delta_P, delta_Q = self.mismatch(buses, ybus)
+            max_mismatch = max(np.max(np.abs(delta_P), initial=0), np.max(np.abs(delta_Q), initial=0))
+            self.history.append({"iteration": iteration + 1, "max_mismatch": float(max_mismatch), "step_norm": 0.0})
+            if max_mismatch < tol:
+                return True
+            delta_theta = self.b_prime_lu.solve(delta_P / state.vpu[non_slack_idx])
+            state.delta[non_slack_idx] += delta_theta
+            self.history[-1]["step_norm"] = np.max(np.abs(delta_theta), initial=0)
+
+            # Q-V half-step
+            delta_P, delta_Q = self.mismatch(buses, ybus)
+            if max(np.max(np.abs(delta_P), initial=0), np.max(np.abs(delta_Q), initial=0)) < tol:
+                return True
+            if self.b_double_prime_lu is None:
+                continue
+            delta_v = self.b_double_prime_lu.solve(delta_Q / state.vpu[pq_idx])
+            state.vpu[pq_idx] += delta_v
+            self.history[-1]["step_norm"] = max(self.history[-1]["step_norm"], np.max(np.abs(delta_v)))
+
+            # NaN safeguard
+            if np.any(np.isnan(delta_theta)) or np.any(np.isnan(delta_v)):
+                if Settings.verbosity >= Settings.SUMMARY:
+                    print("\n❌ NaN detected in fast-decoupled update. Aborting iteration.")
+                return False
+
+        return False
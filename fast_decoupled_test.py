@@ -0,0 +1,41 @@
+from seven_bus import build_circuit
+from jacobian import Jacobian
+from power_flow import Power_Flow
+import numpy as np
+
+
+# Solve the same circuit with each engine and compare the complex bus voltages
+results = {}
+for method in ["newton", "fdxb", "fdbx"]:
+    circuit1 = build_circuit()
+    powerflow = Power_Flow(circuit1, Jacobian(circuit1))
+    print(f"\n--- Solving Power Flow ({method}) ---")
+    powerflow.solve(circuit1.buses, circuit1.ybus, method=method)
+    results[method] = np.array([circuit1.buses[bus].vpu * np.exp(1j * circuit1.buses[bus].delta)
+                                for bus in circuit1.bus_order])
+
+for method in ["fdxb", "fdbx"]:
+    difference = np.max(np.abs(results[method] - results["newton"]))
+    print(f"\nMax voltage difference {method} vs newton: {difference:.2e}")
+    assert difference < 1e-6
+
+# repeated screening solves with one Power_Flow factor B' and B'' once; a new shunt refactors B''
+circuit1 = build_circuit()
+powerflow = Power_Flow(circuit1, Jacobian(circuit1))
+powerflow.solve(circuit1.buses, circuit1.ybus, method="fdxb")
+solved = powerflow.snapshot()
+engine = powerflow.fast_decoupled["fdxb"]
+b_prime_lu = engine.b_prime_lu
+for factor in (0.9, 1.1, 1.2):
+    circuit1.set_load("Load 1", 110 * factor, 50 * factor)
+    powerflow.solve(circuit1.buses, circuit1.ybus, method="fdxb", warm_start=solved)
+    assert powerflow.converged and powerflow.fast_decoupled["fdxb"] is engine and engine.b_prime_lu is b_prime_lu
+circuit1.add_shunt_capacitor("Cap", "Bus3", 50)
+powerflow.solve(circuit1.buses, circuit1.ybus, method="fdxb", warm_start=solved)
+assert powerflow.converged and engine.b_prime_lu is not b_prime_lu
+fast_decoupled = circuit1.bus_state.vpu * np.exp(1j * circuit1.bus_state.delta)
+powerflow.solve(circuit1.buses, circuit1.ybus, warm_start=solved)
+newton = circuit1.bus_state.vpu * np.exp(1j * circuit1.bus_state.delta)
+difference = np.max(np.abs(fast_decoupled - newton))
+print(f"\nMax voltage difference fdxb vs newton with the shunt added: {difference:.2e}")
+assert difference < 1e-6
@@ -0,0 +1,59 @@
+from seven_bus import build_circuit
+from jacobian import Jacobian
+from power_flow import Power_Flow
+from circuit import ybus_array
+from settings import Settings
+import numpy as np
+
+
+# Three-phase faults at every bus of the 7-bus system in one sweep against calculate_fault called bus by bus, and
+# against the Zbus formed explicitly by inverting the generator-modified Ybus
+Settings.verbosity = Settings.SILENT
+for sparse in (False, True):
+    circuit1 = build_circuit(sparse)
+    Power_Flow(circuit1, Jacobian(circuit1)).solve(circuit1.buses, circuit1.ybus)
+
+    # calculate_fault works on the Ybus as it is: without modify_y_bus the generators are left out
+    unmodified = ybus_array(circuit1.ybus)
+    unmodified = unmodified.toarray() if sparse else unmodified
+    current, voltage = circuit1.calculate_fault("Bus3")
+    zbus = np.linalg.inv(unmodified)
+    n = circuit1.bus_indices["Bus3"]
+    assert abs(current - 1 / zbus[n, n]) < 1e-9 and np.max(np.abs(voltage - (1 - zbus[:, n] / zbus[n, n]))) < 1e-9
+    assert round(abs(current), 3) == 0.447
+
+    fault_current, fault_voltage = circuit1.fault_sweep(chunk_size=3)  # several chunks of solves
+    circuit1.modify_y_bus()
+    assert np.allclose(circuit1.fault_sweep(chunk_size=3)[0], fault_current)  # the generators are added only once
+    zbus = np.linalg.inv(circuit1.fault_ybus().toarray())
+    for k, bus in enumerate(circuit1.bus_order):
+        current, voltage = circuit1.calculate_fault(bus)
+        assert abs(fault_current[k] - current) < 1e-9 and np.max(np.abs(fault_voltage[k] - voltage)) < 1e-9
+        assert abs(fault_current[k] - 1 / zbus[k, k]) < 1e-9
+        assert np.max(np.abs(fault_voltage[k] - (1 - zbus[:, k] / zbus[k, k]))) < 1e-9
+    print(f"{'sparse' if sparse else 'dense'}: three-phase fault currents "
+          + ", ".join(f"{bus} {abs(i):.3f}" for bus, i in zip(circuit1.bus_order, fault_current)))
+
+    # a subset of buses gives the same rows
+    subset = ["Bus5", "Bus2"]
+    current, voltage = circuit1.fault_sweep(subset)
+    rows = [circuit1.bus_indices[bus] for bus in subset]
+    assert np.allclose(current, fault_current[rows]) and np.allclose(voltage, fault_voltage[rows])
+
+    # asymmetrical faults: the sweep over every bus, fault type and fault impedance against
+    # calculate_asym_fault called for each combination
+    fault_types = ("slg", "ll", "dlg")
+    impedances = (0.0, 0.05j)
+    I_abc, I_seq = circuit1.asym_fault_sweep(fault_types=fault_types, Zf=impedances)
+    assert I_abc.shape == (len(circuit1.bus_order), len(fault_types), len(impedances), 3)
+    Z0, Z1, Z2 = circuit1.sequence_thevenin()
+    for k, bus in enumerate(circuit1.bus_order):
+        assert abs(Z0[k] - 1 / ybus_array(circuit1.zero_ybus)[k, k]) < 1e-12
+        assert abs(Z2[k] - 1 / ybus_array(circuit1.negative_ybus)[k, k]) < 1e-12
+        for t, fault_type in enumerate(fault_types):
+            for z, Zf in enumerate(impedances):
+                phase, sequence = circuit1.calculate_asym_fault(fault_type, bus, Zf)
+                assert np.max(np.abs(I_abc[k, t, z] - [phase["Ia"], phase["Ib"], phase["Ic"]])) < 1e-9
+                assert np.max(np.abs(I_seq[k, t, z] - sequence)) < 1e-9
+    print(f"{'sparse' if sparse else 'dense'}: SLG fault currents "
+          + ", ".join(f"{bus} {abs(i):.3f}" for bus, i in zip(circuit1.bus_order, I_abc[:, 0, 0, 0])))
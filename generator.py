@@ -5,14 +5,20 @@ from settings import Settings
 #initialize a generator object
 class Generator:
     #all impedance inputs are to be given in P.U.
-    def __init__(self, name: str, bus: Bus, mw_setpoint: float, voltage_setpoint: float,subtransient_x: float,z_zero: float, z_negative: float, ground_z: float, is_grounded: str):
+    #mva_base is the machine base the reactances are given on; it defaults to the MW setpoint
+    #the sequence admittances are kept as scalars; zero_yprim and negative_yprim are built from them on demand
+    __slots__ = ("name", "bus", "voltage_setpoint", "mw_setpoint", "mva_base", "subtransient_x", "sub_admittance",
+                 "ground_status", "z_negative", "z_zero", "ground_z", "z_zero_total", "y_zero", "y_negative")
+
+    def __init__(self, name: str, bus: Bus, mw_setpoint: float, voltage_setpoint: float,subtransient_x: float,z_zero: float, z_negative: float, ground_z: float, is_grounded: str, mva_base: float = None):
         self.name = name
         self.bus = bus
         self.voltage_setpoint = voltage_setpoint
         self.mw_setpoint = mw_setpoint
+        self.mva_base = mva_base if mva_base is not None else mw_setpoint
 
 
-        self.subtransient_x=1j*subtransient_x*(Settings.base_power/self.mw_setpoint) #change the base of the subtransient reactance
+        self.subtransient_x=1j*subtransient_x*(Settings.base_power/self.mva_base) #change the base of the subtransient reactance
             #subtransient is also positive sequence admittance??????
         self.sub_admittance=1/self.subtransient_x #
         self.ground_status = is_grounded
@@ -20,7 +26,7 @@ class Generator:
         if self.bus.bus_type == 'slack' or self.bus.bus_type == 'PV':
             self.z_negative = 1j * 1.0  # force X2 = 1.0 on slack
         else:
-            self.z_negative = 1j * z_negative * (Settings.base_power / self.mw_setpoint)
+            self.z_negative = 1j * z_negative * (Settings.base_power / self.mva_base)
 
         if self.bus.bus_type == "slack" or self.bus.bus_type == "PV":
             self.z_zero = 1j * 1.0
@@ -39,11 +45,16 @@ class Generator:
 
         #calculate the negative sequence admittance
         self.y_negative = 1/self.z_negative
-
-        self.zero_yprim = self.calc_y_matrix(self.y_zero)
-        self.negative_yprim = self.calc_y_matrix(self.y_negative)
         #is there a positive sequence yprim??!?
 
+    @property
+    def zero_yprim(self):
+        return self.calc_y_matrix(self.y_zero)
+
+    @property
+    def negative_yprim(self):
+        return self.calc_y_matrix(self.y_negative)
+
 
     def calc_y_matrix(self,y):
         y_matrix = np.zeros((1,1), dtype=complex) # initializing a 2x2 matrix of zeros
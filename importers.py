@@ -0,0 +1,240 @@
+from circuit import Circuit
+from settings import Settings
+import csv
+import re
+import numpy as np
+
+#readers for standard power flow case files: MATPOWER (.m), IEEE Common Data Format and PSS/E RAW (v33)
+#every reader converts its file into MATPOWER-style bus/gen/branch tables, and build_circuit creates the whole
+#Circuit from those arrays with the bulk add_* methods, so the Ybus is only assembled once on first use
+#branch data is used in per-unit as given (Conductor/Bundle/Geometry are not involved); a branch with an
+#off-nominal tap or a phase shift becomes a Transformer, every other branch a TransmissionLine
+#elements are named like the hand-built cases: Bus<number>, Line <k>, T<k>, Load <bus>, Generator <k>, Shunt <bus>
+#case data without an equivalent here is not used: generator Q limits, voltage limits, areas and zones,
+#and the zero/negative sequence data (generators get a default subtransient reactance on their own base)
+
+# MATPOWER column positions
+BUS_I, BUS_TYPE, PD, QD, GS, BS, VM, VA, BASE_KV = 0, 1, 2, 3, 4, 5, 7, 8, 9
+GEN_BUS, PG, QG, VG, MBASE, GEN_STATUS = 0, 1, 2, 5, 6, 7
+F_BUS, T_BUS, BR_R, BR_X, BR_B, RATE_A, TAP, SHIFT, BR_STATUS = 0, 1, 2, 3, 4, 5, 8, 9, 10
+
+
+def build_circuit(name, base_mva, bus, gen, branch, sparse=False, flat_start=False, subtransient_x=0.2):
+    """Create a Circuit from MATPOWER-style bus, gen and branch tables.
+
+    Per-unit data on base_mva is converted to Settings.base_power. Isolated buses (type 4) and
+    out-of-service generators and branches are left out. The bus voltages start from the case
+    values (setpoints at generator buses) unless flat_start is set.
+    """
+    bus = np.atleast_2d(np.asarray(bus, dtype=float))
+    gen = np.asarray(gen, dtype=float).reshape(-1, np.shape(gen)[-1] if np.size(gen) else GEN_STATUS + 1)
+    branch = np.atleast_2d(np.asarray(branch, dtype=float))
+    z_scale = Settings.base_power / base_mva  # per-unit impedance on base_mva -> on the system base
+
+    bus = bus[bus[:, BUS_TYPE] != 4]
+    numbers = bus[:, BUS_I].astype(int)
+    in_service = set(numbers)
+    gen = gen[(gen[:, GEN_STATUS] > 0) & np.isin(gen[:, GEN_BUS].astype(int), numbers)]
+    branch = branch[(branch[:, BR_STATUS] > 0) & np.isin(branch[:, F_BUS].astype(int), numbers)
+                    & np.isin(branch[:, T_BUS].astype(int), numbers)]
+    bus_name = {number: f"Bus{number}" for number in in_service}
+
+    # bus types: slack as given, PV only where a generator is still in service
+    gen_buses = set(gen[:, GEN_BUS].astype(int))
+    bus_types = ["slack" if code == 3 else "PV" if code == 2 and number in gen_buses else "PQ"
+                 for number, code in zip(numbers, bus[:, BUS_TYPE])]
+    if "slack" not in bus_types:
+        raise ValueError("Case has no slack bus")
+    vpu = bus[:, VM].copy()
+    delta = bus[:, VA].copy()
+    row_of = {number: k for k, number in enumerate(numbers)}
+    for gen_bus, v_set in zip(gen[:, GEN_BUS].astype(int), gen[:, VG]):
+        if bus_types[row_of[gen_bus]] != "PQ":
+            vpu[row_of[gen_bus]] = v_set
+    if flat_start:
+        vpu[[k for k, bus_type in enumerate(bus_types) if bus_type == "PQ"]] = 1.0
+        delta[:] = 0.0
+
+    circuit = Circuit(name, sparse)
+    circuit.add_buses([bus_name[number] for number in numbers], bus[:, BASE_KV], bus_types, vpu, delta)
+
+    # branches: a nonzero tap ratio or a phase shift makes a transformer
+    from_names = [bus_name[number] for number in branch[:, F_BUS].astype(int)]
+    to_names = [bus_name[number] for number in branch[:, T_BUS].astype(int)]
+    rating = np.where(branch[:, RATE_A] > 0, branch[:, RATE_A], np.inf)
+    is_transformer = (branch[:, TAP] != 0) | (branch[:, SHIFT] != 0)
+    lines = np.flatnonzero(~is_transformer)
+    transformers = np.flatnonzero(is_transformer)
+    circuit.add_lines_per_unit([f"Line {k + 1}" for k in range(len(lines))], [from_names[k] for k in lines],
+                               [to_names[k] for k in lines], branch[lines, BR_R] * z_scale,
+                               branch[lines, BR_X] * z_scale, branch[lines, BR_B] / z_scale, rating[lines])
+    tap = np.where(branch[transformers, TAP] != 0, branch[transformers, TAP], 1.0)
+    circuit.add_transformers_per_unit([f"T{k + 1}" for k in range(len(transformers))],
+                                      [from_names[k] for k in transformers], [to_names[k] for k in transformers],
+                                      branch[transformers, BR_R] * z_scale, branch[transformers, BR_X] * z_scale,
+                                      branch[transformers, BR_B] / z_scale, tap, branch[transformers, SHIFT],
+                                      rating[transformers])
+
+    # bus shunts are given in MW/Mvar at 1 pu
+    shunts = np.flatnonzero((bus[:, GS] != 0) | (bus[:, BS] != 0))
+    circuit.add_shunts_per_unit([f"Shunt {numbers[k]}" for k in shunts], [bus_name[numbers[k]] for k in shunts],
+                                (bus[shunts, GS] + 1j * bus[shunts, BS]) / Settings.base_power)
+
+    loads = np.flatnonzero((bus[:, PD] != 0) | (bus[:, QD] != 0))
+    circuit.add_loads([f"Load {numbers[k]}" for k in loads], [bus_name[numbers[k]] for k in loads],
+                      bus[loads, PD], bus[loads, QD])
+
+    mva_base = np.where(gen[:, MBASE] > 0, gen[:, MBASE], base_mva)
+    circuit.add_generators([f"Generator {k + 1}" for k in range(len(gen))],
+                           [bus_name[number] for number in gen[:, GEN_BUS].astype(int)], gen[:, PG], gen[:, VG],
+                           mva_base, subtransient_x)
+    # a generator at a PQ bus does not regulate the voltage, so it injects the Qg of the case
+    pq_gen = np.array([bus_types[row_of[number]] == "PQ" for number in gen[:, GEN_BUS].astype(int)], dtype=bool)
+    gen_idx = np.array([circuit.bus_indices[bus_name[number]] for number in gen[pq_gen, GEN_BUS].astype(int)],
+                       dtype=int)
+    np.add.at(circuit.bus_state.q_sched, gen_idx, gen[pq_gen, QG])
+    return circuit
+
+
+def read_matpower(path, name=None, **kwargs):
+    # MATPOWER case file (.m): mpc.baseMVA, mpc.bus, mpc.gen and mpc.branch
+    with open(path) as file:
+        text = re.sub(r"%.*", "", file.read())
+
+    def matrix(field):
+        match = re.search(rf"mpc\.{field}\s*=\s*\[(.*?)\]", text, re.S)
+        if match is None:
+            raise ValueError(f"mpc.{field} not found in {path}")
+        rows = [row.replace(",", " ").split() for row in re.split(r"[;\n]", match.group(1))]
+        return np.array([[float(value) for value in row] for row in rows if row])
+
+    base_mva = float(re.search(r"mpc\.baseMVA\s*=\s*([-+.\deE]+)", text).group(1))
+    return build_circuit(name or path, base_mva, matrix("bus"), matrix("gen"), matrix("branch"), **kwargs)
+
+
+def read_ieee_cdf(path, name=None, **kwargs):
+    # IEEE Common Data Format: the bus name occupies fixed columns 6-17, every other field is whitespace separated
+    with open(path) as file:
+        lines = file.read().splitlines()
+    base_mva = float(lines[0][31:37])
+    bus, gen, branch = [], [], []
+    section = None
+    for line in lines[1:]:
+        if line.startswith("BUS DATA FOLLOWS"):
+            section = "bus"
+            continue
+        if line.startswith("BRANCH DATA FOLLOWS"):
+            section = "branch"
+            continue
+        if line.strip().startswith("-99"):
+            section = None
+            continue
+        if section == "bus":
+            fields = line[18:].split()
+            number = int(line[:4])
+            (area, zone, code, vm, va, pl, ql, pg, qg, base_kv, v_desired,
+             v_max, v_min, g, b) = [float(value) for value in fields[:15]]
+            bus_type = {0: 1, 1: 1, 2: 2, 3: 3}[int(code)]
+            bus.append([number, bus_type, pl, ql, g * base_mva, b * base_mva, area, vm, va, base_kv, zone, 0, 0])
+            if bus_type != 1 or pg != 0 or qg != 0:
+                v_set = v_desired if v_desired > 0 else vm
+                gen.append([number, pg, qg, 0, 0, v_set, base_mva, 1])
+        elif section == "branch":
+            fields = line.split()
+            f_bus, t_bus = int(fields[0]), int(fields[1])
+            r, x, b, rate_a = (float(value) for value in fields[6:10])
+            tap, shift = float(fields[14]), float(fields[15])
+            branch.append([f_bus, t_bus, r, x, b, rate_a, 0, 0, tap, shift, 1])
+    return build_circuit(name or path, base_mva, bus, gen, branch, **kwargs)
+
+
+def read_psse_raw(path, name=None, **kwargs):
+    # PSS/E RAW version 33: case identification, then bus, load, fixed shunt, generator, branch and
+    # transformer records, each block ended by a record starting with 0; later blocks are not used
+    with open(path) as file:
+        lines = file.read().splitlines()
+
+    def records(block):
+        # comma separated fields with quoted strings, text after a '/' outside quotes is a comment
+        reader = csv.reader(block, quotechar="'", skipinitialspace=True)
+        rows = []
+        for row in reader:
+            fields = []
+            for field in row:
+                if "/" in field and not field.startswith("'"):
+                    field = field.split("/")[0]
+                    if field.strip():
+                        fields.append(field.strip())
+                    break
+                fields.append(field.strip())
+            rows.append(fields)
+        return rows
+
+    header = records(lines[:1])[0]
+    base_mva = float(header[1])
+    blocks = [[]]
+    for line in lines[3:]:
+        if re.match(r"^\s*0\s*(/.*)?$", line) or line.strip().startswith("Q"):
+            blocks.append([])
+            if line.strip().startswith("Q"):
+                break
+            continue
+        blocks[-1].append(line)
+    bus_block, load_block, shunt_block, gen_block, branch_block, transformer_block = (blocks + [[]] * 6)[:6]
+
+    bus = []
+    base_kv = {}
+    for fields in records(bus_block):
+        number, kv, code = int(fields[0]), float(fields[2]), int(fields[3])
+        base_kv[number] = kv
+        bus.append([number, code, 0, 0, 0, 0, int(fields[4]), float(fields[7]), float(fields[8]), kv,
+                    int(fields[5]), 0, 0])
+    row_of = {int(row[0]): k for k, row in enumerate(bus)}
+    for fields in records(load_block):  # constant power, current and admittance parts all taken at 1 pu
+        if int(fields[2]) == 1:
+            row = bus[row_of[int(fields[0])]]
+            row[PD] += float(fields[5]) + float(fields[7]) + float(fields[9])
+            row[QD] += float(fields[6]) + float(fields[8]) - float(fields[10])
+    for fields in records(shunt_block):
+        if int(fields[2]) == 1:
+            row = bus[row_of[int(fields[0])]]
+            row[GS] += float(fields[3])
+            row[BS] += float(fields[4])
+
+    gen = []
+    for fields in records(gen_block):
+        gen.append([int(fields[0]), float(fields[2]), float(fields[3]), 0, 0, float(fields[6]), float(fields[8]),
+                    int(fields[14])])
+
+    branch = []
+    for fields in records(branch_block):
+        branch.append([int(fields[0]), abs(int(fields[1])), float(fields[3]), float(fields[4]), float(fields[5]),
+                       float(fields[6]), 0, 0, 0, 0, int(fields[13])])
+
+    transformer_rows = records(transformer_block)
+    k = 0
+    while k < len(transformer_rows):
+        first = transformer_rows[k]
+        if int(first[2]) != 0:
+            raise ValueError("Three-winding transformers are not supported")
+        i, j = int(first[0]), int(first[1])
+        cw, cz, status = int(first[4]), int(first[5]), int(first[11])
+        r, x, sbase = (float(value) for value in transformer_rows[k + 1][:3])
+        windv1, nomv1, angle, rate_a = (float(value) for value in transformer_rows[k + 2][:4])
+        windv2, nomv2 = (float(value) for value in transformer_rows[k + 3][:2])
+        k += 4
+
+        # impedance on the winding base (cz 2) or as load loss in W and |Z| (cz 3) -> system base
+        if cz == 3:
+            r = r / 1e6 / sbase
+            x = np.sqrt(max(x ** 2 - r ** 2, 0.0))
+        if cz in (2, 3):
+            r, x = r * base_mva / sbase, x * base_mva / sbase
+        # winding voltages in kV (cw 2) or per-unit of the nominal winding voltage (cw 3) -> per-unit of the bus base
+        if cw == 2:
+            windv1, windv2 = windv1 / base_kv[i], windv2 / base_kv[j]
+        elif cw == 3:
+            windv1 *= (nomv1 or base_kv[i]) / base_kv[i]
+            windv2 *= (nomv2 or base_kv[j]) / base_kv[j]
+        branch.append([i, j, r, x, 0, rate_a, 0, 0, windv1 / windv2, angle, status])
+    return build_circuit(name or path, base_mva, bus, gen, branch, **kwargs)
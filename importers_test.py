@@ -0,0 +1,230 @@
+from importers import read_matpower, read_ieee_cdf, read_psse_raw
+from jacobian import Jacobian
+from power_flow import Power_Flow
+from settings import Settings
+import numpy as np
+import os
+import tempfile
+
+# IEEE 14-bus case in MATPOWER format, with the solved voltages stored in Vm/Va
+CASE14 = """function mpc = case14
+%CASE14    Power flow data for IEEE 14 bus test case.
+mpc.version = '2';
+mpc.baseMVA = 100;
+%% bus data
+%	bus_i	type	Pd	Qd	Gs	Bs	area	Vm	Va	baseKV	zone	Vmax	Vmin
+mpc.bus = [
+	1	3	0	0	0	0	1	1.06	0	0	1	1.06	0.94;
+	2	2	21.7	12.7	0	0	1	1.045	-4.98	0	1	1.06	0.94;
+	3	2	94.2	19	0	0	1	1.01	-12.72	0	1	1.06	0.94;
+	4	1	47.8	-3.9	0	0	1	1.019	-10.33	0	1	1.06	0.94;
+	5	1	7.6	1.6	0	0	1	1.02	-8.78	0	1	1.06	0.94;
+	6	2	11.2	7.5	0	0	1	1.07	-14.22	0	1	1.06	0.94;
+	7	1	0	0	0	0	1	1.062	-13.37	0	1	1.06	0.94;
+	8	2	0	0	0	0	1	1.09	-13.36	0	1	1.06	0.94;
+	9	1	29.5	16.6	0	19	1	1.056	-14.94	0	1	1.06	0.94;
+	10	1	9	5.8	0	0	1	1.051	-15.1	0	1	1.06	0.94;
+	11	1	3.5	1.8	0	0	1	1.057	-14.79	0	1	1.06	0.94;
+	12	1	6.1	1.6	0	0	1	1.055	-15.07	0	1	1.06	0.94;
+	13	1	13.5	5.8	0	0	1	1.05	-15.16	0	1	1.06	0.94;
+	14	1	14.9	5	0	0	1	1.036	-16.04	0	1	1.06	0.94;
+];
+%% generator data
+mpc.gen = [
+	1	232.4	-16.9	10	0	1.06	100	1	332.4	0	0	0	0	0	0	0	0	0	0	0	0;
+	2	40	42.4	50	-40	1.045	100	1	140	0	0	0	0	0	0	0	0	0	0	0	0;
+	3	0	23.4	40	0	1.01	100	1	100	0	0	0	0	0	0	0	0	0	0	0	0;
+	6	0	12.2	24	-6	1.07	100	1	100	0	0	0	0	0	0	0	0	0	0	0	0;
+	8	0	17.4	24	-6	1.09	100	1	100	0	0	0	0	0	0	0	0	0	0	0	0;
+];
+%% branch data
+mpc.branch = [
+	1	2	0.01938	0.05917	0.0528	0	0	0	0	0	1	-360	360;
+	1	5	0.05403	0.22304	0.0492	0	0	0	0	0	1	-360	360;
+	2	3	0.04699	0.19797	0.0438	0	0	0	0	0	1	-360	360;
+	2	4	0.05811	0.17632	0.034	0	0	0	0	0	1	-360	360;
+	2	5	0.05695	0.17388	0.0346	0	0	0	0	0	1	-360	360;
+	3	4	0.06701	0.17103	0.0128	0	0	0	0	0	1	-360	360;
+	4	5	0.01335	0.04211	0	0	0	0	0	0	1	-360	360;
+	4	7	0	0.20912	0	0	0	0	0.978	0	1	-360	360;
+	4	9	0	0.55618	0	0	0	0	0.969	0	1	-360	360;
+	5	6	0	0.25202	0	0	0	0	0.932	0	1	-360	360;
+	6	11	0.09498	0.1989	0	0	0	0	0	0	1	-360	360;
+	6	12	0.12291	0.25581	0	0	0	0	0	0	1	-360	360;
+	6	13	0.06615	0.13027	0	0	0	0	0	0	1	-360	360;
+	7	8	0	0.17615	0	0	0	0	0	0	1	-360	360;
+	7	9	0	0.11001	0	0	0	0	0	0	1	-360	360;
+	9	10	0.03181	0.0845	0	0	0	0	0	0	1	-360	360;
+	9	14	0.12711	0.27038	0	0	0	0	0	0	1	-360	360;
+	10	11	0.08205	0.19207	0	0	0	0	0	0	1	-360	360;
+	12	13	0.22092	0.19988	0	0	0	0	0	0	1	-360	360;
+	13	14	0.17093	0.34802	0	0	0	0	0	0	1	-360	360;
+];
+"""
+
+# the same case in IEEE Common Data Format; the synchronous condenser at bus 3 is entered as a load bus (type 0)
+# holding its solved 23.4 Mvar, so a generator at a PQ bus is read and the published solution still holds
+CASE14_CDF = """ 08/19/93 UW ARCHIVE           100.0  1962 W IEEE 14 Bus Test Case
+BUS DATA FOLLOWS                            14 ITEMS
+   1 Bus 1         1  1  3 1.060    0.00      0.0      0.0    232.4   -16.9   132.0  1.060    10.0     0.0  0.00   0.00    0
+   2 Bus 2         1  1  2 1.045   -4.98     21.7     12.7     40.0    42.4   132.0  1.045    50.0   -40.0  0.00   0.00    0
+   3 Bus 3         1  1  0 1.010  -12.72     94.2     19.0      0.0    23.4   132.0  1.010    40.0     0.0  0.00   0.00    0
+   4 Bus 4         1  1  0 1.019  -10.33     47.8     -3.9      0.0     0.0   132.0  0.000     0.0     0.0  0.00   0.00    0
+   5 Bus 5         1  1  0 1.020   -8.78      7.6      1.6      0.0     0.0   132.0  0.000     0.0     0.0  0.00   0.00    0
+   6 Bus 6         1  1  2 1.070  -14.22     11.2      7.5      0.0    12.2    33.0  1.070    24.0    -6.0  0.00   0.00    0
+   7 Bus 7         1  1  0 1.062  -13.37      0.0      0.0      0.0     0.0     1.0  0.000     0.0     0.0  0.00   0.00    0
+   8 Bus 8         1  1  2 1.090  -13.36      0.0      0.0      0.0    17.4    18.0  1.090    24.0    -6.0  0.00   0.00    0
+   9 Bus 9         1  1  0 1.056  -14.94     29.5     16.6      0.0     0.0    33.0  0.000     0.0     0.0  0.00   0.19    0
+  10 Bus 10        1  1  0 1.051  -15.10      9.0      5.8      0.0     0.0    33.0  0.000     0.0     0.0  0.00   0.00    0
+  11 Bus 11        1  1  0 1.057  -14.79      3.5      1.8      0.0     0.0    33.0  0.000     0.0     0.0  0.00   0.00    0
+  12 Bus 12        1  1  0 1.055  -15.07      6.1      1.6      0.0     0.0    33.0  0.000     0.0     0.0  0.00   0.00    0
+  13 Bus 13        1  1  0 1.050  -15.16     13.5      5.8      0.0     0.0    33.0  0.000     0.0     0.0  0.00   0.00    0
+  14 Bus 14        1  1  0 1.036  -16.04     14.9      5.0      0.0     0.0    33.0  0.000     0.0     0.0  0.00   0.00    0
+-999
+BRANCH DATA FOLLOWS                         20 ITEMS
+   1    2  1  1 1 0   0.01938   0.05917    0.0528     0     0     0    0 0  0.000   0.0 0.0 0.0 0.0 0.0 0.0
+   1    5  1  1 1 0   0.05403   0.22304    0.0492     0     0     0    0 0  0.000   0.0 0.0 0.0 0.0 0.0 0.0
+   2    3  1  1 1 0   0.04699   0.19797    0.0438     0     0     0    0 0  0.000   0.0 0.0 0.0 0.0 0.0 0.0
+   2    4  1  1 1 0   0.05811   0.17632    0.0340     0     0     0    0 0  0.000   0.0 0.0 0.0 0.0 0.0 0.0
+   2    5  1  1 1 0   0.05695   0.17388    0.0346     0     0     0    0 0  0.000   0.0 0.0 0.0 0.0 0.0 0.0
+   3    4  1  1 1 0   0.06701   0.17103    0.0128     0     0     0    0 0  0.000   0.0 0.0 0.0 0.0 0.0 0.0
+   4    5  1  1 1 0   0.01335   0.04211    0.0000     0     0     0    0 0  0.000   0.0 0.0 0.0 0.0 0.0 0.0
+   4    7  1  1 1 1   0.00000   0.20912    0.0000     0     0     0    0 0  0.978   0.0 0.0 0.0 0.0 0.0 0.0
+   4    9  1  1 1 1   0.00000   0.55618    0.0000     0     0     0    0 0  0.969   0.0 0.0 0.0 0.0 0.0 0.0
+   5    6  1  1 1 1   0.00000   0.25202    0.0000     0     0     0    0 0  0.932   0.0 0.0 0.0 0.0 0.0 0.0
+   6   11  1  1 1 0   0.09498   0.19890    0.0000     0     0     0    0 0  0.000   0.0 0.0 0.0 0.0 0.0 0.0
+   6   12  1  1 1 0   0.12291   0.25581    0.0000     0     0     0    0 0  0.000   0.0 0.0 0.0 0.0 0.0 0.0
+   6   13  1  1 1 0   0.06615   0.13027    0.0000     0     0     0    0 0  0.000   0.0 0.0 0.0 0.0 0.0 0.0
+   7    8  1  1 1 0   0.00000   0.17615    0.0000     0     0     0    0 0  0.000   0.0 0.0 0.0 0.0 0.0 0.0
+   7    9  1  1 1 0   0.00000   0.11001    0.0000     0     0     0    0 0  0.000   0.0 0.0 0.0 0.0 0.0 0.0
+   9   10  1  1 1 0   0.03181   0.08450    0.0000     0     0     0    0 0  0.000   0.0 0.0 0.0 0.0 0.0 0.0
+   9   14  1  1 1 0   0.12711   0.27038    0.0000     0     0     0    0 0  0.000   0.0 0.0 0.0 0.0 0.0 0.0
+  10   11  1  1 1 0   0.08205   0.19207    0.0000     0     0     0    0 0  0.000   0.0 0.0 0.0 0.0 0.0 0.0
+  12   13  1  1 1 0   0.22092   0.19988    0.0000     0     0     0    0 0  0.000   0.0 0.0 0.0 0.0 0.0 0.0
+  13   14  1  1 1 0   0.17093   0.34802    0.0000     0     0     0    0 0  0.000   0.0 0.0 0.0 0.0 0.0 0.0
+-999
+END OF DATA
+"""
+
+# the same case as a PSS/E v33 RAW file, with the tap-changing branches as two-winding transformer records
+CASE14_RAW = """0,   100.00, 33, 0, 1, 60.00     / PSS(R)E-33
+IEEE 14-BUS TEST CASE
+SOLVED VOLTAGES IN VM/VA
+    1,'BUS1        ', 132.0000,3,   1,   1,   1,1.06000,   0.0000,1.10000,0.90000,1.10000,0.90000
+    2,'BUS2        ', 132.0000,2,   1,   1,   1,1.04500,  -4.9800,1.10000,0.90000,1.10000,0.90000
+    3,'BUS3        ', 132.0000,2,   1,   1,   1,1.01000, -12.7200,1.10000,0.90000,1.10000,0.90000
+    4,'BUS4        ', 132.0000,1,   1,   1,   1,1.01900, -10.3300,1.10000,0.90000,1.10000,0.90000
+    5,'BUS5        ', 132.0000,1,   1,   1,   1,1.02000,  -8.7800,1.10000,0.90000,1.10000,0.90000
+    6,'BUS6        ',  33.0000,2,   1,   1,   1,1.07000, -14.2200,1.10000,0.90000,1.10000,0.90000
+    7,'BUS7        ',   1.0000,1,   1,   1,   1,1.06200, -13.3700,1.10000,0.90000,1.10000,0.90000
+    8,'BUS8        ',  18.0000,2,   1,   1,   1,1.09000, -13.3600,1.10000,0.90000,1.10000,0.90000
+    9,'BUS9        ',  33.0000,1,   1,   1,   1,1.05600, -14.9400,1.10000,0.90000,1.10000,0.90000
+   10,'BUS10       ',  33.0000,1,   1,   1,   1,1.05100, -15.1000,1.10000,0.90000,1.10000,0.90000
+   11,'BUS11       ',  33.0000,1,   1,   1,   1,1.05700, -14.7900,1.10000,0.90000,1.10000,0.90000
+   12,'BUS12       ',  33.0000,1,   1,   1,   1,1.05500, -15.0700,1.10000,0.90000,1.10000,0.90000
+   13,'BUS13       ',  33.0000,1,   1,   1,   1,1.05000, -15.1600,1.10000,0.90000,1.10000,0.90000
+   14,'BUS14       ',  33.0000,1,   1,   1,   1,1.03600, -16.0400,1.10000,0.90000,1.10000,0.90000
+0 / END OF BUS DATA, BEGIN LOAD DATA
+    2,'1 ',1,   1,   1,    21.700,    12.700,     0.000,     0.000,     0.000,     0.000,   1,1,0
+    3,'1 ',1,   1,   1,    94.200,    19.000,     0.000,     0.000,     0.000,     0.000,   1,1,0
+    4,'1 ',1,   1,   1,    47.800,    -3.900,     0.000,     0.000,     0.000,     0.000,   1,1,0
+    5,'1 ',1,   1,   1,     7.600,     1.600,     0.000,     0.000,     0.000,     0.000,   1,1,0
+    6,'1 ',1,   1,   1,    11.200,     7.500,     0.000,     0.000,     0.000,     0.000,   1,1,0
+    9,'1 ',1,   1,   1,    29.500,    16.600,     0.000,     0.000,     0.000,     0.000,   1,1,0
+   10,'1 ',1,   1,   1,     9.000,     5.800,     0.000,     0.000,     0.000,     0.000,   1,1,0
+   11,'1 ',1,   1,   1,     3.500,     1.800,     0.000,     0.000,     0.000,     0.000,   1,1,0
+   12,'1 ',1,   1,   1,     6.100,     1.600,     0.000,     0.000,     0.000,     0.000,   1,1,0
+   13,'1 ',1,   1,   1,    13.500,     5.800,     0.000,     0.000,     0.000,     0.000,   1,1,0
+   14,'1 ',1,   1,   1,    14.900,     5.000,     0.000,     0.000,     0.000,     0.000,   1,1,0
+0 / END OF LOAD DATA, BEGIN FIXED SHUNT DATA
+    9,'1 ',1,     0.000,    19.000
+0 / END OF FIXED SHUNT DATA, BEGIN GENERATOR DATA
+    1,'1 ',   232.400,   -16.900,    10.000,     0.000,1.06000,     0,   100.000, 0.00000E+0, 1.00000E+0, 0.00000E+0, 0.00000E+0,1.00000,1,  100.0,   332.400,     0.000,   1,1.0000
+    2,'1 ',    40.000,    42.400,    50.000,   -40.000,1.04500,     0,   100.000, 0.00000E+0, 1.00000E+0, 0.00000E+0, 0.00000E+0,1.00000,1,  100.0,   140.000,     0.000,   1,1.0000
+    3,'1 ',     0.000,    23.400,    40.000,     0.000,1.01000,     0,   100.000, 0.00000E+0, 1.00000E+0, 0.00000E+0, 0.00000E+0,1.00000,1,  100.0,   100.000,     0.000,   1,1.0000
+    6,'1 ',     0.000,    12.200,    24.000,    -6.000,1.07000,     0,   100.000, 0.00000E+0, 1.00000E+0, 0.00000E+0, 0.00000E+0,1.00000,1,  100.0,   100.000,     0.000,   1,1.0000
+    8,'1 ',     0.000,    17.400,    24.000,    -6.000,1.09000,     0,   100.000, 0.00000E+0, 1.00000E+0, 0.00000E+0, 0.00000E+0,1.00000,1,  100.0,   100.000,     0.000,   1,1.0000
+0 / END OF GENERATOR DATA, BEGIN BRANCH DATA
+    1,     2,'1 ',   0.01938,   0.05917,  0.05280,    0.00,    0.00,    0.00,  0.00000,  0.00000,  0.00000,  0.00000,1,1,   0.00,   1,1.0000
+    1,     5,'1 ',   0.05403,   0.22304,  0.04920,    0.00,    0.00,    0.00,  0.00000,  0.00000,  0.00000,  0.00000,1,1,   0.00,   1,1.0000
+    2,     3,'1 ',   0.04699,   0.19797,  0.04380,    0.00,    0.00,    0.00,  0.00000,  0.00000,  0.00000,  0.00000,1,1,   0.00,   1,1.0000
+    2,     4,'1 ',   0.05811,   0.17632,  0.03400,    0.00,    0.00,    0.00,  0.00000,  0.00000,  0.00000,  0.00000,1,1,   0.00,   1,1.0000
+    2,     5,'1 ',   0.05695,   0.17388,  0.03460,    0.00,    0.00,    0.00,  0.00000,  0.00000,  0.00000,  0.00000,1,1,   0.00,   1,1.0000
+    3,     4,'1 ',   0.06701,   0.17103,  0.01280,    0.00,    0.00,    0.00,  0.00000,  0.00000,  0.00000,  0.00000,1,1,   0.00,   1,1.0000
+    4,     5,'1 ',   0.01335,   0.04211,  0.00000,    0.00,    0.00,    0.00,  0.00000,  0.00000,  0.00000,  0.00000,1,1,   0.00,   1,1.0000
+    6,    11,'1 ',   0.09498,   0.19890,  0.00000,    0.00,    0.00,    0.00,  0.00000,  0.00000,  0.00000,  0.00000,1,1,   0.00,   1,1.0000
+    6,    12,'1 ',   0.12291,   0.25581,  0.00000,    0.00,    0.00,    0.00,  0.00000,  0.00000,  0.00000,  0.00000,1,1,   0.00,   1,1.0000
+    6,    13,'1 ',   0.06615,   0.13027,  0.00000,    0.00,    0.00,    0.00,  0.00000,  0.00000,  0.00000,  0.00000,1,1,   0.00,   1,1.0000
+    7,     8,'1 ',   0.00000,   0.17615,  0.00000,    0.00,    0.00,    0.00,  0.00000,  0.00000,  0.00000,  0.00000,1,1,   0.00,   1,1.0000
+    7,     9,'1 ',   0.00000,   0.11001,  0.00000,    0.00,    0.00,    0.00,  0.00000,  0.00000,  0.00000,  0.00000,1,1,   0.00,   1,1.0000
+    9,    10,'1 ',   0.03181,   0.08450,  0.00000,    0.00,    0.00,    0.00,  0.00000,  0.00000,  0.00000,  0.00000,1,1,   0.00,   1,1.0000
+    9,    14,'1 ',   0.12711,   0.27038,  0.00000,    0.00,    0.00,    0.00,  0.00000,  0.00000,  0.00000,  0.00000,1,1,   0.00,   1,1.0000
+   10,    11,'1 ',   0.08205,   0.19207,  0.00000,    0.00,    0.00,    0.00,  0.00000,  0.00000,  0.00000,  0.00000,1,1,   0.00,   1,1.0000
+   12,    13,'1 ',   0.22092,   0.19988,  0.00000,    0.00,    0.00,    0.00,  0.00000,  0.00000,  0.00000,  0.00000,1,1,   0.00,   1,1.0000
+   13,    14,'1 ',   0.17093,   0.34802,  0.00000,    0.00,    0.00,    0.00,  0.00000,  0.00000,  0.00000,  0.00000,1,1,   0.00,   1,1.0000
+0 / END OF BRANCH DATA, BEGIN TRANSFORMER DATA
+    4,     7,     0,'1 ',1,1,1, 0.00000E+0, 0.00000E+0,2,'            ',1,   1,1.0000
+0.00000E+00,2.09120E-01,   100.00
+0.97800,   0.000,   0.000,     0.00,     0.00,     0.00, 0,      0, 1.10000, 0.90000, 1.10000, 0.90000,  33, 0, 0.00000, 0.00000,  0.000
+1.00000,   0.000
+    4,     9,     0,'1 ',1,1,1, 0.00000E+0, 0.00000E+0,2,'            ',1,   1,1.0000
+0.00000E+00,5.56180E-01,   100.00
+0.96900,   0.000,   0.000,     0.00,     0.00,     0.00, 0,      0, 1.10000, 0.90000, 1.10000, 0.90000,  33, 0, 0.00000, 0.00000,  0.000
+1.00000,   0.000
+    5,     6,     0,'1 ',1,1,1, 0.00000E+0, 0.00000E+0,2,'            ',1,   1,1.0000
+0.00000E+00,2.52020E-01,   100.00
+0.93200,   0.000,   0.000,     0.00,     0.00,     0.00, 0,      0, 1.10000, 0.90000, 1.10000, 0.90000,  33, 0, 0.00000, 0.00000,  0.000
+1.00000,   0.000
+0 / END OF TRANSFORMER DATA, BEGIN AREA DATA
+0 / END OF AREA DATA, BEGIN TWO-TERMINAL DC DATA
+Q
+"""
+
+Settings.verbosity = Settings.SUMMARY
+path = os.path.join(tempfile.mkdtemp(), "case14.m")
+with open(path, "w") as file:
+    file.write(CASE14)
+
+circuit1 = read_matpower(path, "IEEE 14", flat_start=True)
+print(f"Lines: {len(circuit1.transmission_lines)}, transformers: {len(circuit1.transformers)}, "
+      f"loads: {len(circuit1.loads)}, generators: {len(circuit1.generators)}")
+
+powerflow = Power_Flow(circuit1, Jacobian(circuit1))
+powerflow.solve(circuit1.buses, circuit1.ybus)
+
+# compare against the published solution (given to 3 decimals in p.u. and 2 decimals in degrees)
+expected = read_matpower(path)
+v_error = np.max(np.abs(circuit1.bus_state.vpu - expected.bus_state.vpu))
+angle_error = np.max(np.abs(np.degrees(circuit1.bus_state.delta) - expected.bus_state.delta))
+print(f"\nMax difference from the case solution: {v_error:.4f} p.u., {angle_error:.3f}°")
+assert powerflow.converged and v_error < 2e-3 and angle_error < 0.02
+
+
+# the IEEE CDF and PSS/E RAW versions of the case reach the same published solution
+Settings.verbosity = Settings.SILENT
+for reader, text in ((read_ieee_cdf, CASE14_CDF), (read_psse_raw, CASE14_RAW)):
+    path = os.path.join(tempfile.mkdtemp(), "case14.txt")
+    with open(path, "w") as file:
+        file.write(text)
+    circuit2 = reader(path, "IEEE 14", flat_start=True)
+    assert (len(circuit2.transmission_lines), len(circuit2.transformers), len(circuit2.generators)) == (17, 3, 5)
+    powerflow = Power_Flow(circuit2, Jacobian(circuit2))
+    powerflow.solve(circuit2.buses, circuit2.ybus)
+    expected = reader(path)
+    v_error = np.max(np.abs(circuit2.bus_state.vpu - expected.bus_state.vpu))
+    angle_error = np.max(np.abs(np.degrees(circuit2.bus_state.delta) - expected.bus_state.delta))
+    print(f"{reader.__name__}: max difference from the case solution: {v_error:.4f} p.u., {angle_error:.3f}°")
+    assert powerflow.converged and v_error < 2e-3 and angle_error < 0.02
+
+# a batch with a name that is already taken is rejected before anything is added
+version = circuit1.topology_version
+for add in (lambda: circuit1.add_lines_per_unit(["Line 99", "Line 1"], ["Bus1", "Bus2"], ["Bus2", "Bus3"], 0.01, 0.1, 0),
+            lambda: circuit1.add_loads(["Load 99", "Load 99"], ["Bus1", "Bus2"], 10, 5),
+            lambda: circuit1.add_generators(["Generator 99", "Generator 1"], ["Bus4", "Bus5"], 10, 1.0, 100)):
+    try:
+        add()
+        raise AssertionError("duplicate name accepted")
+    except ValueError:
+        pass
+assert "Line 99" not in circuit1.transmission_lines and "Load 99" not in circuit1.loads
+assert "Generator 99" not in circuit1.generators and circuit1.topology_version == version
@@ -1,49 +1,112 @@
-from circuit import Circuit
+from circuit import Circuit, ybus_array
+from bus import PQ, PV, SLACK
+from settings import Settings
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
+
+def calc_jacobian_blocks(ybus, voltages, angles, non_slack_idx, pq_idx):
+    """Compute J1..J4 in closed form from dS/dθ and dS/d|V|.
+
+    With V = |V|e^(jθ) and I = Ybus V:
+        dS/dθ   = j diag(V) conj(diag(I) - Ybus diag(V))
+        dS/d|V| = diag(V) conj(Ybus diag(V/|V|)) + conj(diag(I)) diag(V/|V|)
+    J1/J3 are the real/imaginary parts of dS/dθ and J2/J4 those of dS/d|V|, which are the
+    same PowerWorld sign conventions as the element-by-element formulas (positive diagonals).
+    Works on a numpy array or a scipy sparse Ybus; the blocks follow the type of the Ybus.
+    """
+    V = voltages * np.exp(1j * angles)
+    I = ybus @ V
+    V_norm = V / np.abs(V)
+
+    if sp.issparse(ybus):
+        diag_V = sp.diags(V)
+        diag_I = sp.diags(I)
+        diag_V_norm = sp.diags(V_norm)
+        dS_dtheta = (1j * diag_V @ (diag_I - ybus @ diag_V).conj()).tocsr()
+        dS_dV = (diag_V @ (ybus @ diag_V_norm).conj() + diag_I.conj() @ diag_V_norm).tocsr()
+    else:
+        dS_dtheta = 1j * V[:, None] * np.conj(np.diag(I) - ybus * V[None, :])
+        dS_dV = V[:, None] * np.conj(ybus * V_norm[None, :]) + np.diag(np.conj(I) * V_norm)
+
+    dS_dtheta_p = dS_dtheta[non_slack_idx]
+    dS_dtheta_q = dS_dtheta[pq_idx]
+    dS_dV_p = dS_dV[non_slack_idx]
+    dS_dV_q = dS_dV[pq_idx]
+
+    J1 = dS_dtheta_p[:, non_slack_idx].real
+    J2 = dS_dV_p[:, pq_idx].real
+    J3 = dS_dtheta_q[:, non_slack_idx].imag
+    J4 = dS_dV_q[:, pq_idx].imag
+    return J1, J2, J3, J4
+
+
+def calc_jacobian(ybus, voltages, angles, non_slack_idx, pq_idx):
+    """Assemble [[J1, J2], [J3, J4]]; a CSC matrix for a sparse Ybus, a numpy array otherwise."""
+    J1, J2, J3, J4 = calc_jacobian_blocks(ybus, voltages, angles, non_slack_idx, pq_idx)
+    if sp.issparse(ybus):
+        return sp.bmat([[J1, J2], [J3, J4]], format="csc")
+    return np.block([[J1, J2], [J3, J4]])
+
+
+def calc_jacobian_batch(ybus, voltages, angles, non_slack_idx, pq_idx):
+    """Jacobians of K operating points at once, stacked as a (K, M, M) array.
+
+    voltages and angles are (K, N); ybus must be a dense numpy array. Same formulas and block
+    layout as calc_jacobian.
+    """
+    V = voltages * np.exp(1j * angles)
+    I = V @ ybus.T
+    V_norm = V / np.abs(V)
+    eye = np.eye(ybus.shape[0])
+
+    dS_dtheta = 1j * V[:, :, None] * np.conj(I[:, :, None] * eye - ybus[None] * V[:, None, :])
+    dS_dV = V[:, :, None] * np.conj(ybus[None] * V_norm[:, None, :]) + (np.conj(I) * V_norm)[:, :, None] * eye
+
+    J1 = dS_dtheta[:, non_slack_idx][:, :, non_slack_idx].real
+    J2 = dS_dV[:, non_slack_idx][:, :, pq_idx].real
+    J3 = dS_dtheta[:, pq_idx][:, :, non_slack_idx].imag
+    J4 = dS_dV[:, pq_idx][:, :, pq_idx].imag
+    return np.concatenate([np.concatenate([J1, J2], axis=2), np.concatenate([J3, J4], axis=2)], axis=1)
+
 
 class Jacobian:
 
     def __init__(self, circuit: Circuit):
         self.circuit = circuit
         self.buses = circuit.buses
-        self.ybus = circuit.ybus.to_numpy()
+        self.ybus = ybus_array(circuit.ybus)  # numpy array, or scipy sparse matrix for a sparse circuit
         self.bus_order = circuit.bus_order
         self.bus_types = {bus: circuit.buses[bus].bus_type for bus in circuit.bus_order}
+        self.state = circuit.bus_state
+        self.refresh_state()
 
-        voltages_angles = {bus: circuit.get_voltages(self.buses, bus) for bus in self.bus_order}
-        self.voltages = np.array([voltages_angles[bus][0] for bus in self.bus_order])  # vpu
-        if self.circuit.radians == 0:
-            self.angles = np.array([voltages_angles[bus][1] for bus in self.bus_order]) * np.pi /180
-        else:
-            self.angles = np.array([voltages_angles[bus][1] for bus in self.bus_order])
+        # Bus type classification, as Ybus row/column positions in the order used by the Jacobian
+        type_code = self.state.type_code
+        self.slack_idx = np.flatnonzero(type_code == SLACK)[0]
+        self.non_slack_idx = np.flatnonzero(type_code != SLACK)
+        self.pq_idx = np.flatnonzero(type_code == PQ)
+        self.pv_idx = np.flatnonzero(type_code == PV)
 
-        # Bus type classification
-        self.slack_bus = [bus for bus, btype in self.bus_types.items() if btype == "slack"][0]
-        self.pv_buses = [bus for bus, btype in self.bus_types.items() if btype == "PV"]
-        self.pq_buses = [bus for bus, btype in self.bus_types.items() if btype == "PQ"]
-        self.non_slack_buses = [bus for bus in self.bus_order if bus != self.slack_bus]
+        self.slack_bus = self.bus_order[self.slack_idx]
+        self.pv_buses = [self.bus_order[i] for i in self.pv_idx]
+        self.pq_buses = [self.bus_order[i] for i in self.pq_idx]
+        self.non_slack_buses = [self.bus_order[i] for i in self.non_slack_idx]
 
     def refresh_state(self):
-        voltages_angles = {bus: self.circuit.get_voltages(self.buses, bus) for bus in self.bus_order}
-        self.voltages = np.array([voltages_angles[bus][0] for bus in self.bus_order])
+        self.voltages = self.state.vpu.copy()
         if self.circuit.radians == 0:
-            self.angles = np.array([voltages_angles[bus][1] for bus in self.bus_order]) * np.pi / 180  # convert to radians
+            self.angles = self.state.delta * np.pi / 180  # convert to radians
         else:
-            self.angles = np.array([voltages_angles[bus][1] for bus in self.bus_order]) # already in radians
+            self.angles = self.state.delta.copy()  # already in radians
 
     def compute_jacobian(self):
-        """Compute the full Jacobian matrix and return it as a labeled pandas DataFrame."""
-        self.refresh_state()  # ✅ Always use current bus state
-
+        """Compute the full Jacobian matrix and return it as a labeled pandas DataFrame (debug view)."""
         np.set_printoptions(linewidth=np.inf, suppress=True)  # Full width printing
 
-        J1 = self.compute_J1()
-        J2 = self.compute_J2()
-        J3 = self.compute_J3()
-        J4 = self.compute_J4()
-
-        jacobian_matrix = np.block([[J1, J2], [J3, J4]])
+        jacobian_matrix = self.build_jacobian()
+        if sp.issparse(jacobian_matrix):
+            jacobian_matrix = jacobian_matrix.toarray()
 
         # Build row and column labels like PowerWorld
         row_labels = [f"dP({bus})" for bus in self.non_slack_buses] + [f"dQ({bus})" for bus in self.pq_buses]
@@ -51,6 +114,21 @@ class Jacobian:
         jacobian_df = pd.DataFrame(jacobian_matrix, index=row_labels, columns=col_labels)
         return jacobian_df
 
+    def build_jacobian(self):
+        """Compute the full Jacobian matrix from the current bus state.
+
+        Returns a numpy array, or a scipy CSC matrix when the circuit Ybus is sparse.
+        """
+        with Settings.telemetry.stage("jacobian.build"):
+            self.refresh_state()  # ✅ Always use current bus state
+            return calc_jacobian(self.ybus, self.voltages, self.angles, self.non_slack_idx, self.pq_idx)
+
+    def compute_blocks(self):
+        """Return the J1..J4 sub-blocks (dP/dδ, dP/dV, dQ/dδ, dQ/dV) of the current Jacobian."""
+        with Settings.telemetry.stage("jacobian.blocks"):
+            self.refresh_state()
+            return calc_jacobian_blocks(self.ybus, self.voltages, self.angles, self.non_slack_idx, self.pq_idx)
+
     def invert_jacobian(self):
         """Compute and print the inverse of the Jacobian matrix as a labeled DataFrame."""
         jacobian_df = self.compute_jacobian()
@@ -73,122 +151,17 @@ class Jacobian:
 
     def compute_J1(self):
         """Compute dP/dδ (J1) for all non-slack buses."""
-        n = len(self.non_slack_buses)
-        J1 = np.zeros((n, n))
-        y_abs = np.abs(self.ybus)
-        y_angle = np.angle(self.ybus)
-
-        for i, bus_i in enumerate(self.non_slack_buses):
-            idx_i = self.bus_order.index(bus_i)
-            for j, bus_j in enumerate(self.non_slack_buses):
-                idx_j = self.bus_order.index(bus_j)
-
-                if idx_i == idx_j:
-                    J1[i, j] = -sum(
-                        self.voltages[idx_i] * self.voltages[m] * y_abs[idx_i, m] *
-                        np.sin(self.angles[idx_i] - self.angles[m] - y_angle[idx_i, m])
-                        for m in range(len(self.bus_order)) if m != idx_i
-                    )
-                else:
-                    J1[i, j] = self.voltages[idx_i] * self.voltages[idx_j] * y_abs[idx_i, idx_j] * np.sin(
-                        self.angles[idx_i] - self.angles[idx_j] - y_angle[idx_i, idx_j])
-
-        return J1
+        return self.compute_blocks()[0]
 
     def compute_J2(self):
         """Compute dP/dV (J2) for non-slack buses (rows) and PQ buses (columns)."""
-        J2 = np.zeros((len(self.non_slack_buses), len(self.pq_buses)))
-        y_abs = np.abs(self.ybus)
-        y_angle = np.angle(self.ybus)
-        S = 0
-        for i, bus_i in enumerate(self.non_slack_buses):
-            idx_i = self.bus_order.index(bus_i)
-            for j, bus_j in enumerate(self.pq_buses):
-                idx_j = self.bus_order.index(bus_j)
-
-                if idx_i == idx_j:
-                    total = 0
-                    for m in range(len(self.bus_order)):
-                        if m != idx_i:
-                            I = self.voltages[idx_i] * y_abs[idx_i,idx_i]*np.cos(y_angle[idx_i,idx_i])
-                            term_voltage = self.voltages[m] #GOOD
-                            term_y_abs = y_abs[idx_i, m] #
-                            angle_diff = self.angles[idx_i] - self.angles[m]
-                            theta = y_angle[idx_i, m]
-                            cos_term = np.cos(angle_diff - theta)
-                            term = term_voltage * term_y_abs * cos_term
-
-                            total += term
-                    Vk = self.voltages[idx_i]
-                    Gkk = np.real(self.ybus[idx_i, idx_i])
-                    diag_term = Vk * Gkk
-                    J2[i, j] = 2 * diag_term + total
-
-                else:
-                    J2[i, j] = -(-self.voltages[idx_i] * y_abs[idx_i, idx_j] * np.cos(
-                        self.angles[idx_i] - self.angles[idx_j] - y_angle[idx_i, idx_j]))
-
-        return J2
+        return self.compute_blocks()[1]
 
     def compute_J3(self):
         """Compute dQ/dδ (J3) for PQ buses (rows) and non-slack buses (columns)
            using PowerWorld sign convention (positive diagonals)."""
-        J3 = np.zeros((len(self.pq_buses), len(self.non_slack_buses)))
-        y_abs = np.abs(self.ybus)
-        y_angle = np.angle(self.ybus)
-
-        for i, bus_i in enumerate(self.pq_buses):
-            idx_i = self.bus_order.index(bus_i)
-            for j, bus_j in enumerate(self.non_slack_buses):
-                idx_j = self.bus_order.index(bus_j)
-
-                if idx_i == idx_j:
-                    # Remove the negative sign here for PowerWorld convention
-                    J3[i, j] = sum(
-                        self.voltages[idx_i] * self.voltages[m] * y_abs[idx_i, m] *
-                        np.cos(self.angles[idx_i] - self.angles[m] - y_angle[idx_i, m])
-                        for m in range(len(self.bus_order)) if m != idx_i
-                    )
-                else:
-                    # Keep off-diagonal elements negative
-                    J3[i, j] = -self.voltages[idx_i] * self.voltages[idx_j] * y_abs[idx_i, idx_j] * np.cos(
-                        self.angles[idx_i] - self.angles[idx_j] - y_angle[idx_i, idx_j])
-
-        return J3
+        return self.compute_blocks()[2]
 
     def compute_J4(self):
         """Compute dQ/dV (J4) for PQ buses only, using PowerWorld sign convention (positive diagonals)."""
-        J4 = np.zeros((len(self.pq_buses), len(self.pq_buses)))
-        y_abs = np.abs(self.ybus)
-        y_angle = np.angle(self.ybus)
-
-        for i, bus_i in enumerate(self.pq_buses):
-            idx_i = self.bus_order.index(bus_i)
-            for j, bus_j in enumerate(self.pq_buses):
-                idx_j = self.bus_order.index(bus_j)
-
-                if idx_i == idx_j:
-                    total = 0
-                    for m in range(len(self.bus_order)):
-                        if m != idx_i:
-                            Vm = self.voltages[m]
-                            Ykm = y_abs[idx_i, m]
-                            angle_diff = self.angles[idx_i] - self.angles[m]
-                            theta = y_angle[idx_i, m]
-                            sin_term = np.sin(angle_diff - theta)
-                            term = Vm * Ykm * sin_term
-
-                            total += term
-
-                    Vk = self.voltages[idx_i]
-                    Bkk = -np.imag(self.ybus[idx_i, idx_i])
-                    diag_term = Vk * Bkk
-                    J4[i, j] = total + 2*diag_term
-
-                else:
-                    J4[i, j] = self.voltages[idx_i] * y_abs[idx_i, idx_j] * np.sin(
-                        self.angles[idx_i] - self.angles[idx_j] - y_angle[idx_i, idx_j])
-
-        return J4
-
-
+        return self.compute_blocks()[3]
@@ -0,0 +1,57 @@
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+from settings import Settings
+
+#linear solver used by the power flow to solve J * Δx = mismatch
+#the sparsity pattern of the Jacobian only depends on the network topology and the bus types, so the
+#fill-reducing column ordering (the symbolic part of the LU) is computed once and reused: every later
+#factorization with the same pattern is a numeric refactorization in the cached order
+#dense Jacobians (from a dense Ybus) are passed straight to numpy
+
+class Linear_Solver:
+
+    def __init__(self):
+        self.indptr = None  # CSC pattern the cached ordering belongs to
+        self.indices = None
+        self.perm_c = None  # fill-reducing column order found by the first (COLAMD) factorization
+        self.col_order = None  # columns of J taken in that order
+        self.symbolic_count = 0  # number of times the ordering was (re)computed
+        self.numeric_count = 0  # number of numeric factorizations
+
+    def same_pattern(self, J):
+        return (self.indptr is not None and J.shape[1] + 1 == len(self.indptr)
+                and np.array_equal(J.indptr, self.indptr) and np.array_equal(J.indices, self.indices))
+
+    def analyze(self, J):
+        # symbolic analysis: let SuperLU pick a COLAMD ordering once and keep it for this pattern
+        lu = splu(J, permc_spec="COLAMD")
+        self.indptr = J.indptr.copy()
+        self.indices = J.indices.copy()
+        self.perm_c = lu.perm_c.copy()
+        self.col_order = np.argsort(self.perm_c)
+        self.symbolic_count += 1
+        self.numeric_count += 1
+        Settings.telemetry.count("linear_solver.symbolic")
+        Settings.telemetry.count("linear_solver.numeric")
+        return lu
+
+    def factorize(self, J):
+        """Return a factorization of the sparse matrix J whose solve() works in J's own column order."""
+        J = sp.csc_matrix(J)
+        J.sort_indices()
+        if not self.same_pattern(J):
+            lu = self.analyze(J)
+            return lambda b: lu.solve(b)
+        # numeric refactorization only: columns are already in the fill-reducing order
+        lu = splu(J[:, self.col_order], permc_spec="NATURAL")
+        self.numeric_count += 1
+        Settings.telemetry.count("linear_solver.numeric")
+        perm_c = self.perm_c
+        return lambda b: lu.solve(b)[perm_c]
+
+    def solve(self, J, b):
+        """Solve J x = b, reusing the cached ordering when J is sparse."""
+        if not sp.issparse(J):
+            return np.linalg.solve(J, b)
+        return self.factorize(J)(b)
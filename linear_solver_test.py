@@ -0,0 +1,43 @@
+from seven_bus import build_circuit
+from jacobian import Jacobian, calc_jacobian
+from power_flow import Power_Flow
+from linear_solver import Linear_Solver
+from bus import PQ, SLACK
+from settings import Settings
+import numpy as np
+from scipy.sparse.linalg import spsolve
+
+
+# Jacobians of the sparse 7-bus system at several operating points share one sparsity pattern, so the
+# ordering is computed once and every later solve is a numeric refactorization in that order
+Settings.verbosity = Settings.SILENT
+circuit1 = build_circuit(sparse=True)
+state = circuit1.bus_state
+non_slack_idx = np.flatnonzero(state.type_code != SLACK)
+pq_idx = np.flatnonzero(state.type_code == PQ)
+rng = np.random.default_rng(0)
+
+solver = Linear_Solver()
+for k in range(5):
+    vpu = 1 + 0.05 * rng.standard_normal(len(state.vpu))
+    delta = 0.1 * rng.standard_normal(len(state.delta))
+    J = calc_jacobian(circuit1.ybus, vpu, delta, non_slack_idx, pq_idx)
+    b = rng.standard_normal(J.shape[0])
+    difference = np.max(np.abs(solver.solve(J, b) - spsolve(J, b)))
+    print(f"Solve {k + 1}: max difference from spsolve {difference:.2e}")
+    assert difference < 1e-12
+print(f"Symbolic analyses: {solver.symbolic_count}, numeric factorizations: {solver.numeric_count}")
+assert solver.symbolic_count == 1 and solver.numeric_count == 5
+
+# a full power flow and a warm-started re-solve keep reusing the circuit's ordering
+powerflow = Power_Flow(circuit1, Jacobian(circuit1))
+powerflow.solve(circuit1.buses, circuit1.ybus)
+steps = powerflow.iterations - 1  # the last iteration only evaluates the mismatch
+solved = powerflow.snapshot()
+circuit1.set_load("Load 1", 120, 55)
+powerflow.solve(circuit1.buses, circuit1.ybus, warm_start=solved)
+steps += powerflow.iterations - 1
+print(f"Power flow: {circuit1.linear_solver.symbolic_count} symbolic analysis, "
+      f"{circuit1.linear_solver.numeric_count} numeric factorizations over {steps} Newton steps")
+assert powerflow.converged and circuit1.linear_solver.symbolic_count == 1
+assert circuit1.linear_solver.numeric_count == steps
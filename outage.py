@@ -0,0 +1,106 @@
+from circuit import Circuit
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+
+#three-phase fault studies with branches (transmission lines or transformers) taken out of service
+#removing a branch adds -Yprim to the generator-modified Ybus at its two buses, a low-rank change, so the
+#post-outage Zbus columns follow from the cached base factorization with the Woodbury identity:
+#   Z' = Z - Z U C (I + Uᵀ Z U C)⁻¹ Uᵀ Z,   U = [e_from, e_to] per branch, C = -Yprim (block diagonal)
+#this form never inverts C, which is singular for a plain series branch (rank one stamp)
+#when the small correction matrix is ill-conditioned (e.g. the outage islands part of the network) the
+#post-outage Ybus is refactored instead
+
+class Outage_Study:
+
+    def __init__(self, circuit: Circuit, cond_limit: float = 1e10):
+        self.circuit = circuit
+        self.cond_limit = cond_limit  # largest condition number of I + UᵀZUC still trusted for the update
+        self.update_count = 0  # outages solved with the low-rank update
+        self.refactor_count = 0  # outages that fell back to a full refactorization
+
+    def branch(self, name):
+        if name in self.circuit.transmission_lines:
+            return self.circuit.transmission_lines[name]
+        if name in self.circuit.transformers:
+            return self.circuit.transformers[name]
+        raise ValueError(f"{name} is not a transmission line or transformer in the circuit")
+
+    def outage_stamp(self, outage):
+        # bus indices (2k,) and change matrix C (2k x 2k) for taking out one branch name or a list of them
+        names = [outage] if isinstance(outage, str) else list(outage)
+        bus_idx = []
+        C = np.zeros((2 * len(names), 2 * len(names)), dtype=complex)
+        for k, name in enumerate(names):
+            branch = self.branch(name)
+            bus_idx += [self.circuit.bus_indices[branch.bus1.name], self.circuit.bus_indices[branch.bus2.name]]
+            C[2 * k:2 * k + 2, 2 * k:2 * k + 2] = -branch.table.yprim[branch.table_index].reshape(2, 2)
+        return np.array(bus_idx, dtype=int), C
+
+    def zbus_columns(self, outage, fault_idx, z_cols=None):
+        """Zbus columns of the buses in fault_idx after the outage.
+
+        z_cols are the same columns of the pre-outage Zbus; pass them in when studying many outages
+        so they are only solved for once.
+        """
+        lu = self.circuit.fault_factorization()
+        N = len(self.circuit.buses)
+        if z_cols is None:
+            rhs = np.zeros((N, len(fault_idx)), dtype=complex)
+            rhs[fault_idx, np.arange(len(fault_idx))] = 1.0
+            z_cols = lu.solve(rhs)
+
+        bus_idx, C = self.outage_stamp(outage)
+        U = np.zeros((N, len(bus_idx)), dtype=complex)
+        U[bus_idx, np.arange(len(bus_idx))] = 1.0
+        ZU = lu.solve(U)
+        M = np.eye(len(bus_idx)) + ZU[bus_idx] @ C
+
+        if np.linalg.cond(M) < self.cond_limit:
+            self.update_count += 1
+            return z_cols - ZU @ (C @ np.linalg.solve(M, z_cols[bus_idx]))
+
+        # numerically unsafe update: stamp the outage into the Ybus and factor it again
+        self.refactor_count += 1
+        rows = np.repeat(bus_idx, len(bus_idx))
+        cols = np.tile(bus_idx, len(bus_idx))
+        y_outage = self.circuit.fault_ybus() + sp.csc_matrix((C.ravel(), (rows, cols)), shape=(N, N))
+        rhs = np.zeros((N, len(fault_idx)), dtype=complex)
+        rhs[fault_idx, np.arange(len(fault_idx))] = 1.0
+        try:
+            return splu(y_outage.tocsc()).solve(rhs)
+        except RuntimeError:  # the outage leaves a part of the network without any path to ground
+            return np.full((N, len(fault_idx)), np.nan, dtype=complex)
+
+    def fault_sweep(self, outage, faulted_buses=None, z_cols=None):
+        # bolted three-phase faults with the outage applied, same results as Circuit.fault_sweep:
+        # the fault current of each faulted bus (F,) and the post-fault voltage of every bus for each fault (F x N)
+        if faulted_buses is None:
+            faulted_buses = self.circuit.bus_order
+        fault_idx = np.array([self.circuit.bus_indices[bus] for bus in faulted_buses], dtype=int)
+        z_cols = self.zbus_columns(outage, fault_idx, z_cols)
+        znn = z_cols[fault_idx, np.arange(len(fault_idx))]
+        return 1.0 / znn, (1 - z_cols / znn).T
+
+    def n_minus_1(self, outages=None, faulted_buses=None):
+        """Three-phase faults at faulted_buses for every single outage in outages (default: all branches).
+
+        Returns the fault currents (outages x F) and post-fault voltages (outages x F x N); the
+        pre-outage Zbus columns and the base factorization are shared by all outages.
+        """
+        circuit = self.circuit
+        if outages is None:
+            outages = circuit.branch_names()
+        if faulted_buses is None:
+            faulted_buses = circuit.bus_order
+        N = len(circuit.buses)
+        fault_idx = np.array([circuit.bus_indices[bus] for bus in faulted_buses], dtype=int)
+        rhs = np.zeros((N, len(fault_idx)), dtype=complex)
+        rhs[fault_idx, np.arange(len(fault_idx))] = 1.0
+        z_cols = circuit.fault_factorization().solve(rhs)
+
+        fault_current = np.zeros((len(outages), len(fault_idx)), dtype=complex)
+        fault_voltage = np.zeros((len(outages), len(fault_idx), N), dtype=complex)
+        for k, outage in enumerate(outages):
+            fault_current[k], fault_voltage[k] = self.fault_sweep(outage, faulted_buses, z_cols)
+        return fault_current, fault_voltage
@@ -0,0 +1,19 @@
+from seven_bus import build_circuit
+from outage import Outage_Study
+from settings import Settings
+import numpy as np
+
+
+# N-1 three-phase fault study: the low-rank outage update against refactoring every outaged Ybus
+Settings.verbosity = Settings.SUMMARY
+circuit1 = build_circuit()
+fault_current, fault_voltage = Outage_Study(circuit1).n_minus_1()
+refactored = Outage_Study(circuit1, cond_limit=0)  # forces the refactorization fallback
+check_current, check_voltage = refactored.n_minus_1()
+
+for outage, currents in zip(circuit1.branch_names(), fault_current):
+    print(f"{outage} out: " + ", ".join(f"{bus} {abs(i):.3f}" for bus, i in zip(circuit1.bus_order, currents)))
+
+difference = max(np.max(np.abs(fault_current - check_current)), np.max(np.abs(fault_voltage - check_voltage)))
+print(f"\nMax difference update vs refactor: {difference:.2e}")
+assert difference < 1e-9
@@ -1,82 +1,210 @@
-from circuit import Circuit
-from jacobian import Jacobian
+from circuit import Circuit, calc_power_injection
+from jacobian import Jacobian, calc_jacobian
+from bus import PQ, SLACK
+from fast_decoupled import Fast_Decoupled
+from linear_solver import Linear_Solver
+from settings import Settings
 import numpy as np
-import pandas as pd
+
+
+def newton_step(vpu, delta, delta_x, non_slack_idx, pq_idx, iteration, max_mismatch, previous_mismatch, step,
+                damping="adaptive"):
+    """Apply one damped Newton update to vpu and delta (radians) in place; returns the new step fraction.
+
+    Works on one operating point (vpu/delta (N,), delta_x (M,)) or on a stack of them (K x N and K x M,
+    with max_mismatch, previous_mismatch and step given per row). "adaptive" damping takes full steps and
+    halves them (down to 1/16) while the mismatch grows, doubling back once it shrinks; "fixed" scales the
+    first 10 steps by 0.3 (angles) and 0.5 (voltages). delta_x is scaled in place to the applied update,
+    and voltage magnitudes are clamped to [0.5, 1.5] pu so a diverging case stays bounded.
+    """
+    n_angles = len(non_slack_idx)
+    if damping == "fixed":
+        if iteration < 10:
+            delta_x[..., :n_angles] *= 0.3  # Dampen angles
+            delta_x[..., n_angles:] *= 0.5  # Dampen voltages
+    else:
+        step = np.where(max_mismatch > previous_mismatch, np.maximum(step / 2, 1 / 16), np.minimum(step * 2, 1.0))
+        delta_x *= step[..., None]
+    delta[..., non_slack_idx] += delta_x[..., :n_angles]
+    # Clamp voltage to avoid divergence
+    vpu[..., pq_idx] = np.clip(vpu[..., pq_idx] + delta_x[..., n_angles:], 0.5, 1.5)
+    return step
+
+
+def newton_iterate(mismatch, jacobian, vpu, delta, non_slack_idx, pq_idx, tol=10**-9, max_iter=50,
+                   damping="adaptive", linear_solver=None, history=None):
+    """The Newton-Raphson loop shared by Power_Flow.solve and the contingency workers.
+
+    mismatch() returns [ΔP of the non-slack buses, ΔQ of the PQ buses] (pu) and jacobian() the matching
+    Jacobian, both at the current vpu/delta (radians), which newton_step updates in place. linear_solver
+    keeps the ordering of sparse Jacobians between iterations; history receives one dict per iteration.
+    Returns (converged, iterations), iterations counting mismatch evaluations; a NaN state stops early.
+    """
+    telemetry = Settings.telemetry
+    linear_solver = linear_solver if linear_solver is not None else Linear_Solver()
+    history = history if history is not None else []
+    step = 1.0  # fraction of the Newton step applied under adaptive damping
+    previous_mismatch = np.inf
+
+    for iteration in range(max_iter):
+        mark = telemetry.mark()
+        # Step 1: Calculate the power mismatches (ΔP + ΔQ) in the Jacobian's order
+        with telemetry.stage("newton.mismatch"):
+            mismatch_vector = mismatch()
+
+        # Step 2: Check convergence
+        max_mismatch = np.max(np.abs(mismatch_vector))
+        history.append({"iteration": iteration + 1, "max_mismatch": float(max_mismatch), "step_norm": 0.0})
+        if max_mismatch < tol:
+            telemetry.iteration("newton", mark, mismatch_vector, **history[-1], step=0.0)
+            return True, iteration + 1
+
+        # Step 3: Compute Jacobian
+        J = jacobian()
+
+        # Step 4: Solve J * Δx = mismatch (sparse J reuses the cached ordering)
+        with telemetry.stage("newton.linear_solve"):
+            delta_x = linear_solver.solve(J, mismatch_vector)
+        if Settings.verbosity >= Settings.DEBUG:
+            print("Delta x:\n", delta_x)
+
+        # Step 5: Update angles (Δθ in radians) and voltages (ΔV) in place
+        with telemetry.stage("newton.update"):
+            step = float(newton_step(vpu, delta, delta_x, non_slack_idx, pq_idx, iteration, max_mismatch,
+                                     previous_mismatch, step, damping))
+        previous_mismatch = max_mismatch
+        history[-1]["step_norm"] = float(np.max(np.abs(delta_x)))
+        # step: fraction of the Newton step applied under adaptive damping, step_norm: largest applied change
+        telemetry.iteration("newton", mark, mismatch_vector, **history[-1],
+                            step=step if damping == "adaptive" else None)
+
+        # NaN safeguard
+        if np.isnan(vpu).any() or np.isnan(delta).any():
+            return False, iteration + 1
+    return False, max_iter
+
+
+def newton_solve(ybus, p_sched, q_sched, type_code, vpu, delta, tol=10**-9, max_iter=50, damping="adaptive",
+                 linear_solver=None):
+    """Newton-Raphson on plain arrays, without Circuit or Bus objects (used by the contingency workers).
+
+    ybus is a numpy array or scipy sparse matrix, p_sched/q_sched the scheduled net injections in
+    per-unit, type_code the bus types (bus.PQ/PV/SLACK) and vpu/delta (radians) the starting point,
+    which is updated in place. Same iteration as Power_Flow.solve. Returns (converged, iterations).
+    """
+    non_slack_idx = np.flatnonzero(type_code != SLACK)
+    pq_idx = np.flatnonzero(type_code == PQ)
+
+    def mismatch():
+        P, Q = calc_power_injection(ybus, vpu, delta)
+        return np.concatenate([p_sched[non_slack_idx] - P[non_slack_idx], q_sched[pq_idx] - Q[pq_idx]])
+
+    def jacobian():
+        return calc_jacobian(ybus, vpu, delta, non_slack_idx, pq_idx)
+
+    return newton_iterate(mismatch, jacobian, vpu, delta, non_slack_idx, pq_idx, tol, max_iter, damping,
+                          linear_solver)
+
 
 class Power_Flow:
 
     def __init__(self, circuit: Circuit, jacobian: Jacobian):
         self.circuit = circuit
         self.jacobian = jacobian
-
-    def solve(self, buses, ybus, tol=10**-9, max_iter=50):
-        converged = False
-
-        for iteration in range(max_iter):
-            print(f"\n--- Iteration {iteration + 1} ---")
+        # diagnostics of the last solve: one dict per iteration with the max mismatch and the
+        # size of the applied step, so batch runs can inspect convergence without any printing
+        self.history = []
+        self.converged = False
+        self.iterations = 0
+        self.fast_decoupled = {}  # fast-decoupled engine per variant, keeps B' and B'' factored between solves
+
+    def snapshot(self):
+        # copy of the current bus state, e.g. a solved case to warm-start later solves from
+        state = self.circuit.bus_state
+        return {"vpu": state.vpu.copy(), "delta": state.delta.copy(), "radians": self.circuit.radians}
+
+    def restore(self, snapshot):
+        # puts a snapshot (of this circuit or of one with the same buses) back into the bus state
+        state = self.circuit.bus_state
+        state.vpu[:] = snapshot["vpu"]
+        state.delta[:] = snapshot["delta"]
+        self.circuit.radians = snapshot["radians"]
+
+    def solve(self, buses, ybus, tol=10**-9, max_iter=50, method="newton", warm_start=None, damping="adaptive"):
+        # method: "newton" (full Newton-Raphson), "fdxb" or "fdbx" (fast-decoupled XB/BX)
+        # warm_start: a snapshot to start from instead of the current bus state
+        # damping: "adaptive" takes full Newton steps and only shortens them while the mismatch grows,
+        # "fixed" scales the first 10 steps by 0.3 (angles) and 0.5 (voltages)
+        if warm_start is not None:
+            self.restore(warm_start)
+        if self.circuit.radians == 0:  # the solvers work in radians
+            self.circuit.bus_state.delta[:] = np.deg2rad(self.circuit.bus_state.delta)
             self.circuit.radians = 1
-            # Step 1: Calculate power mismatches
-            mismatch_df = self.circuit.compute_power_mismatch(buses, ybus)
-            print(mismatch_df)
-
-            # Step 2: Build mismatch vector (ΔP + ΔQ) matching Jacobian's order
-            delta_P = []
-            delta_Q = []
-
-            # Non-slack buses (PV and PQ) for ΔP
-            for bus_name in self.circuit.bus_order:
-                bus_type = buses[bus_name].bus_type
-                if bus_type != 'slack':
-                    delta_P.append(mismatch_df.loc[mismatch_df["Bus"] == bus_name, "Delta_P"].values[0])
-
-            # PQ buses only for ΔQ
-            for bus_name in self.circuit.bus_order:
-                bus_type = buses[bus_name].bus_type
-                if bus_type == 'PQ':
-                    delta_Q.append(mismatch_df.loc[mismatch_df["Bus"] == bus_name, "Delta_Q"].values[0])
-
-            # Form combined mismatch vector
-            mismatch_vector = np.array(delta_P + delta_Q)
-
-            # Step 3: Check convergence
-            max_mismatch = np.max(np.abs(mismatch_vector))
-            print("Mismatch Vector:\n", mismatch_vector)
-            print("Max mismatch:", max_mismatch)
-
-            if max_mismatch < tol:
-                print("\n✅ Power flow converged.")
-                converged = True
-                break
-
-            # Step 4: Compute Jacobian
-            J = self.jacobian.compute_jacobian().values
-            print(J)
-
-            # Step 5: Solve J * Δx = mismatch
-            delta_x = np.linalg.solve(J, mismatch_vector)
-            print("Delta x:\n", delta_x)
-            if iteration < 10:
-                delta_x[:len(self.jacobian.non_slack_buses)] *= 0.3  # Dampen angles
-                delta_x[len(self.jacobian.non_slack_buses):] *= 0.5  # Dampen voltages
-            # Step 6: Update angles (Δθ in radians) and voltages (ΔV)
-            delta_idx = 0
-            for bus in self.jacobian.non_slack_buses:
-                buses[bus].delta += (delta_x[delta_idx])
-
-                delta_idx += 1
-            for bus in self.jacobian.pq_buses:
-                buses[bus].vpu += delta_x[delta_idx]
-                # Optional: Clamp voltage to avoid divergence
-                buses[bus].vpu = max(min(buses[bus].vpu, 1.5), 0.5)
-                delta_idx += 1
-
-            # NaN safeguard
-            for bus in buses.values():
-                if np.isnan(bus.vpu) or np.isnan(bus.delta):
-                    print(f"\n❌ NaN detected at {bus.name}. Aborting iteration.")
-                    return buses
-
-        if not converged:
+
+        telemetry = Settings.telemetry
+        if method in ("fdxb", "fdbx"):
+            engine = self.fast_decoupled.get(method)
+            if engine is None:
+                engine = self.fast_decoupled[method] = Fast_Decoupled(self.circuit, self.jacobian, method[2:])
+            with telemetry.stage("fast_decoupled.solve"):
+                converged = engine.solve(buses, ybus, tol, max_iter)
+            self.history = engine.history
+            self.converged = converged
+            self.iterations = engine.iterations
+            self.report(buses, converged)
+            return buses
+        if method != "newton":
+            raise ValueError("Power flow method must be 'newton', 'fdxb' or 'fdbx'")
+
+        if damping not in ("adaptive", "fixed"):
+            raise ValueError("Damping must be 'adaptive' or 'fixed'")
+
+        self.history = []
+        debug = Settings.verbosity >= Settings.DEBUG
+        non_slack_idx = self.jacobian.non_slack_idx
+        pq_idx = self.jacobian.pq_idx
+
+        def mismatch():
+            if debug:
+                print(f"\n--- Iteration {len(self.history) + 1} ---")
+            mismatch_vector = self.circuit.compute_mismatch_vector(buses, ybus, non_slack_idx, pq_idx)
+            if debug:
+                print(self.circuit.mismatch_table(mismatch_vector, non_slack_idx, pq_idx))
+                print("Mismatch Vector:\n", mismatch_vector)
+                print("Max mismatch:", np.max(np.abs(mismatch_vector)))
+            return mismatch_vector
+
+        def jacobian():
+            J = self.jacobian.build_jacobian()
+            if debug:
+                print(J)
+            return J
+
+        # the angles and voltages are updated in place in the bus state arrays
+        state = self.circuit.bus_state
+        converged, _ = newton_iterate(mismatch, jacobian, state.vpu, state.delta, non_slack_idx, pq_idx, tol,
+                                      max_iter, damping, self.circuit.linear_solver, self.history)
+
+        nan_buses = np.flatnonzero(np.isnan(state.vpu) | np.isnan(state.delta))
+        if len(nan_buses):
+            if Settings.verbosity >= Settings.SUMMARY:
+                print(f"\n❌ NaN detected at {self.circuit.bus_order[nan_buses[0]]}. Aborting iteration.")
+            self.converged = False
+            self.iterations = len(self.history)
+            return buses
+
+        self.converged = converged
+        self.iterations = len(self.history)
+        telemetry.count("newton.iterations", self.iterations)
+        self.report(buses, converged)
+        return buses
+
+    def report(self, buses, converged):
+        if Settings.verbosity < Settings.SUMMARY:
+            return
+        if converged:
+            print("\n✅ Power flow converged.")
+        else:
             print("\n❌ Power flow did NOT converge after max iterations.")
 
         # Final results (convert delta to degrees for output only)
@@ -84,6 +212,4 @@ class Power_Flow:
         for bus in self.circuit.bus_order:
             v = buses[bus].vpu
             delta_deg = np.degrees(buses[bus].delta)  # Convert radians to degrees for printing
-            print(f"{bus}: V = {v:.5f} p.u., δ = {delta_deg:.5f}°")
-
-        return buses
\ No newline at end of file
+            print(f"{bus}: V = {v:.5f} p.u., δ = {delta_deg:.5f}°")
\ No newline at end of file
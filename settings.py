@@ -1,7 +1,31 @@
 import numpy as np
+import pandas as pd
+from telemetry import NULL_TELEMETRY
 
-#config-sets the base_power value and frequency
+#config-sets the base_power value, frequency and how much the solvers print
 class Settings:
 
     frequency: float = 60
-    base_power: float = 100
\ No newline at end of file
+    base_power: float = 100
+
+    # verbosity levels: SILENT prints nothing (batch runs), SUMMARY prints convergence and final results,
+    # DEBUG also prints the matrices and vectors of every iteration
+    SILENT = 0
+    SUMMARY = 1
+    DEBUG = 2
+    verbosity: int = DEBUG
+
+    # collector of stage timings, counters and solver iterations (see telemetry.py); the default does nothing
+    telemetry = NULL_TELEMETRY
+
+    full_tables_shown: bool = False
+
+    @staticmethod
+    def show_full_tables():
+        # lets pandas print whole Ybus/Jacobian tables; only applied once, and only when debugging
+        if Settings.verbosity >= Settings.DEBUG and not Settings.full_tables_shown:
+            Settings.full_tables_shown = True
+            pd.set_option('display.max_rows', None)  # No limit to the number of rows displayed
+            pd.set_option('display.max_columns', None)  # No limit to the number of columns displayed
+            pd.set_option('display.width', None)  # No width limit (adjust to your console's width)
+            pd.set_option('display.max_colwidth', None)  # No limit to the column width
\ No newline at end of file
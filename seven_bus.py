@@ -0,0 +1,38 @@
+from circuit import Circuit
+
+#the 7-bus PowerWorld system used by the test scripts, built in one place
+
+
+def build_circuit(sparse: bool = False):
+    # Creating Circuit for 7-bus powerworld system
+    circuit1 = Circuit("circuit1", sparse=sparse)
+
+    circuit1.add_bus("Bus1", 20)
+    circuit1.add_bus("Bus2", 230)
+    circuit1.add_bus("Bus3", 230)
+    circuit1.add_bus("Bus4", 230)
+    circuit1.add_bus("Bus5", 230)
+    circuit1.add_bus("Bus6", 230)
+    circuit1.add_bus("Bus7", 18)
+
+    circuit1.add_conductor("Partridge", 0.642, 0.0217, 0.385, 460)
+    circuit1.add_geometry("Geometry 1", 0, 0, 19.5, 0, 39, 0)
+    circuit1.add_bundle("Bundle 1", 2, 1.5, circuit1.conductors["Partridge"].name)
+
+    circuit1.add_transformer("T1", "Bus1", "Bus2", 125, 8.5, 10, 'delta-y', (100/230**2), 'yes')
+    circuit1.add_transformer("T2", "Bus6", "Bus7", 200, 10.5, 12, 'y-delta', 0, 'no')
+
+    circuit1.add_transmission_line("Line 1", "Bus2", "Bus4", "Bundle 1", "Geometry 1", 10)
+    circuit1.add_transmission_line("Line 2", "Bus2", "Bus3", "Bundle 1", "Geometry 1", 25)
+    circuit1.add_transmission_line("Line 3", "Bus3", "Bus5", "Bundle 1", "Geometry 1", 20)
+    circuit1.add_transmission_line("Line 4", "Bus4", "Bus6", "Bundle 1", "Geometry 1", 20)
+    circuit1.add_transmission_line("Line 5", "Bus5", "Bus6", "Bundle 1", "Geometry 1", 10)
+    circuit1.add_transmission_line("Line 6", "Bus4", "Bus5", "Bundle 1", "Geometry 1", 35)
+
+    circuit1.add_generator_element("Generator 1", "Bus1", 100, 1.0, 0.12, 0.05, 0.14, 0, 'yes')
+    circuit1.add_generator_element("Generator 2", "Bus7", 200, 1.0, 0.12, 0.05, 0.14, (100/18**2), 'yes')
+
+    circuit1.add_load_element("Load 1", "Bus3", 110, 50)
+    circuit1.add_load_element("Load 2", "Bus4", 100, 70)
+    circuit1.add_load_element("Load 3", "Bus5", 100, 65)
+    return circuit1
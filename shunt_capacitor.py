@@ -19,6 +19,21 @@ class Shunt_capacitor:
 
 
 
+    @classmethod
+    def from_per_unit(cls, name: str, bus: Bus, y: complex):
+        # bus shunt given directly as a per-unit admittance G + jB on the system base (case files);
+        # mvar is the reactive power it supplies at 1 pu
+        shunt = cls.__new__(cls)
+        shunt.name = name
+        shunt.bus = bus
+        shunt.mvar = np.imag(y) * Settings.base_power
+        shunt.w = 2 * np.pi * Settings.frequency
+        shunt.v_base = bus.base_kv
+        shunt.s_base = Settings.base_power
+        shunt.y_base = Settings.base_power / bus.base_kv ** 2 if bus.base_kv else np.nan
+        shunt.y = complex(y)
+        return shunt
+
     def calc_admittance(self):  # calculates impedance based frequency and inductance, returns in PU
         y = 1j*(self.mvar/self.v_base**2)
         y = y / self.y_base
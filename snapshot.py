@@ -0,0 +1,248 @@
+from circuit import Circuit, ybus_array
+from shunt_inductor import Shunt_inductor
+from transformer import CONNECTION_TYPES
+from bus import BUS_TYPES
+from settings import Settings
+import json
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+#binary snapshot of a Circuit in a single file, so worker processes can load a model without re-parsing it
+#and re-deriving every line and transformer parameter
+#layout: 8-byte magic, header length (uint64), a JSON header (circuit name, settings, element names and the
+#array layout {name: [offset, dtype, shape]}), then every array 64-byte aligned
+#the element tables are typed arrays in per-unit on the system base, including the grounding and sequence
+#data the zero and negative sequence networks are built from; the Ybus and both sequence networks are stored
+#in CSR form, and the solved bus state is stored optionally
+#Circuit_Snapshot memory-maps the file read-only, so many processes opening the same snapshot share the
+#pages through the OS cache instead of each holding a copy
+#the shared path is Circuit_Snapshot.arrays and .matrix(): read-only views into the mapping, which is what
+#worker processes that only need the network should use (see contingency.attach_snapshot)
+#to_circuit builds a full Circuit, so its element objects are private to the process; with a sparse Ybus the
+#Ybus and sequence networks stay views into the mapping until the circuit first changes them
+
+SNAPSHOT_MAGIC = b"CIRCSNAP"
+SNAPSHOT_VERSION = 2
+ALIGNMENT = 64
+
+
+def csr_arrays(prefix, matrix):
+    # the three CSR arrays of a matrix, with sorted indices so the loaded (read-only) matrix never needs them sorted
+    matrix = sp.csr_matrix(matrix, dtype=complex)
+    matrix.sort_indices()
+    return {f"{prefix}_data": matrix.data, f"{prefix}_indices": matrix.indices, f"{prefix}_indptr": matrix.indptr}
+
+
+def circuit_arrays(circuit: Circuit, state: bool = True):
+    # every array of the snapshot of a circuit; with state=False the bus voltages and calculated injections
+    # are left out, and the loaded circuit starts flat
+    bus_indices = circuit.bus_indices
+    lines = list(circuit.transmission_lines.values())
+    transformers = list(circuit.transformers.values())
+    generators = list(circuit.generators.values())
+    loads = list(circuit.loads.values())
+    capacitors = list(circuit.shunt_capacitors.values())
+    inductors = list(circuit.shunt_inductors.values())
+    bus_state = circuit.bus_state
+    circuit.calc_zero_negative_ybus()
+    from_idx, to_idx, yprim = circuit.branch_primitives()
+
+    arrays = {
+        "bus_kv": np.array([circuit.buses[bus].base_kv for bus in circuit.bus_order], dtype=float),
+        "type_code": bus_state.type_code,
+        "p_sched": bus_state.p_sched,
+        "q_sched": bus_state.q_sched,
+        "line_from": np.array([bus_indices[line.bus1.name] for line in lines], dtype=int),
+        "line_to": np.array([bus_indices[line.bus2.name] for line in lines], dtype=int),
+        "line_z": np.array([line.impedance_pu for line in lines], dtype=complex),
+        "line_b": np.array([np.imag(line.shunt_admittance) for line in lines], dtype=float),
+        "line_rating": np.array([line.rating for line in lines], dtype=float),
+        "line_grounded": np.array([bool(line.is_grounded) for line in lines], dtype=bool),
+        "transformer_from": np.array([bus_indices[t.bus1.name] for t in transformers], dtype=int),
+        "transformer_to": np.array([bus_indices[t.bus2.name] for t in transformers], dtype=int),
+        "transformer_z": np.array([t.zseries for t in transformers], dtype=complex),
+        "transformer_b": np.array([np.imag(t.charging) for t in transformers], dtype=float),
+        "transformer_tap": np.array([t.tap for t in transformers], dtype=complex),
+        "transformer_rating": np.array([t.power_rating for t in transformers], dtype=float),
+        "transformer_connection": np.array([CONNECTION_TYPES.index(t.connection_type) for t in transformers],
+                                           dtype=np.int8),
+        "transformer_z_ground": np.array([t.z_ground for t in transformers], dtype=complex),  # pu on the system base
+        "transformer_grounded": np.array([t.is_grounded != "no" for t in transformers], dtype=bool),
+        "capacitor_bus": np.array([bus_indices[shunt.bus.name] for shunt in capacitors], dtype=int),
+        "capacitor_y": np.array([shunt.y for shunt in capacitors], dtype=complex),
+        "inductor_bus": np.array([bus_indices[shunt.bus.name] for shunt in inductors], dtype=int),
+        "inductor_y": np.array([shunt.y for shunt in inductors], dtype=complex),
+        "load_bus": np.array([bus_indices[load.bus.name] for load in loads], dtype=int),
+        "load_p": np.array([load.real_power for load in loads], dtype=float),
+        "load_q": np.array([load.reactive_power for load in loads], dtype=float),
+        "gen_bus": np.array([bus_indices[g.bus.name] for g in generators], dtype=int),
+        "gen_p": np.array([g.mw_setpoint for g in generators], dtype=float),
+        "gen_v": np.array([g.voltage_setpoint for g in generators], dtype=float),
+        "gen_mva_base": np.array([g.mva_base for g in generators], dtype=float),
+        "gen_x": np.array([np.imag(g.subtransient_x) for g in generators], dtype=float),  # pu on the system base
+        # sequence data as the Generator constructor takes it: x2 on the machine base, x0 and the grounding
+        # reactance as given
+        "gen_x0": np.array([np.imag(g.z_zero) for g in generators], dtype=float),
+        "gen_x2": np.array([np.imag(g.z_negative) * g.mva_base / Settings.base_power for g in generators],
+                           dtype=float),
+        "gen_x_ground": np.array([np.imag(g.ground_z) for g in generators], dtype=float),
+        "gen_grounded": np.array([g.ground_status != "no" for g in generators], dtype=bool),
+        # branch primitives in branch_names order, ready for calc_branch_flows and the contingency workers
+        "branch_from": from_idx,
+        "branch_to": to_idx,
+        "branch_yprim": yprim,
+        "branch_rating": circuit.branch_ratings(),
+    }
+    arrays.update(csr_arrays("ybus", ybus_array(circuit.ybus)))
+    arrays.update(csr_arrays("zero_ybus", ybus_array(circuit.zero_ybus)))
+    arrays.update(csr_arrays("negative_ybus", ybus_array(circuit.negative_ybus)))
+    if state:
+        arrays.update({"vpu": bus_state.vpu, "delta": bus_state.delta, "p": bus_state.p, "q": bus_state.q})
+    return arrays
+
+
+def save_snapshot(circuit: Circuit, path, state: bool = True):
+    """Write the circuit to a single binary snapshot file at path.
+
+    state=True also stores the bus voltages, angles and calculated injections (e.g. a solved base case).
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in circuit_arrays(circuit, state).items()}
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = [offset, array.dtype.str, list(array.shape)]
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    header = json.dumps({
+        "version": SNAPSHOT_VERSION,
+        "name": circuit.name,
+        "sparse": circuit.sparse,
+        "radians": circuit.radians,
+        "ybus_modified": circuit.ybus_modified,
+        "base_power": Settings.base_power,
+        "frequency": Settings.frequency,
+        "buses": circuit.bus_order,
+        "lines": list(circuit.transmission_lines.keys()),
+        "transformers": list(circuit.transformers.keys()),
+        "capacitors": list(circuit.shunt_capacitors.keys()),
+        "inductors": list(circuit.shunt_inductors.keys()),
+        "loads": list(circuit.loads.keys()),
+        "generators": list(circuit.generators.keys()),
+        "arrays": layout,
+    }).encode()
+    data_start = -(-(16 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    with open(path, "wb") as file:
+        file.write(SNAPSHOT_MAGIC)
+        file.write(np.array(len(header), dtype="<u8").tobytes())
+        file.write(header)
+        for name, array in arrays.items():
+            file.seek(data_start + layout[name][0])
+            file.write(array.tobytes())
+        file.truncate(data_start + offset)
+
+
+class Circuit_Snapshot:
+    # a snapshot file opened as one read-only memory map; arrays holds read-only views into it by name, shared
+    # by every process mapping the same file
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            if file.read(8) != SNAPSHOT_MAGIC:
+                raise ValueError(f"{path} is not a circuit snapshot")
+            header_length = int(np.frombuffer(file.read(8), dtype="<u8")[0])
+            self.header = json.loads(file.read(header_length))
+        if self.header["version"] != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {self.header['version']}")
+        data_start = -(-(16 + header_length) // ALIGNMENT) * ALIGNMENT
+
+        self.buffer = np.memmap(path, dtype=np.uint8, mode="r")
+        self.arrays = {name: np.ndarray(tuple(shape), dtype=dtype, buffer=self.buffer, offset=data_start + offset)
+                       for name, (offset, dtype, shape) in self.header["arrays"].items()}
+        self.has_state = "vpu" in self.arrays
+
+    def matrix(self, prefix="ybus"):
+        # "ybus", "zero_ybus" or "negative_ybus" as a CSR matrix over the mapped arrays (no copy)
+        N = len(self.header["buses"])
+        return sp.csr_matrix((self.arrays[f"{prefix}_data"], self.arrays[f"{prefix}_indices"],
+                              self.arrays[f"{prefix}_indptr"]), shape=(N, N))
+
+    def to_circuit(self, sparse: bool = None):
+        """Rebuild a Circuit from the snapshot, with its Ybus and sequence networks taken from the file.
+
+        Branches and shunts are recreated from their per-unit data (no conductor, bundle or geometry);
+        sparse defaults to the mode the circuit was saved in. A sparse circuit keeps the mapped matrices
+        (copied on its first in-place change); a dense one converts them into DataFrames of its own.
+        """
+        header = self.header
+        arrays = self.arrays
+        if header["base_power"] != Settings.base_power or header["frequency"] != Settings.frequency:
+            raise ValueError(f"Snapshot was saved with base_power={header['base_power']} and "
+                             f"frequency={header['frequency']}, which do not match the current Settings")
+        sparse = header["sparse"] if sparse is None else sparse
+        circuit = Circuit(header["name"], sparse=sparse)
+        buses = np.array(header["buses"], dtype=object)
+
+        circuit.add_buses(header["buses"], arrays["bus_kv"],
+                          bus_types=[BUS_TYPES[code] for code in arrays["type_code"]])
+        line_z = arrays["line_z"]
+        circuit.add_lines_per_unit(header["lines"], buses[arrays["line_from"]], buses[arrays["line_to"]],
+                                   line_z.real, line_z.imag, arrays["line_b"], arrays["line_rating"],
+                                   arrays["line_grounded"])
+        transformer_z = arrays["transformer_z"]
+        tap = arrays["transformer_tap"]
+        circuit.add_transformers_per_unit(header["transformers"], buses[arrays["transformer_from"]],
+                                          buses[arrays["transformer_to"]], transformer_z.real, transformer_z.imag,
+                                          arrays["transformer_b"], np.abs(tap), np.angle(tap, deg=True),
+                                          arrays["transformer_rating"],
+                                          [CONNECTION_TYPES[code] for code in arrays["transformer_connection"]],
+                                          arrays["transformer_z_ground"],
+                                          np.where(arrays["transformer_grounded"], "yes", "no"))
+        circuit.add_shunts_per_unit(header["capacitors"], buses[arrays["capacitor_bus"]], arrays["capacitor_y"])
+        for name, bus, y in zip(header["inductors"], buses[arrays["inductor_bus"]], arrays["inductor_y"]):
+            circuit.shunt_inductors[name] = Shunt_inductor.from_per_unit(name, circuit.buses[bus], y)
+        circuit.add_loads(header["loads"], buses[arrays["load_bus"]], arrays["load_p"], arrays["load_q"])
+        circuit.add_generators(header["generators"], buses[arrays["gen_bus"]], arrays["gen_p"], arrays["gen_v"],
+                               arrays["gen_mva_base"],
+                               arrays["gen_x"] * arrays["gen_mva_base"] / Settings.base_power, arrays["gen_x0"],
+                               arrays["gen_x2"], arrays["gen_x_ground"], np.where(arrays["gen_grounded"], "yes", "no"))
+
+        # the scheduled injections and the state exactly as saved
+        bus_state = circuit.bus_state
+        bus_state.p_sched[:] = arrays["p_sched"]
+        bus_state.q_sched[:] = arrays["q_sched"]
+        if self.has_state:
+            bus_state.vpu[:] = arrays["vpu"]
+            bus_state.delta[:] = arrays["delta"]
+            bus_state.p[:] = arrays["p"]
+            bus_state.q[:] = arrays["q"]
+            circuit.radians = header["radians"]
+        else:
+            # flat start, with the generator voltage setpoints held at the PV and slack buses
+            regulated = arrays["type_code"][arrays["gen_bus"]] != BUS_TYPES.index("PQ")
+            bus_state.vpu[arrays["gen_bus"][regulated]] = arrays["gen_v"][regulated]
+
+        # the stored networks replace the rebuild
+        matrices = [self.matrix(prefix) for prefix in ("ybus", "zero_ybus", "negative_ybus")]
+        if not sparse:
+            matrices = [pd.DataFrame(matrix.toarray(), index=header["buses"], columns=header["buses"])
+                        for matrix in matrices]
+        circuit.ybus, circuit.zero_ybus, circuit.negative_ybus = matrices
+        circuit.ybus_dirty = False
+        circuit.ybus_modified = header["ybus_modified"]
+        circuit.sequence_version = circuit.topology_version
+        return circuit
+
+    def close(self):
+        # the mapping is released once no array or matrix taken from it is referenced any more
+        self.arrays = None
+        self.buffer = None
+
+
+def load_snapshot(path, sparse: bool = None):
+    # reads a snapshot file straight into a Circuit
+    snapshot = Circuit_Snapshot(path)
+    circuit = snapshot.to_circuit(sparse)
+    snapshot.close()
+    return circuit
@@ -0,0 +1,57 @@
+from seven_bus import build_circuit
+from snapshot import save_snapshot, Circuit_Snapshot, load_snapshot
+from jacobian import Jacobian
+from power_flow import Power_Flow
+from circuit import ybus_array
+from settings import Settings
+import numpy as np
+import os
+import tempfile
+
+
+# Solve the 7-bus system, save it with its solved state and load it back from the memory-mapped file
+Settings.verbosity = Settings.SILENT
+circuit1 = build_circuit()
+Power_Flow(circuit1, Jacobian(circuit1)).solve(circuit1.buses, circuit1.ybus)
+path = os.path.join(tempfile.mkdtemp(), "circuit1.snap")
+save_snapshot(circuit1, path)
+
+snapshot = Circuit_Snapshot(path)
+print(f"Snapshot: {os.path.getsize(path)} bytes, {len(snapshot.arrays)} arrays, state stored: {snapshot.has_state}")
+assert np.shares_memory(snapshot.matrix().data, snapshot.buffer)  # the Ybus is read straight from the mapping
+
+circuit2 = snapshot.to_circuit()
+print(f"Ybus difference: {np.max(np.abs(ybus_array(circuit2.ybus) - ybus_array(circuit1.ybus))):.2e}")
+print(f"Voltage difference: {np.max(np.abs(circuit2.bus_state.vpu - circuit1.bus_state.vpu)):.2e}")
+
+# the stored networks match the ones rebuilt from the per-unit element tables, and the loaded state is solved
+stored_ybus = ybus_array(circuit2.ybus).copy()
+circuit2.calc_ybus()
+assert np.allclose(ybus_array(circuit2.ybus), stored_ybus)
+power_flow = Power_Flow(circuit2, Jacobian(circuit2))
+power_flow.solve(circuit2.buses, circuit2.ybus)
+print(f"Newton steps from the loaded state: {power_flow.iterations}")
+assert power_flow.converged and power_flow.iterations <= 1
+
+# the element tables keep the grounding and sequence data: forcing a rebuild of the sequence networks from
+# them gives the original networks again, in both Ybus modes
+for sparse in (False, True):
+    circuit3 = load_snapshot(path, sparse=sparse)
+    circuit3.sequence_version = None
+    circuit3.calc_zero_negative_ybus()
+    for name in ("zero_ybus", "negative_ybus"):
+        difference = ybus_array(getattr(circuit3, name)) - ybus_array(getattr(circuit1, name))
+        assert np.max(np.abs(difference)) < 1e-9, f"{name} rebuilt from the snapshot differs"
+    assert [t.connection_type for t in circuit3.transformers.values()] == ['delta-y', 'y-delta']
+
+# faults on the loaded circuit use the stored sequence networks
+I_loaded = load_snapshot(path, sparse=True).asym_fault_sweep()[0]
+assert np.allclose(I_loaded, circuit1.asym_fault_sweep()[0])
+
+# a sparse loaded circuit keeps the mapped Ybus until it changes it in place, then works on its own copy
+circuit4 = load_snapshot(path, sparse=True)
+assert not circuit4.ybus.data.flags.writeable
+circuit4.add_shunt_capacitor("Capacitor 1", "Bus3", 10)
+circuit1.add_shunt_capacitor("Capacitor 1", "Bus3", 10)
+assert circuit4.ybus.data.flags.writeable
+assert np.allclose(circuit4.ybus.toarray(), ybus_array(circuit1.ybus))
@@ -1,5 +1,6 @@
 from circuit import Circuit
 from jacobian import Jacobian
+from settings import Settings
 #solution class to run a power flow study or fault study based on mode specified by the user
 #if solve_mode is power_flow, Solution will calculate y_bus and then jacobian
 #if solve_mode is fault_study, Solution will run whatever is needed to calculate fault_study
@@ -27,9 +28,12 @@ class Solution:
             self.circuit.calc_ybus()
             self.circuit.modify_y_bus()
             fault_current,fault_voltage = self.circuit.calculate_fault(bus_name)
-            print("\nybus:\n", self.circuit.ybus, "\n")
-            print("\nfault_current:\n", fault_current)
-            print("\nfault_voltage:\n", fault_voltage)
+            if Settings.verbosity >= Settings.DEBUG:
+                print("\nybus:\n", self.circuit.ybus, "\n")
+            if Settings.verbosity >= Settings.SUMMARY:
+                print("\nfault_current:\n", fault_current)
+                print("\nfault_voltage:\n", fault_voltage)
+            return fault_current, fault_voltage
 
         if mode == 'line_to_ground':
             pass
@@ -0,0 +1,131 @@
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+import numpy as np
+import pandas as pd
+
+#instrumentation of the hot stages of Circuit, Jacobian and Power_Flow: named stage timers, counters and one
+#record per solver iteration
+#the active collector is Settings.telemetry; the default NULL_TELEMETRY does nothing (stage() hands back one
+#shared no-op context manager, count() and iteration() return at once), so uninstrumented runs only pay a
+#method call per stage
+#Telemetry collects per stage the calls, wall time (from a pluggable timer function) and the change in
+#allocated memory blocks (sys.getallocatedblocks, plus traced bytes while tracemalloc is running), named
+#counters, and per solver iteration the wall time, allocated blocks, mismatch norms and step size
+#listeners are called with every event as it happens, e.g. to push it into an external metrics pipeline,
+#and report() returns everything collected as plain dicts and lists
+#stages may nest (e.g. jacobian.build inside a solve); each stage's time includes its nested stages
+#usage:
+#   with Telemetry() as telemetry:
+#       power_flow.solve(circuit.buses, circuit.ybus)
+#   telemetry.report()
+
+_NO_STAGE = nullcontext()
+
+
+class Null_Telemetry:
+    # the no-op collector
+
+    enabled = False
+
+    def stage(self, name):
+        return _NO_STAGE
+
+    def count(self, name, value=1):
+        pass
+
+    def mark(self):
+        return None
+
+    def iteration(self, solver, mark, mismatch, **values):
+        pass
+
+
+NULL_TELEMETRY = Null_Telemetry()
+
+
+class Telemetry:
+
+    enabled = True
+
+    def __init__(self, timer=time.perf_counter, listeners=None):
+        self.timer = timer  # any function returning seconds, e.g. time.process_time for CPU time
+        self.listeners = list(listeners or [])  # called with each event dict
+        self.previous = None
+        self.reset()
+
+    def reset(self):
+        self.stages = {}  # name -> {"calls", "seconds", "allocated_blocks", "allocated_bytes"}
+        self.counters = {}
+        self.iterations = []
+
+    def __enter__(self):
+        # installs this collector as Settings.telemetry until the block ends
+        from settings import Settings  # settings imports this module for the default collector
+        self.previous = Settings.telemetry
+        Settings.telemetry = self
+        return self
+
+    def __exit__(self, *exc):
+        from settings import Settings
+        Settings.telemetry = self.previous
+        self.previous = None
+        return False
+
+    def mark(self):
+        # wall time and allocation counters at this point, the start of a stage or iteration
+        traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        return self.timer(), sys.getallocatedblocks(), traced
+
+    def since(self, mark):
+        start, blocks, traced = mark
+        now_traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        return self.timer() - start, sys.getallocatedblocks() - blocks, now_traced - traced
+
+    @contextmanager
+    def stage(self, name):
+        mark = self.mark()
+        try:
+            yield
+        finally:
+            seconds, blocks, traced = self.since(mark)
+            totals = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "allocated_blocks": 0,
+                                                   "allocated_bytes": 0})
+            totals["calls"] += 1
+            totals["seconds"] += seconds
+            totals["allocated_blocks"] += blocks
+            totals["allocated_bytes"] += traced
+            self.emit({"event": "stage", "name": name, "seconds": seconds, "allocated_blocks": blocks,
+                       "allocated_bytes": traced})
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+        self.emit({"event": "counter", "name": name, "value": value})
+
+    def iteration(self, solver, mark, mismatch, **values):
+        # one solver iteration started at mark; mismatch is its mismatch vector, values any extra fields
+        # (iteration number, step size, ...)
+        seconds, blocks, traced = self.since(mark)
+        record = {"solver": solver, **values, "seconds": seconds, "allocated_blocks": blocks,
+                  "allocated_bytes": traced,
+                  "max_mismatch": float(np.max(np.abs(mismatch), initial=0)),
+                  "mismatch_norm": float(np.linalg.norm(mismatch))}
+        self.iterations.append(record)
+        self.emit({"event": "iteration", **record})
+
+    def emit(self, event):
+        for listener in self.listeners:
+            listener(event)
+
+    def report(self):
+        """Everything collected so far: {"stages": {name: totals}, "counters": {name: value}, "iterations": [records]}."""
+        return {"stages": {name: dict(totals) for name, totals in self.stages.items()},
+                "counters": dict(self.counters),
+                "iterations": [dict(record) for record in self.iterations]}
+
+    def stage_table(self):
+        return pd.DataFrame.from_dict(self.stages, orient="index").rename_axis("stage")
+
+    def iteration_table(self):
+        return pd.DataFrame(self.iterations)
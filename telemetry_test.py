@@ -0,0 +1,27 @@
+from seven_bus import build_circuit
+from telemetry import Telemetry, NULL_TELEMETRY
+from jacobian import Jacobian
+from power_flow import Power_Flow
+from settings import Settings
+
+
+# Where the time of one Newton-Raphson solve of the 7-bus system goes
+Settings.verbosity = Settings.SILENT
+circuit1 = build_circuit()
+events = []
+with Telemetry(listeners=[events.append]) as telemetry:
+    power_flow = Power_Flow(circuit1, Jacobian(circuit1))
+    power_flow.solve(circuit1.buses, circuit1.ybus)
+    circuit1.fault_sweep(["Bus3"])
+
+print(telemetry.stage_table().to_string())
+print(telemetry.iteration_table()[["iteration", "seconds", "max_mismatch", "mismatch_norm", "step", "step_norm"]])
+print(telemetry.counters)
+
+report = telemetry.report()
+assert len(report["iterations"]) == power_flow.iterations == report["counters"]["newton.iterations"]
+assert report["stages"]["jacobian.build"]["calls"] == power_flow.iterations - 1  # none after convergence
+assert report["stages"]["circuit.fault_factorization"]["calls"] == 1
+assert sum(event["event"] == "stage" for event in events) == sum(s["calls"] for s in report["stages"].values())
+assert sum(event["event"] == "iteration" for event in events) == power_flow.iterations
+assert Settings.telemetry is NULL_TELEMETRY  # restored after the block
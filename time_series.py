@@ -0,0 +1,165 @@
+from circuit import Circuit, calc_branch_flows
+from jacobian import Jacobian
+from power_flow import Power_Flow
+from settings import Settings
+import json
+import os
+import numpy as np
+import pandas as pd
+
+#quasi-static time-series power flow: each timestep sets the loads and generators of the circuit from a
+#profile and solves the power flow warm-started from the previous step
+#loads only change the scheduled injections, so the Ybus, the Jacobian object and the cached sparse ordering
+#are reused for the whole run
+#profiles are streamed (an iterable of rows or of DataFrame chunks, e.g. csv_profile) and the results are
+#appended to an on-disk Column_Store, so memory use does not grow with the number of timesteps
+#profile columns are "<load name>.P", "<load name>.Q" (MW/Mvar) and "<generator name>.P" (MW)
+
+
+def csv_profile(path, chunksize=1000):
+    # streams a profile CSV in chunks of rows instead of reading the whole year at once
+    yield from pd.read_csv(path, chunksize=chunksize)
+
+
+class Column_Store:
+    # append-only columnar store on disk: one raw binary file per column plus a metadata.json with the column
+    # names, dtypes, row count and any extra metadata; rows are buffered and appended to the files in blocks
+
+    def __init__(self, path, columns, dtypes=None, metadata=None, buffer_rows=256):
+        self.path = path
+        self.columns = list(columns)
+        dtypes = dtypes or {}
+        self.dtypes = [np.dtype(dtypes.get(column, np.float64)).str for column in self.columns]
+        self.files = [f"{i:05d}.bin" for i in range(len(self.columns))]
+        self.metadata = metadata or {}
+        self.rows = 0
+        self.buffer = np.empty((buffer_rows, len(self.columns)))
+        self.pending = 0
+        os.makedirs(path, exist_ok=True)
+        for name in self.files:
+            open(os.path.join(path, name), "wb").close()
+        self.write_metadata()
+
+    def append(self, row):
+        # row holds one value per column, in column order
+        self.buffer[self.pending] = row
+        self.pending += 1
+        if self.pending == len(self.buffer):
+            self.flush()
+
+    def flush(self):
+        for k, (name, dtype) in enumerate(zip(self.files, self.dtypes)):
+            with open(os.path.join(self.path, name), "ab") as file:
+                file.write(self.buffer[:self.pending, k].astype(dtype).tobytes())
+        self.rows += self.pending
+        self.pending = 0
+        self.write_metadata()
+
+    def close(self):
+        self.flush()
+
+    def write_metadata(self):
+        with open(os.path.join(self.path, "metadata.json"), "w") as file:
+            json.dump({"rows": self.rows, "columns": self.columns, "dtypes": self.dtypes, "files": self.files,
+                       "metadata": self.metadata}, file, indent=1)
+
+    @staticmethod
+    def read_metadata(path):
+        with open(os.path.join(path, "metadata.json")) as file:
+            return json.load(file)
+
+    @staticmethod
+    def read(path, column):
+        # one column as a read-only memory map, so a single bus or branch of a long run can be loaded alone
+        metadata = Column_Store.read_metadata(path)
+        k = metadata["columns"].index(column)
+        if metadata["rows"] == 0:
+            return np.zeros(0, dtype=metadata["dtypes"][k])
+        return np.memmap(os.path.join(path, metadata["files"][k]), dtype=metadata["dtypes"][k], mode="r",
+                         shape=(metadata["rows"],))
+
+
+class Time_Series:
+
+    def __init__(self, circuit: Circuit, method: str = "newton", tol: float = 10**-9, max_iter: int = 20):
+        self.circuit = circuit
+        self.jacobian = Jacobian(circuit)
+        self.power_flow = Power_Flow(circuit, self.jacobian)
+        self.method = method
+        self.tol = tol
+        self.max_iter = max_iter
+        self.steps = 0
+        self.failed_steps = []  # steps that did not converge; the next step restarts from the last good state
+
+    def setters(self, columns):
+        # maps each profile column to the Circuit call that applies it
+        setters = []
+        for column in columns:
+            element, _, quantity = column.rpartition(".")
+            if element in self.circuit.loads and quantity in ("P", "Q"):
+                setters.append(("load", element, quantity))
+            elif element in self.circuit.generators and quantity == "P":
+                setters.append(("generator", element, quantity))
+            else:
+                raise ValueError(f"Profile column {column} is not '<load>.P', '<load>.Q' or '<generator>.P'")
+        return setters
+
+    def apply(self, setters, values):
+        circuit = self.circuit
+        for (kind, element, quantity), value in zip(setters, values):
+            if kind == "generator":
+                circuit.set_generation(element, value)
+            elif quantity == "P":
+                circuit.set_load(element, value, circuit.loads[element].reactive_power)
+            else:
+                circuit.set_load(element, circuit.loads[element].real_power, value)
+
+    def rows(self, profile):
+        # (setters, values) per timestep from an iterable of dict rows or of DataFrame chunks
+        for block in profile:
+            if isinstance(block, pd.DataFrame):
+                setters = self.setters(block.columns)
+                yield from ((setters, values) for values in block.to_numpy(dtype=float))
+            else:
+                yield self.setters(block.keys()), list(block.values())
+
+    def run(self, profile, path, buffer_rows=256):
+        """Solve every timestep of the profile and append the results to a Column_Store at path.
+
+        Stored columns: step, converged, iterations, V/<bus> (pu), angle/<bus> (degrees) and the flow into
+        each branch at its from bus, P/<branch> (MW) and Q/<branch> (Mvar). Returns the store.
+        """
+        circuit = self.circuit
+        from_idx, to_idx, yprim = circuit.branch_primitives()
+        branch_names = circuit.branch_names()
+        columns = (["step", "converged", "iterations"] + [f"V/{bus}" for bus in circuit.bus_order]
+                   + [f"angle/{bus}" for bus in circuit.bus_order]
+                   + [f"P/{branch}" for branch in branch_names] + [f"Q/{branch}" for branch in branch_names])
+        store = Column_Store(path, columns, dtypes={"step": np.int64, "converged": np.int8, "iterations": np.int16},
+                             metadata={"circuit": circuit.name, "base_power": Settings.base_power},
+                             buffer_rows=buffer_rows)
+
+        verbosity = Settings.verbosity
+        Settings.verbosity = Settings.SILENT  # one report per timestep would swamp the output
+        try:
+            last_good = self.power_flow.snapshot()
+            for setters, values in self.rows(profile):
+                self.apply(setters, values)
+                self.power_flow.solve(circuit.buses, circuit.ybus, self.tol, self.max_iter, self.method)
+                if self.power_flow.converged:
+                    last_good = self.power_flow.snapshot()
+                else:
+                    self.failed_steps.append(self.steps)
+
+                state = circuit.bus_state
+                S_from, _ = calc_branch_flows(state.vpu * np.exp(1j * state.delta), from_idx, to_idx, yprim)
+                S_from = S_from * Settings.base_power
+                store.append(np.concatenate([[self.steps, self.power_flow.converged, self.power_flow.iterations],
+                                             state.vpu, np.degrees(state.delta), S_from.real, S_from.imag]))
+                if not self.power_flow.converged:
+                    self.power_flow.restore(last_good)
+                self.steps += 1
+        finally:
+            Settings.verbosity = verbosity
+            store.close()
+        return store
@@ -0,0 +1,28 @@
+from seven_bus import build_circuit
+from time_series import Time_Series, Column_Store
+import numpy as np
+import tempfile
+
+
+def daily_profile(hours):
+    # loads follow a daily cycle around their nominal values, Generator 2 follows the total load
+    for hour in range(hours):
+        factor = 0.8 + 0.25 * np.sin(2 * np.pi * hour / 24)
+        yield {"Load 1.P": 110 * factor, "Load 1.Q": 50 * factor,
+               "Load 2.P": 100 * factor, "Load 2.Q": 70 * factor,
+               "Load 3.P": 100 * factor, "Load 3.Q": 65 * factor,
+               "Generator 2.P": 200 * factor}
+
+
+# Two days of hourly quasi-static power flows, results streamed to an on-disk column store
+circuit1 = build_circuit()
+time_series = Time_Series(circuit1)
+path = tempfile.mkdtemp()
+time_series.run(daily_profile(48), path)
+
+iterations = Column_Store.read(path, "iterations")
+voltages = Column_Store.read(path, "V/Bus5")
+print(f"Steps: {Column_Store.read_metadata(path)['rows']}, failed: {time_series.failed_steps}")
+print(f"Iterations per step: max {iterations.max()}, mean {iterations.mean():.2f}")
+print(f"Bus5 voltage: min {voltages.min():.4f} p.u., max {voltages.max():.4f} p.u.")
+assert len(voltages) == 48 and not time_series.failed_steps
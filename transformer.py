@@ -1,10 +1,20 @@
 import numpy as np
-import pandas as pd
 from bus import Bus
 from settings import Settings
+from branch_table import Branch_Table, yprim_frame
+
+# winding connection names by code, as stored in circuit snapshots
+CONNECTION_TYPES = ['y-y', 'y-delta', 'delta-y', 'delta-delta']
 
 class Transformer:
-    def __init__(self, name: str, bus1: Bus, bus2: Bus, power_rating: float, impedance_percent: float, x_over_r_ratio: float, connection_type: str, z_ground: float, is_grounded: str):
+    # the primitive admittances live in a Branch_Table row; y_matrix, negative_yprim and zero_yprim are built
+    # from it on demand
+    __slots__ = ("name", "bus1", "bus2", "power_rating", "impedance_percent", "x_over_r_ratio", "connection_type",
+                 "is_grounded", "zseries", "yseries", "tap", "charging", "positive_z", "negative_z", "z_ground",
+                 "zero_z", "zero_y", "positive_y", "negative_y", "table", "table_index")
+
+    def __init__(self, name: str, bus1: Bus, bus2: Bus, power_rating: float, impedance_percent: float, x_over_r_ratio: float, connection_type: str, z_ground: float, is_grounded: str,
+                 table: Branch_Table = None):
         self.name = name
         self.bus1 = bus1
         self.bus2 = bus2
@@ -17,7 +27,41 @@ class Transformer:
         # Base impedance and admittance
         self.zseries = self.calc_impedance()
         self.yseries = self.calc_admittance()
-        self.y_matrix = self.calc_y_matrix()
+        self.tap = 1.0  # complex off-nominal turns ratio at bus1 (magnitude and phase shift)
+        self.charging = 0.0  # total magnetizing/charging admittance in per-unit, split between both ends
+        # row of the circuit's branch table (a private one for a standalone transformer)
+        self.table = table if table is not None else Branch_Table(1)
+        self.table_index = self.table.append()
+        self.table.yprim[self.table_index] = self.calc_y_matrix().ravel()
+        self.calc_sequence_data(1j * z_ground * (Settings.base_power / self.power_rating))
+
+    @classmethod
+    def from_per_unit(cls, name: str, bus1: Bus, bus2: Bus, r: float, x: float, b: float = 0.0, tap: float = 1.0,
+                      shift: float = 0.0, power_rating: float = np.inf, connection_type: str = 'y-y',
+                      z_ground: complex = 0.0, is_grounded: str = 'yes', table: Branch_Table = None):
+        # transformer from its series impedance and charging susceptance in per-unit on the system base, as
+        # given by case files; tap is the off-nominal ratio at bus1 and shift its phase shift in degrees
+        transformer = cls.__new__(cls)
+        transformer.name = name
+        transformer.bus1 = bus1
+        transformer.bus2 = bus2
+        transformer.power_rating = power_rating
+        transformer.impedance_percent = abs(complex(r, x)) * 100 * power_rating / Settings.base_power
+        transformer.x_over_r_ratio = x / r if r else np.inf
+        transformer.connection_type = connection_type
+        transformer.is_grounded = is_grounded
+        transformer.zseries = complex(r, x)
+        transformer.yseries = transformer.calc_admittance()
+        transformer.tap = tap * np.exp(1j * np.deg2rad(shift))
+        transformer.charging = 1j * b
+        transformer.table = table if table is not None else Branch_Table(1)
+        transformer.table_index = transformer.table.append()
+        transformer.table.yprim[transformer.table_index] = transformer.calc_y_matrix().ravel()
+        transformer.calc_sequence_data(z_ground)
+        return transformer
+
+    def calc_sequence_data(self, z_ground):
+        # z_ground is the grounding impedance in per-unit on the system base
 
         # Sequence impedances
         self.positive_z = self.zseries
@@ -28,7 +72,7 @@ class Transformer:
             self.zero_z = None
             self.zero_y = 0
         else:
-            self.z_ground = 1j * z_ground * (Settings.base_power / self.power_rating)
+            self.z_ground = z_ground
             self.zero_z = self.zseries + 3 * self.z_ground
             self.zero_y = 1 / self.zero_z
 
@@ -36,9 +80,20 @@ class Transformer:
         self.positive_y = 1 / self.positive_z
         self.negative_y = 1 / self.negative_z
 
-        # Yprim Matrices
-        self.negative_yprim = self.y_matrix  # negative-sequence same as positive
-        self.zero_yprim = self.create_zero_yprim()
+        # Yprim Matrices (negative-sequence same as positive)
+        self.table.zero_yprim[self.table_index] = self.create_zero_yprim().ravel()
+
+    @property
+    def y_matrix(self):
+        return yprim_frame(self.table.yprim[self.table_index], [self.bus1.name, self.bus2.name])
+
+    @property
+    def negative_yprim(self):
+        return self.y_matrix
+
+    @property
+    def zero_yprim(self):
+        return yprim_frame(self.table.zero_yprim[self.table_index], [self.bus1.name, self.bus2.name])
 
     def calc_impedance(self):
         zpu = self.impedance_percent / 100 * np.exp(1j * np.arctan(self.x_over_r_ratio)) * Settings.base_power / self.power_rating
@@ -49,11 +104,11 @@ class Transformer:
 
     def calc_y_matrix(self):
         y_matrix = np.zeros((2, 2), dtype=complex)
-        y_matrix[0, 0] = self.yseries
-        y_matrix[0, 1] = -self.yseries
-        y_matrix[1, 0] = -self.yseries
-        y_matrix[1, 1] = self.yseries
-        return pd.DataFrame(y_matrix, index=[self.bus1.name, self.bus2.name], columns=[self.bus1.name, self.bus2.name])
+        y_matrix[0, 0] = (self.yseries + self.charging / 2) / abs(self.tap) ** 2
+        y_matrix[0, 1] = -self.yseries / np.conj(self.tap)
+        y_matrix[1, 0] = -self.yseries / self.tap
+        y_matrix[1, 1] = self.yseries + self.charging / 2
+        return y_matrix
 
     def create_zero_yprim(self):
         yprim_zero = np.zeros((2, 2), dtype=complex)
@@ -85,5 +140,4 @@ class Transformer:
         else:
             raise ValueError("Invalid transformer connection type")
 
-        return pd.DataFrame(yprim_zero, index=[self.bus1.name, self.bus2.name],
-                            columns=[self.bus1.name, self.bus2.name])
+        return yprim_zero
@@ -1,17 +1,25 @@
 import numpy as np
-import pandas as pd
-from conductor import Conductor
 from bundle import Bundle
 from geometry import Geometry
 from bus import Bus
 from settings import Settings
+from branch_table import Branch_Table, yprim_frame
+
+E_NOUGHT = 8.854 * 10 ** -12  # value of e nought
 
 
 class TransmissionLine:
     f = Settings.frequency  # obtain the frequency from settings.py
+    # series impedance (ohms/mile) and shunt admittance (siemens/mile) by construction: lines sharing a bundle,
+    # geometry and frequency only differ by length and base kV, so the logarithms are only taken once
+    unit_parameter_cache = {}
+    # the primitive admittances live in a Branch_Table row; y_matrix and zero_yprim are built from it on demand
+    __slots__ = ("name", "bus1", "bus2", "bundle", "geometry", "length", "is_grounded", "e_nought", "r",
+                 "impedance_pu", "shunt_admittance", "series_admittance", "rating", "z_positive", "z_negative",
+                 "z_zero", "y_positive", "y_negative", "y_zero", "table", "table_index")
 
     def __init__(self, name: str, bus1: Bus, bus2: Bus, bundle: Bundle, geometry: Geometry, length: float,
-                 is_grounded=True):
+                 is_grounded=True, table: Branch_Table = None):
         self.name = name
         self.bus1 = bus1
         self.bus2 = bus2
@@ -22,14 +30,48 @@ class TransmissionLine:
 
         z_base = self.bus1.base_kv ** 2 / Settings.base_power  # calculate the z_base
 
-        self.e_nought = 8.854 * 10 ** -12  # value of e nought
+        self.e_nought = E_NOUGHT
         self.r = self.bundle.conductor.resistance / self.bundle.num_conductors  # obtain resistance of line, assuming ohms/mile
 
         self.impedance_pu = self.calc_impedance() / z_base  # get value of impedance in ohms
         self.shunt_admittance = self.calc_admittance() * z_base  # get value of admittance in siemens
         self.series_admittance = 1 / self.impedance_pu
-        self.y_matrix = self.calc_y_matrix()  # automatically creating the admittance matrix
+        # row of the circuit's branch table (a private one for a standalone line)
+        self.table = table if table is not None else Branch_Table(1)
+        self.table_index = self.table.append()
+        self.table.yprim[self.table_index] = self.calc_y_matrix().ravel()  # automatically creating the admittance matrix
+        # thermal rating in MVA: the ampacity of every conductor of the bundle at the line voltage
+        self.rating = np.sqrt(3) * self.bus1.base_kv * self.bundle.conductor.ampacity * self.bundle.num_conductors / 1000
+        self.calc_sequence_data()
+
+    @classmethod
+    def from_per_unit(cls, name: str, bus1: Bus, bus2: Bus, r: float, x: float, b: float, rating: float = np.inf,
+                      is_grounded=True, table: Branch_Table = None, bundle: Bundle = None, geometry: Geometry = None,
+                      length: float = None):
+        # line from its series impedance and total charging susceptance in per-unit on the system base, as
+        # given by case files; bundle, geometry and length are only kept for reference, when the per-unit
+        # values were derived from them (batched construction)
+        line = cls.__new__(cls)
+        line.name = name
+        line.bus1 = bus1
+        line.bus2 = bus2
+        line.bundle = bundle
+        line.geometry = geometry
+        line.length = length
+        line.e_nought = E_NOUGHT if bundle is not None else None
+        line.r = bundle.conductor.resistance / bundle.num_conductors if bundle is not None else None
+        line.is_grounded = is_grounded
+        line.impedance_pu = complex(r, x)
+        line.shunt_admittance = 1j * b
+        line.series_admittance = 1 / line.impedance_pu
+        line.table = table if table is not None else Branch_Table(1)
+        line.table_index = line.table.append()
+        line.table.yprim[line.table_index] = line.calc_y_matrix().ravel()
+        line.rating = rating
+        line.calc_sequence_data()
+        return line
 
+    def calc_sequence_data(self):
         # define sequence impedances
         self.z_positive = self.impedance_pu
         self.z_negative = self.impedance_pu
@@ -41,18 +83,37 @@ class TransmissionLine:
         self.y_zero = 1 / self.z_zero if self.is_grounded else 0
 
         # calculate yprim matrices for zero, positive, and negative sequences
-        self.zero_yprim = self.calc_zero_yprim()  # positive and negative use y_matrix
+        self.table.zero_yprim[self.table_index] = self.calc_zero_yprim().ravel()  # positive and negative use y_matrix
+
+    @property
+    def y_matrix(self):
+        return yprim_frame(self.table.yprim[self.table_index], [self.bus1.name, self.bus2.name])
 
-    def calc_impedance(self):  # z'=R'+jwL'
-        L = (2 * (10 ** -7)) * np.log(
-            self.geometry.DEQ / self.bundle.DSL)  # calculate distributed inductance in Henrys/meter
-        return (self.r + 1j * 2 * np.pi * Settings.frequency * L * 1609.34) * self.length  # convert to ohms/mile
+    @property
+    def zero_yprim(self):
+        return yprim_frame(self.table.zero_yprim[self.table_index], [self.bus1.name, self.bus2.name])
+
+    @classmethod
+    def unit_parameters(cls, bundle: Bundle, geometry: Geometry):
+        # (series impedance per mile, shunt admittance per mile), keyed by the values that define them, so
+        # separately created but identical bundles and geometries share one entry
+        key = (bundle.conductor.resistance, bundle.num_conductors, bundle.DSL, bundle.DSC, geometry.DEQ,
+               Settings.frequency)
+        if key not in cls.unit_parameter_cache:
+            r = bundle.conductor.resistance / bundle.num_conductors  # assuming ohms/mile
+            # z'=R'+jwL'
+            L = (2 * (10 ** -7)) * np.log(geometry.DEQ / bundle.DSL)  # calculate distributed inductance in Henrys/meter
+            z = r + 1j * 2 * np.pi * Settings.frequency * L * 1609.34  # convert to ohms/mile
+            C = (2 * np.pi * E_NOUGHT) / (np.log((geometry.DEQ / bundle.DSC)))  # distributed capacitance in Farads/meter
+            y = 1j * 2 * np.pi * Settings.frequency * C * 1609.34  # convert to siemens/mile, conductance omitted
+            cls.unit_parameter_cache[key] = (z, y)
+        return cls.unit_parameter_cache[key]
+
+    def calc_impedance(self):
+        return self.unit_parameters(self.bundle, self.geometry)[0] * self.length
 
     def calc_admittance(self):
-        C = (2 * np.pi * self.e_nought) / (
-            np.log((self.geometry.DEQ / self.bundle.DSC)))  # distributed capacitance in Farads/meter
-        return (
-                    1j * 2 * np.pi * Settings.frequency * C * 1609.34) * self.length  # convert to siemens/mile, conductance omitted
+        return self.unit_parameters(self.bundle, self.geometry)[1] * self.length
 
     def calc_y_matrix(self):
         y_matrix = np.zeros((2, 2), dtype=complex)  # initializing a 2x2 matrix of zeros
@@ -61,17 +122,12 @@ class TransmissionLine:
         y_matrix[0, 1] = -self.series_admittance
         y_matrix[1, 0] = -self.series_admittance
         y_matrix[1, 1] = self.shunt_admittance / 2 + self.series_admittance
-        # Create DataFrame with custom indices and columns
-        df_y_matrix = pd.DataFrame(y_matrix, index=[self.bus1.name, self.bus2.name],
-                                   columns=[self.bus1.name, self.bus2.name])
-
-        return df_y_matrix
+        return y_matrix
 
     def calc_zero_yprim(self):
         if not self.is_grounded:
             # zero-sequence current cannot flow through ungrounded lines
-            return pd.DataFrame(np.zeros((2, 2), dtype=complex), index=[self.bus1.name, self.bus2.name],
-                                columns=[self.bus1.name, self.bus2.name])
+            return np.zeros((2, 2), dtype=complex)
 
         y_matrix = np.zeros((2, 2), dtype=complex)  # initializing a 2x2 matrix of zeros
         # creating admittance matrix (will need editing in future for the unknown admittances the buses connect to)
@@ -79,7 +135,4 @@ class TransmissionLine:
         y_matrix[0, 1] = -self.y_zero
         y_matrix[1, 0] = -self.y_zero
         y_matrix[1, 1] = self.y_zero
-        # Create DataFrame with custom indices and columns
-        df_y_matrix = pd.DataFrame(y_matrix, index=[self.bus1.name, self.bus2.name],
-                                   columns=[self.bus1.name, self.bus2.name])
-        return df_y_matrix
+        return y_matrix